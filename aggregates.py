@@ -0,0 +1,345 @@
+"""Mergeable aggregates behind the batch report (app.py).
+
+``partial_aggregates`` reduces a cleaned frame (or any slice of one) to small
+partial results: sums, counts, minima/maxima, a sparse fine-grid histogram of
+sales vs profit and bounded samples of outlier rows.  Partials of disjoint
+slices combine with ``merge_partials`` into exactly what one pass over the
+whole data would give, and ``finalize`` turns them into the series the
+report charts and text need.
+
+The partials are bounded by the number of months, categories, segments and
+occupied histogram cells, not by the number of rows, so ``stream_partials``
+can reduce an extract of any size one chunk at a time in fixed memory.
+
+``partials_by_cell`` keeps separate partials per region x market x year
+cell in the same pass; merging the cells of a slice (``slice_partials``)
+gives the partials of any region, market or year without touching the rows
+again.
+"""
+import numpy as np
+import pandas as pd
+
+from data_loader import DASHBOARD_COLUMNS, clean_sales_data, read_sales_csv
+from date_parsing import parse_dates
+from sketches import MarginSketch
+
+# Additive per-row measures
+MEASURES = ['sales', 'profit', 'orders', 'loss_orders', 'margin_sum']
+
+# Thresholds used throughout the report
+DISASTER_SALES = 1000       # "discount disaster": sales above this, negative profit
+GOLD_MINE_MARGIN = 50       # "gold mine": margin above this (%)
+BENCHMARK_MARGIN = 10       # typical retail margin (%) the report compares against
+
+# Sales/profit histogram grid in dollars, fixed so partials line up when merged
+FINE_BIN = 25
+
+# Rows per chunk in streaming mode (peak memory is roughly one chunk)
+DEFAULT_CHUNK_ROWS = 500_000
+
+# Outlier rows kept per category (deterministic bottom-k by row hash)
+OUTLIER_SAMPLE = 2000
+WORST_ROWS = 5
+
+# Columns of the cleaned frame that partial_aggregates reads
+PARTIAL_COLUMNS = ['order_date', 'category', 'segment', 'product_name',
+                   'sales_clean', 'profit_clean', 'discount_clean', 'profit_margin']
+
+# Finest slice kept by partials_by_cell; reports can be cut along any of these
+SLICE_DIMENSIONS = ['region', 'market', 'year']
+
+OUTLIER_COLUMNS = ['category', 'product_name', 'sales_clean', 'profit_clean',
+                   'discount_clean', 'profit_margin']
+
+
+def period_label(monthly_sales):
+    """``'2011-2014'`` (or ``'2013'``) for a month-indexed Series."""
+    if not len(monthly_sales):
+        return 'no orders'
+    first, last = monthly_sales.index.min().year, monthly_sales.index.max().year
+    return str(first) if first == last else f'{first}-{last}'
+
+
+def row_measures(df):
+    """Row-level measure columns of the cleaned frame."""
+    return pd.DataFrame({
+        'sales': df['sales_clean'],
+        'profit': df['profit_clean'],
+        'orders': 1,
+        'loss_orders': (df['profit_clean'] < 0).astype('int64'),
+        'margin_sum': df['profit_margin'],
+    }, index=df.index)
+
+
+def _disaster_mask(df):
+    return (df['sales_clean'] > DISASTER_SALES) & (df['profit_clean'] < 0)
+
+
+def _bottom_k_per_category(rows, k=OUTLIER_SAMPLE):
+    """Keep the ``k`` rows with the smallest hash per category (mergeable sample)."""
+    if len(rows) == 0:
+        return rows
+    rows = rows.sort_values(['category', '_hash'], kind='stable')
+    return rows.groupby('category', observed=True, sort=False).head(k)
+
+
+def partial_aggregates(df, rows_read=None, zero_sales=0):
+    """Mergeable partial aggregates of a cleaned frame (``data_loader.clean_sales_data``).
+
+    ``rows_read`` / ``zero_sales`` describe the raw rows before the $0 sales
+    were dropped; they default to the cleaned frame itself.
+    """
+    measures = row_measures(df)
+    measures['disasters'] = _disaster_mask(df).astype('int64')
+    measures['disaster_loss'] = df['profit_clean'].where(_disaster_mask(df), 0.0)
+    month = pd.DatetimeIndex(df['order_date'].to_numpy().astype('datetime64[M]'), name='month')
+    category = df['category'].astype(str)
+
+    # Sparse counts on a fixed dollar grid: small, and it merges by addition
+    fine = pd.DataFrame({
+        'category': category.to_numpy(),
+        'sales_bin': np.floor(df['sales_clean'].to_numpy() / FINE_BIN).astype('int64'),
+        'profit_bin': np.floor(df['profit_clean'].to_numpy() / FINE_BIN).astype('int64'),
+    })
+    density = fine.groupby(['category', 'sales_bin', 'profit_bin']).size()
+
+    disasters = df.loc[_disaster_mask(df), [c for c in OUTLIER_COLUMNS if c in df.columns]].copy()
+    for column in ['category', 'product_name']:
+        if column in disasters:
+            disasters[column] = disasters[column].astype(str)
+    disasters['_hash'] = pd.util.hash_pandas_object(disasters, index=False).to_numpy()
+    if 'discount_clean' in df:
+        disaster = _disaster_mask(df)
+        disaster_discount = df.loc[disaster, 'discount_clean'].groupby(category[disaster]).max()
+    else:
+        disaster_discount = pd.Series(dtype='float64')
+
+    margin = df['profit_margin']
+    return {
+        'rows_read': len(df) + zero_sales if rows_read is None else rows_read,
+        'zero_sales': zero_sales,
+        'monthly_sales': df['sales_clean'].groupby(month).sum(),
+        'segment': measures.groupby(df['segment'].astype(str)).sum(),
+        'category': measures.groupby(category).sum(),
+        'totals': measures.sum(),
+        'negative_margin': int((margin < 0).sum()),
+        'gold_mines': int((margin > GOLD_MINE_MARGIN).sum()),
+        'margin_sketch': MarginSketch.from_values(margin),
+        'extremes': {
+            'profit_min': float(df['profit_clean'].min()) if len(df) else np.inf,
+            'profit_max': float(df['profit_clean'].max()) if len(df) else -np.inf,
+            'margin_min': float(margin.min()) if len(df) else np.inf,
+            'margin_max': float(margin.max()) if len(df) else -np.inf,
+        },
+        'density': density,
+        'outliers': _bottom_k_per_category(disasters),
+        'worst': disasters.nsmallest(WORST_ROWS, 'profit_margin'),
+        'disaster_discount': disaster_discount,
+    }
+
+
+def _sum_aligned(items):
+    """Sum Series/DataFrames that may have different index labels.
+
+    When every item is empty the result is an empty one of the same shape
+    (columns and index levels), so slices without kept rows still finalize.
+    """
+    items = list(items)
+    present = [item for item in items if len(item)]
+    if not present:
+        return items[0].iloc[:0]
+    return pd.concat(present).groupby(level=list(range(present[0].index.nlevels))).sum()
+
+
+def _max_aligned(items):
+    """Per-label maximum of Series that may have different index labels."""
+    items = list(items)
+    present = [item for item in items if len(item)]
+    if not present:
+        return items[0].iloc[:0]
+    return pd.concat(present).groupby(level=0).max()
+
+
+def merge_partials(parts):
+    """Combine partial aggregates of disjoint slices into one."""
+    parts = list(parts)
+    if len(parts) == 1:
+        return parts[0]
+    worst = pd.concat([p['worst'] for p in parts])
+    return {
+        'rows_read': sum(p['rows_read'] for p in parts),
+        'zero_sales': sum(p['zero_sales'] for p in parts),
+        'monthly_sales': _sum_aligned(p['monthly_sales'] for p in parts),
+        'segment': _sum_aligned(p['segment'] for p in parts),
+        'category': _sum_aligned(p['category'] for p in parts),
+        'totals': sum(p['totals'] for p in parts),
+        'negative_margin': sum(p['negative_margin'] for p in parts),
+        'gold_mines': sum(p['gold_mines'] for p in parts),
+        'margin_sketch': sum((p['margin_sketch'] for p in parts), MarginSketch()),
+        'extremes': {
+            'profit_min': min(p['extremes']['profit_min'] for p in parts),
+            'profit_max': max(p['extremes']['profit_max'] for p in parts),
+            'margin_min': min(p['extremes']['margin_min'] for p in parts),
+            'margin_max': max(p['extremes']['margin_max'] for p in parts),
+        },
+        'density': _sum_aligned(p['density'] for p in parts),
+        'outliers': _bottom_k_per_category(pd.concat([p['outliers'] for p in parts])),
+        'worst': worst.nsmallest(WORST_ROWS, 'profit_margin'),
+        'disaster_discount': _max_aligned(p['disaster_discount'] for p in parts),
+    }
+
+
+def slice_keys(df, dimensions=SLICE_DIMENSIONS):
+    """Frame of the slice dimensions of ``df`` as plain values.
+
+    ``year`` falls back to the order date's year; a dimension the extract
+    does not have is ``'Unknown'``.
+    """
+    keys = {}
+    for dim in dimensions:
+        if dim in df:
+            keys[dim] = df[dim].astype(int if dim == 'year' else str).to_numpy()
+        elif dim == 'year' and 'order_date' in df:
+            dates = df['order_date']
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = parse_dates(dates)
+            keys[dim] = pd.DatetimeIndex(dates).year.to_numpy()
+        else:
+            keys[dim] = np.full(len(df), 'Unknown', dtype=object)
+    return pd.DataFrame(keys)
+
+
+def partials_by_cell(df, dimensions=SLICE_DIMENSIONS, zero_sales_keys=None):
+    """Partial aggregates per cell of ``dimensions`` (``{key tuple: partials}``).
+
+    ``zero_sales_keys`` is ``slice_keys`` of the raw $0 sales rows, so each
+    cell's ``rows_read`` / ``zero_sales`` match what the whole-extract
+    partials report.
+    """
+    zero_counts = {}
+    if zero_sales_keys is not None and len(zero_sales_keys):
+        zero_counts = zero_sales_keys.groupby(dimensions).size().to_dict()
+        zero_counts = {k if isinstance(k, tuple) else (k,): v for k, v in zero_counts.items()}
+
+    groups = slice_keys(df, dimensions).groupby(dimensions, sort=True).indices
+    cells = {}
+    for key, rows in groups.items():
+        key = key if isinstance(key, tuple) else (key,)
+        zero_sales = zero_counts.pop(key, 0)
+        cells[key] = partial_aggregates(df.take(rows), rows_read=len(rows) + zero_sales,
+                                        zero_sales=zero_sales)
+    for key, zero_sales in zero_counts.items():  # cells that only had $0 sales rows
+        cells[key] = partial_aggregates(df.iloc[:0], rows_read=zero_sales, zero_sales=zero_sales)
+    return cells
+
+
+def merge_cells(cell_sets):
+    """Combine ``partials_by_cell`` results of disjoint row sets."""
+    grouped = {}
+    for cells in cell_sets:
+        for key, part in cells.items():
+            grouped.setdefault(key, []).append(part)
+    return {key: merge_partials(parts) for key, parts in sorted(grouped.items())}
+
+
+def slice_partials(cells, by, dimensions=SLICE_DIMENSIONS):
+    """Partials per value of the dimensions ``by`` (``{value tuple: partials}``)."""
+    positions = [dimensions.index(dim) for dim in by]
+    grouped = {}
+    for key, part in cells.items():
+        grouped.setdefault(tuple(key[i] for i in positions), []).append(part)
+    return {value: merge_partials(parts) for value, parts in sorted(grouped.items())}
+
+
+def stream_partials(path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=DASHBOARD_COLUMNS,
+                    by_cell=False):
+    """Partial aggregates of a sales CSV read ``chunk_rows`` rows at a time.
+
+    Each chunk is cleaned, reduced and merged into the running partials
+    before the next one is read, so peak memory does not grow with the file.
+    With ``by_cell`` the result is ``partials_by_cell`` of the whole file.
+    """
+    merged = None
+    for raw in read_sales_csv(path, columns=columns, chunksize=chunk_rows):
+        zero_sales = raw['sales'] == 0
+        df = clean_sales_data(raw, sort=False)
+        if by_cell:
+            part = partials_by_cell(df, zero_sales_keys=slice_keys(raw[zero_sales]))
+            merged = part if merged is None else merge_cells([merged, part])
+            continue
+        part = partial_aggregates(df, rows_read=len(raw), zero_sales=int(zero_sales.sum()))
+        merged = part if merged is None else merge_partials([merged, part])
+    if merged is None:
+        raise ValueError(f"No rows in {path}")
+    return merged
+
+
+def _stratified_outliers(outliers, disasters_per_category, limit=OUTLIER_SAMPLE):
+    """Outlier points for chart 5, allocated to categories by their disaster share."""
+    total = disasters_per_category.sum()
+    if total <= limit:
+        return outliers
+    quota = (disasters_per_category / total * limit).round().astype(int)
+    rank = outliers.groupby('category', observed=True).cumcount()
+    return outliers[rank < outliers['category'].map(quota).fillna(0)]
+
+
+def finalize(partials):
+    """Report-ready aggregates (all small) from merged partials."""
+    # Imported here: charts pulls in matplotlib, which the merge workers never need
+    from charts import density_from_fine_grid
+
+    segment = partials['segment'].astype({'orders': 'int64', 'loss_orders': 'int64'})
+    category = partials['category'].astype({'orders': 'int64', 'loss_orders': 'int64'})
+    totals = partials['totals']
+
+    category_profit = pd.DataFrame({
+        'sales_clean': category['sales'],
+        'profit_clean': category['profit'],
+        'profit_margin': category['margin_sum'] / category['orders'],
+    }).round(2)
+    category_profit['overall_margin'] = (category['profit'] / category['sales'] * 100).round(1)
+
+    outliers = _stratified_outliers(partials['outliers'], category['disasters'])
+    total_sales = float(totals['sales'])
+    total_profit = float(totals['profit'])
+    orders = int(totals['orders'])
+
+    monthly = partials['monthly_sales'].sort_index()
+    monthly.index = pd.DatetimeIndex(monthly.index, name='year_month')
+
+    return {
+        'rows_read': int(partials['rows_read']),
+        'zero_sales': int(partials['zero_sales']),
+        'monthly_sales': monthly,
+        'segment_sales': segment['sales'].sort_values(ascending=False),
+        'category_sales': category['sales'].sort_values(ascending=False),
+        'segment_margin': segment['margin_sum'] / segment['orders'],
+        'category_margin': category['margin_sum'] / category['orders'],
+        'segment': segment,
+        'category': category,
+        'category_profit': category_profit,
+        'totals': {
+            'total_sales': total_sales,
+            'total_profit': total_profit,
+            'overall_margin': total_profit / total_sales * 100 if total_sales else 0.0,
+            'orders': orders,
+            'loss_orders': int(totals['loss_orders']),
+            'disasters': int(totals['disasters']),
+            'disaster_loss': float(totals['disaster_loss']),
+            'negative_margin': int(partials['negative_margin']),
+            'gold_mines': int(partials['gold_mines']),
+            **partials['extremes'],
+        },
+        'margin_percentiles': partials['margin_sketch'].percentiles(),
+        'worst_disasters': partials['worst'].drop(columns='_hash').reset_index(drop=True),
+        # Deepest discount among each category's disasters (all of them, not just the worst)
+        'disaster_discount': partials['disaster_discount'],
+        'density': density_from_fine_grid(partials['density'], FINE_BIN,
+                                          outliers.drop(columns='_hash')),
+    }
+
+
+def report_aggregates(df, rows_read=None, zero_sales=0):
+    """One-pass convenience: ``finalize(partial_aggregates(df))``."""
+    return finalize(partial_aggregates(df, rows_read=rows_read, zero_sales=zero_sales))
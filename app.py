@@ -1,455 +1,231 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-
-# Load the data
-df = pd.read_csv("sales_data.csv")
-
-print("Shape of Dataset:", df.shape)
-print("\nDataset Information")
-print(df.info())
-print("\nStatistical Summary")
-print(df.describe())
-print("\nMissing values in each column")
-print(df.isnull().sum())
-print("\nColumn names:")
-print(df.columns)
-print("\nSample order_date values:")
-print(df['order_date'].head())
-print("\nData type of order_date:")
-print(df['order_date'].dtype)
-
-# Define your brand colors (use these everywhere)
-COLORS = {
-    'primary': '#2E86AB',      # Blue - main brand
-    'secondary': '#A23B72',    # Magenta - accent
-    'tertiary': '#F18F01',     # Orange - highlight
-    'success': '#2ecc71',      # Green - positive
-    'danger': '#e74c3c',       # Red - negative/warning
-    'warning': '#f1c40f',      # Yellow - caution
-    'neutral': '#95a5a6'       # Gray - neutral
-}
-
-# Category colors (consistent across all charts)
-CATEGORY_COLORS = {
-    'Technology': '#2E86AB',      # Blue
-    'Furniture': '#A23B72',       # Magenta  
-    'Office Supplies': '#F18F01'  # Orange
-}
-
-# Segment colors (consistent across all charts)
-SEGMENT_COLORS = {
-    'Consumer': '#e74c3c',      # Red - emotional
-    'Corporate': '#3498db',     # Blue - professional
-    'Home Office': '#2ecc71'    # Green - growth
-}
-
-# Set global matplotlib style
-plt.rcParams['font.size'] = 10
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['axes.labelsize'] = 12
-plt.rcParams['figure.dpi'] = 100
-
-print("Style guide loaded!")
-print("Category colors:", CATEGORY_COLORS)
-print("Segment colors:", SEGMENT_COLORS)
-
-# Convert order_date to datetime
-df["order_date"] = pd.to_datetime(
-    df["order_date"],
-    format="mixed",
-    dayfirst=True
-)
-
-print("\nConverted order_date:")
-print(df["order_date"].head())
-
-# Convert ship_date to datetime
-df["ship_date"] = pd.to_datetime(
-    df["ship_date"],
-    format="mixed",
-    dayfirst=True
-)
-
-print("\nConverted ship_date:")
-print(df["ship_date"].head())
-
-# Create time features
-df['month'] = df['order_date'].dt.month
-df['month_name'] = df['order_date'].dt.month_name()
-
-print("\nTime features:")
-print(df[['order_date', 'year', 'month', 'month_name']].head())
-
-# Clean sales data (remove commas and convert to number)
-df['sales_clean'] = df['sales'].astype(str).str.replace(',', '').astype(float)
-
-# Create year-month grouping
-df['year_month'] = df['order_date'].dt.to_period('M')
-monthly_sales = df.groupby('year_month')['sales_clean'].sum().reset_index()
-
-# Convert period to timestamp for plotting
-monthly_sales['year_month'] = monthly_sales['year_month'].dt.to_timestamp()
-
-print("\nMonthly sales data:")
-print(monthly_sales.head())
-
-# Create the plot
-# ============================================
-# CHART 1: MONTHLY SALES TREND (Line Chart)
-# ============================================
-
-plt.figure(figsize=(14, 6))
-
-plt.plot(monthly_sales['year_month'], monthly_sales['sales_clean'], 
-         marker='o', linewidth=2.5, markersize=5, 
-         color=COLORS['primary'], label='Monthly Sales')
-
-plt.fill_between(monthly_sales['year_month'], monthly_sales['sales_clean'], 
-                 alpha=0.3, color=COLORS['primary'])
-
-plt.title("Monthly Sales Trend (2011-2014)", fontsize=16, fontweight='bold', pad=20)
-plt.xlabel("Date", fontsize=12)
-plt.ylabel("Total Sales ($)", fontsize=12)
-plt.xticks(rotation=45)
-
-# Format y-axis to millions
-plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
-
-plt.grid(True, alpha=0.3, linestyle='--')
-plt.legend(loc='upper left')
-
-# Add annotation for peak
-max_idx = monthly_sales['sales_clean'].idxmax()
-max_row = monthly_sales.loc[max_idx]
-plt.annotate(f'Peak: ${max_row["sales_clean"]/1e6:.2f}M', 
-             xy=(max_row['year_month'], max_row['sales_clean']),
-             xytext=(10, 10), textcoords='offset points',
-             bbox=dict(boxstyle='round,pad=0.5', facecolor=COLORS['warning'], alpha=0.7),
-             arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
-
-plt.tight_layout()
-plt.savefig('chart1_monthly_trend.png', dpi=300, bbox_inches='tight')
-print("Saved: chart1_monthly_trend.png")
-plt.show()
-
-# Check regions
-print("Regions:", df['region'].unique())
-print("Count:", df['region'].nunique())
-
-# Check markets  
-print("\nMarkets:", df['market'].unique())
-print("Count:", df['market'].nunique())
-
-# Check segments
-print("\nSegments:", df['segment'].unique())
-print("Count:", df['segment'].nunique())
-
-# Check categories
-print("\nCategories:", df['category'].unique())
-print("Count:", df['category'].nunique())
-
-# Check if Africa appears in both columns
-print("Africa in region:", 'Africa' in df['region'].unique())
-print("Africa in market:", 'Africa' in df['market'].unique())
-
-# See sample rows where region = 'Africa'
-print(df[df['region'] == 'Africa'][['region', 'market', 'country']].head())
-
-# Group and clean aggregation
-segment_sales = df.groupby('segment')['sales_clean'].sum()
-
-# Verify it's a Series with 3 values
-print("Type:", type(segment_sales))
-print("Values:\n", segment_sales)
-print("Sum check:", segment_sales.sum(), "==", df['sales_clean'].sum())
-
-
-
-# Group and sort ONCE
-category_sales = df.groupby('category')['sales_clean'].sum().sort_values(ascending=False)
-
-print("Category Sales Ranking:")
-for cat, sales in category_sales.items():
-    pct = (sales / category_sales.sum()) * 100
-    print(f"{cat}: ${sales:,.0f} ({pct:.1f}%)")
-
-# Create publication-quality pie chart
-plt.figure(figsize=(10, 8))
-
-# Use consistent category colors
-colors_list = [CATEGORY_COLORS[cat] for cat in category_sales.index]
-
-wedges, texts, autotexts = plt.pie(
-    category_sales.values,
-    labels=None,
-    autopct='%1.1f%%',
-    startangle=90,
-    colors=colors_list,
-    explode=[0.03, 0.03, 0.03],
-    pctdistance=0.75,
-    wedgeprops={'edgecolor': 'white', 'linewidth': 2}
-)
-
-for autotext in autotexts:
-    autotext.set_color('white')
-    autotext.set_fontsize(11)
-    autotext.set_weight('bold')
-
-plt.legend(wedges, category_sales.index, title="Product Categories",
-           loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-
-plt.title("Revenue Distribution by Product Category",
-          fontsize=16, fontweight='bold', pad=20)
-
-plt.figtext(0.5, 0.02,
-            f"Total: ${category_sales.sum()/1e6:.2f}M | Tech leads with 14% margin",
-            ha='center', fontsize=10, style='italic', color='gray')
-
-plt.tight_layout()
-plt.savefig('chart3_category_pie.png', dpi=300, bbox_inches='tight')
-print("Saved: chart3_category_pie.png")
-plt.show()
-
-# Group segment data
-segment_sales = df.groupby('segment')['sales_clean'].sum().sort_values(ascending=False)
-
-print("\nSegment Sales Ranking:")
-for seg, sales in segment_sales.items():
-    pct = (sales / segment_sales.sum()) * 100
-    print(f"{seg}: ${sales:,.0f} ({pct:.1f}%)")
-
-plt.figure(figsize=(10, 8))
-
-# Use consistent segment colors
-colors_list = [SEGMENT_COLORS[seg] for seg in segment_sales.index]
-
-wedges, texts, autotexts = plt.pie(
-    segment_sales.values,
-    labels=None,
-    autopct='%1.1f%%',
-    startangle=90,
-    colors=colors_list,
-    explode=[0.03, 0.03, 0.03],
-    pctdistance=0.75,
-    wedgeprops={'edgecolor': 'white', 'linewidth': 2}
-)
-
-for autotext in autotexts:
-    autotext.set_color('white')
-    autotext.set_fontsize(11)
-    autotext.set_weight('bold')
-
-plt.legend(wedges, segment_sales.index, title="Customer Segments", 
-           loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-
-plt.title("Revenue Distribution by Customer Segment", 
-          fontsize=16, fontweight='bold', pad=20)
-
-plt.figtext(0.5, 0.02, 
-            f"Total: ${segment_sales.sum()/1e6:.2f}M | {len(df):,} orders | Avg Margin: 11.6%",
-            ha='center', fontsize=10, style='italic', color='gray')
-
-plt.tight_layout()
-plt.savefig('chart2_segment_pie.png', dpi=300, bbox_inches='tight')
-print("Saved: chart2_segment_pie.png")
-plt.show()
-
-# ============================================
-# DAY 8: PROFIT VS SALES ANALYSIS
-# ============================================
-
-# Step 1: Clean profit column (same pattern as sales)
-print("\n" + "="*50)
-print("PROFIT ANALYSIS")
-print("="*50)
-
-print("Sample profit values:")
-print(df['profit'].head(10))
-print(f"\nProfit dtype: {df['profit'].dtype}")
-
-# Remove commas and convert to float
-df['profit_clean'] = df['profit'].astype(str).str.replace(',', '').astype(float)
-
-print(f"\nProfit range: ${df['profit_clean'].min():,.0f} to ${df['profit_clean'].max():,.0f}")
-print(f"Negative profits (losses): {(df['profit_clean'] < 0).sum()} orders")
-
-# Step 2: Fix data quality issue (remove zero sales)
-print(f"\nOrders with $0 sales: {(df['sales_clean'] == 0).sum()}")
-df = df[df['sales_clean'] > 0].copy()  # Keep only rows with sales > 0
-
-# Step 3: Calculate profit margin
-df['profit_margin'] = (df['profit_clean'] / df['sales_clean']) * 100
-
-print("\nProfit margin statistics:")
-print(df['profit_margin'].describe())
-
-print(f"\nHighest margin: {df['profit_margin'].max():.1f}%")
-print(f"Lowest margin: {df['profit_margin'].min():.1f}%")
-print(f"Negative margins (losses): {(df['profit_margin'] < 0).sum()} orders")
-
-# Step 4: Find Discount Disasters (high sales, negative profit)
-discount_disasters = df[(df['sales_clean'] > 1000) & (df['profit_clean'] < 0)]
-print(f"\nDiscount disasters: {len(discount_disasters)} orders")
-print(discount_disasters[['product_name', 'sales_clean', 'profit_clean', 'discount', 'profit_margin']].head())
-
-# Find Gold Mines (high margin)
-gold_mines = df[df['profit_margin'] > 50]
-print(f"\nHigh-margin products (>50%): {len(gold_mines)} orders")
-print(gold_mines[['product_name', 'sales_clean', 'profit_clean', 'profit_margin']].head())
-
-# Step 5: Category-Level Profit Analysis
-print("\n" + "="*50)
-print("PROFITABILITY BY CATEGORY")
-print("="*50)
-
-category_profit = df.groupby('category').agg({
-    'sales_clean': 'sum',
-    'profit_clean': 'sum',
-    'profit_margin': 'mean'
-}).round(2)
-
-category_profit['overall_margin'] = (category_profit['profit_clean'] / category_profit['sales_clean'] * 100).round(1)
-
-print(category_profit)
-
-# ============================================
-# VISUALIZATION 1: Profit Margin by Category (Bar Chart)
-# ============================================
-
-category_margin = df.groupby('category')['profit_margin'].mean().sort_values(ascending=False)
-
-# Reorder to match color priority: Tech, Office, Furniture
-category_margin = category_margin.reindex(['Technology', 'Office Supplies', 'Furniture'])
-
-plt.figure(figsize=(10, 6))
-
-bars = plt.bar(category_margin.index, category_margin.values,
-               color=[CATEGORY_COLORS[cat] for cat in category_margin.index],
-               edgecolor='black', linewidth=1.2)
-
-plt.title('Average Profit Margin by Category', fontsize=16, fontweight='bold', pad=20)
-plt.ylabel('Profit Margin (%)', fontsize=12)
-plt.xlabel('')
-
-# Add value labels on bars
-for bar in bars:
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-             f'{height:.1f}%', ha='center', va='bottom', fontsize=11, fontweight='bold')
-
-# Add break-even line
-plt.axhline(y=0, color=COLORS['danger'], linestyle='--', linewidth=2, alpha=0.7, label='Break-even')
-
-# Add industry benchmark (typical retail: 10%)
-plt.axhline(y=10, color=COLORS['success'], linestyle=':', linewidth=2, alpha=0.7, label='Industry Benchmark (10%)')
-
-plt.legend(loc='upper right')
-plt.ylim(-5, 20)
-plt.grid(True, alpha=0.3, axis='y')
-
-# Add warning text for Furniture
-plt.text(2, 3, '[WARNING] Below benchmark', ha='center', fontsize=10, 
-         color=COLORS['danger'], fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('chart4_profit_margin.png', dpi=300, bbox_inches='tight')
-print("Saved: chart4_profit_margin.png")
-plt.show()
-
-# ============================================
-# VISUALIZATION 2: Sales vs Profit Scatter Plot
-# ============================================
-
-# ============================================
-# CHART 5: SALES VS PROFIT (Scatter Plot)
-# ============================================
-
-plt.figure(figsize=(12, 8))
-
-# Create scatter with category colors
-for category in df['category'].unique():
-    cat_data = df[df['category'] == category]
-    plt.scatter(cat_data['sales_clean'], cat_data['profit_clean'],
-                c=CATEGORY_COLORS[category], label=category,
-                alpha=0.6, s=40, edgecolors='black', linewidth=0.5)
-
-plt.axhline(y=0, color=COLORS['danger'], linestyle='--', linewidth=2, alpha=0.8, label='Break-even')
-plt.axvline(x=1000, color=COLORS['warning'], linestyle=':', linewidth=2, alpha=0.8, label='High Sales Threshold ($1K)')
-
-plt.xlabel('Sales ($)', fontsize=12)
-plt.ylabel('Profit ($)', fontsize=12)
-plt.title('Sales vs Profit: The "Kill Zone" of Discount Disasters', 
-          fontsize=16, fontweight='bold', pad=20)
-
-# Highlight discount disasters zone
-plt.fill_between([1000, 10000], [-2000, -2000], [0, 0], 
-                 alpha=0.2, color=COLORS['danger'], label='Discount Disaster Zone')
-
-plt.legend(loc='upper right', title='Categories')
-plt.grid(True, alpha=0.3)
-
-# Add annotation
-plt.text(2500, -1500, '435 orders here\n(high sales, negative profit)', 
-         fontsize=10, color=COLORS['danger'], fontweight='bold',
-         bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+"""Batch report: six charts and the executive summary for the sales extract.
+
+Runs as named stages (ingest, clean, partials, aggregate, render, report).
+Each stage is cached on disk keyed by its inputs (see ``pipeline``), so a
+rerun on an unchanged CSV only reloads the small aggregates, and editing one
+chart re-renders only that chart.  New order batches (``--ingest``) are
+merged into the cached aggregates of the base extract (see ``incremental``).
+``--slices`` also writes the executive summary of every region, market
+and/or year, and ``--chart-packs`` the charts plus summary of every
+region x market, all from one set of per-cell aggregates.
+
+    python app.py                      # interactive: data profile, diagnostics, chart windows
+    python app.py --headless           # nightly: no plt.show(), no diagnostics
+    python app.py --headless --profile # plus the data profile (data_profile.json)
+    python app.py --data other.csv --out-dir reports/ --no-cache --jobs 4
+    python app.py --headless --ingest orders_2015-01-02.csv
+    python app.py --headless --chunk-rows 500000   # extracts larger than RAM
+    python app.py --headless --slices region market year
+    python app.py --headless --chart-packs          # charts per region x market
+"""
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-plt.tight_layout()
-plt.savefig('chart5_sales_profit_scatter.png', dpi=300, bbox_inches='tight')
-print("Saved: chart5_sales_profit_scatter.png")
-plt.show()
+import matplotlib.pyplot as plt
 
+import aggregates
+import charts
+from charts import REPORT_CHARTS, REPORT_DPI, apply_report_style
+from data_loader import (REPORT_COLUMNS, SLICE_COLUMNS, clean_sales_data, delta_entries,
+                         file_digest, read_sales_csv)
+from engine import run_partitioned
+from executive_report import build_report, key_insights
+from incremental import ingest_delta, load_delta_cells, load_delta_partials
+from pipeline import StageCache, code_fingerprint, data_key, stage_key
+from profiling import (PROFILE_FILE, finalize_profile, format_profile, merge_profiles,
+                       partial_profile, profile_csv, write_profile)
 
 
 # ============================================
-# CHART 6: PROFIT MARGIN BY SEGMENT (Bar Chart)
+# STAGES
 # ============================================
 
-segment_margin = df.groupby('segment')['profit_margin'].mean()
-# Reorder: Home Office, Corporate, Consumer (by margin)
-segment_margin = segment_margin.sort_values(ascending=False)
-
-plt.figure(figsize=(10, 6))
-
-bars = plt.bar(segment_margin.index, segment_margin.values,
-               color=[SEGMENT_COLORS[seg] for seg in segment_margin.index],
-               edgecolor='black', linewidth=1.2)
-
-plt.title('Profit Margin by Customer Segment', fontsize=16, fontweight='bold', pad=20)
-plt.ylabel('Profit Margin (%)', fontsize=12)
-plt.xlabel('')
-
-# Add value labels
-for bar in bars:
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2., height + 0.2,
-             f'{height:.1f}%', ha='center', va='bottom', fontsize=11, fontweight='bold')
+def ingest(path):
+    """Typed read of the report columns (dates are parsed by ``clean``)."""
+    return read_sales_csv(path, columns=REPORT_COLUMNS)
+
+
+def clean(raw):
+    """Cleaned frame (``clean_sales_data``) plus the raw row counts the report quotes."""
+    zero_sales = raw['sales'] == 0
+    return {
+        'df': clean_sales_data(raw),
+        'rows_read': len(raw),
+        'zero_sales': int(zero_sales.sum()),
+        'zero_sales_keys': aggregates.slice_keys(raw[zero_sales]),
+    }
+
+
+def partials(cleaned, jobs=1):
+    """Mergeable aggregates of the base extract; nothing downstream needs the rows.
+
+    Large extracts are reduced by time partition on ``jobs`` processes.
+    """
+    result = run_partitioned(cleaned['df'], aggregates.partial_aggregates,
+                             aggregates.merge_partials, jobs=jobs,
+                             columns=[c for c in aggregates.PARTIAL_COLUMNS if c in cleaned['df']])
+    return {**result, 'rows_read': cleaned['rows_read'], 'zero_sales': cleaned['zero_sales']}
+
+
+def aggregate(base_partials, delta_partials):
+    """Report-ready aggregates: the base extract plus every ingested order batch."""
+    return aggregates.finalize(aggregates.merge_partials([base_partials] + delta_partials))
 
-# Add benchmark line
-plt.axhline(y=10, color=COLORS['success'], linestyle=':', linewidth=2, alpha=0.7, label='Industry Benchmark (10%)')
 
-plt.legend(loc='upper right')
-plt.ylim(0, 15)
-plt.grid(True, alpha=0.3, axis='y')
+def cells(cleaned):
+    """Partials per region x market x year cell, the source of every slice report."""
+    return aggregates.partials_by_cell(cleaned['df'], zero_sales_keys=cleaned['zero_sales_keys'])
+
+
+def _init_render_worker():
+    plt.switch_backend('Agg')
+    apply_report_style()
+
+
+def render_chart(draw, args, path, keep_open=False):
+    """Draw one report chart and save it; runs in the main process or a pool worker."""
+    fig = draw(*args)
+    fig.savefig(path, dpi=REPORT_DPI, bbox_inches='tight')
+    if not keep_open:
+        plt.close(fig)
+    return path
+
+
+def plan_render(aggs, out_dir, manifest):
+    """Charts of one pack whose inputs or drawing code changed since the last run.
+
+    Returns ``(todo, skipped)``: render jobs ``(filename, path, draw, args, key)``
+    and the file names that are up to date according to ``manifest``.
+    """
+    todo, skipped = [], []
+    for filename, (draw, inputs) in REPORT_CHARTS.items():
+        path = os.path.join(out_dir, filename)
+        args = [aggs[name] for name in inputs]
+        key = stage_key(data_key(args), code_fingerprint(draw), charts.REPORT_STYLE, REPORT_DPI)
+        if manifest.get(path) == key and os.path.exists(path):
+            skipped.append(filename)
+        else:
+            todo.append((filename, path, draw, args, key))
+    return todo, skipped
+
+
+def draw_charts(todo, manifest, jobs=1, keep_open=False):
+    """Run render jobs from ``plan_render``, recording each in ``manifest``.
+
+    With ``jobs > 1`` the charts are drawn concurrently in a process pool on
+    the Agg backend; each worker is sent only that chart's aggregates.
+    ``keep_open`` (interactive runs) draws in this process so the figures
+    can be shown afterwards.  Returns the rendered paths.
+    """
+    rendered = []
+    if jobs > 1 and len(todo) > 1 and not keep_open:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo)),
+                                 initializer=_init_render_worker) as pool:
+            futures = {pool.submit(render_chart, draw, args, path): (path, key)
+                       for filename, path, draw, args, key in todo}
+            for future in as_completed(futures):
+                path, key = futures[future]
+                future.result()
+                manifest[path] = key
+                rendered.append(path)
+    else:
+        for filename, path, draw, args, key in todo:
+            render_chart(draw, args, path, keep_open=keep_open)
+            manifest[path] = key
+            rendered.append(path)
+    return rendered
+
+
+def render(aggs, out_dir, cache, jobs=1, keep_open=False):
+    """Render every chart whose inputs or drawing code changed since the last run.
+
+    Returns ``(rendered, skipped)`` lists of file names.
+    """
+    apply_report_style()
+    manifest = cache.render_manifest()
+    todo, skipped = plan_render(aggs, out_dir, manifest)
+    rendered = draw_charts(todo, manifest, jobs, keep_open)
+    cache.save_render_manifest(manifest)
+    return [os.path.basename(path) for path in rendered], skipped
+
+
+REPORT_FILE = 'executive_summary_report.txt'
+
+# Slices that get a full chart pack with --chart-packs
+CHART_PACK_DIMENSIONS = ['region', 'market']
+
+
+def report(aggs, out_dir, title='SUPERSTORE SALES ANALYSIS REPORT', files=tuple(REPORT_CHARTS)):
+    text = build_report(aggs, title=title, files=files)
+    with open(os.path.join(out_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+        f.write(text)
+    return text
+
+
+def slice_dir_name(by, value):
+    """``region-Central_market-EU``: one output directory per slice."""
+    return '_'.join(f"{dim}-{re.sub(r'[^A-Za-z0-9]+', '_', str(v)).strip('_')}"
+                    for dim, v in zip(by, value))
+
+
+def slice_reports(cell_partials, dimensions, out_dir):
+    """Executive summary for every value of each of ``dimensions``.
+
+    Each slice merges its cells' partials, so no rows are re-read or
+    re-filtered per slice.  Written to ``<out_dir>/slices/<dim>-<value>/``;
+    returns the number of reports.
+    """
+    written = 0
+    for dim in dimensions:
+        for value, partials in aggregates.slice_partials(cell_partials, [dim]).items():
+            slice_dir = os.path.join(out_dir, 'slices', slice_dir_name([dim], value))
+            os.makedirs(slice_dir, exist_ok=True)
+            report(aggregates.finalize(partials), slice_dir, files=(),
+                   title=f"SUPERSTORE SALES ANALYSIS REPORT: {dim.upper()} {value[0]}")
+            written += 1
+    return written
+
+
+def render_chart_packs(cell_partials, out_dir, cache, dimensions=CHART_PACK_DIMENSIONS, jobs=1):
+    """The six report charts plus the summary for every combination of ``dimensions``.
+
+    Slice aggregates come from merging cells, never from re-filtering rows.
+    Only slices whose chart inputs changed since the last run are drawn, and
+    the charts of all slices share one process pool.  Written to
+    ``<out_dir>/slices/region-<region>_market-<market>/``; returns
+    ``(rendered, unchanged)`` slice counts.
+    """
+    apply_report_style()
+    manifest = cache.render_manifest()
+    todo, unchanged = [], 0
+    for value, partials in aggregates.slice_partials(cell_partials, dimensions).items():
+        slice_dir = os.path.join(out_dir, 'slices', slice_dir_name(dimensions, value))
+        os.makedirs(slice_dir, exist_ok=True)
+        aggs = aggregates.finalize(partials)
+        pack_todo, _ = plan_render(aggs, slice_dir, manifest)
+        if not pack_todo and os.path.exists(os.path.join(slice_dir, REPORT_FILE)):
+            unchanged += 1
+            continue
+        todo.extend(pack_todo)
+        label = ', '.join(f"{dim.upper()} {v}" for dim, v in zip(dimensions, value))
+        report(aggs, slice_dir, title=f"SUPERSTORE SALES ANALYSIS REPORT: {label}")
+
+    try:
+        draw_charts(todo, manifest, jobs)
+    finally:
+        cache.save_render_manifest(manifest)
+    rendered = len({os.path.dirname(job[1]) for job in todo})
+    return rendered, unchanged
 
-# Add insight text
-plt.text(0.5, 13, 'Home Office: Small but profitable!', 
-         fontsize=10, color=COLORS['success'], fontweight='bold',
-         bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
-
-plt.tight_layout()
-plt.savefig('chart6_segment_margin.png', dpi=300, bbox_inches='tight')
-print("Saved: chart6_segment_margin.png")
-plt.show()
 
 # ============================================
-# DASHBOARD LAYOUT PREVIEW (For Streamlit)
+# DIAGNOSTICS (interactive runs and --profile)
 # ============================================
 
-print("\n" + "="*60)
-print("DASHBOARD LAYOUT PLAN")
-print("="*60)
-
-dashboard_layout = """
+DASHBOARD_LAYOUT = """
 ┌─────────────────────────────────────────────────────────────┐
 │  SUPERSTORE SALES DASHBOARD          [Filter: Region ▼]    │
 ├─────────────────────────────────────────────────────────────┤
@@ -476,74 +252,193 @@ dashboard_layout = """
 └─────────────────────────────────────────────────────────────┘
 """
 
-print(dashboard_layout)
 
-print("\nKey Insights for Viva:")
-print("1. Technology = highest margin (14%) despite mid-level sales")
-print("2. Furniture = margin killer (7%) due to 60% discounts")
-print("3. Home Office = smallest segment but highest margin (12%)")
-print("4. 435 discount disasters = $1M+ in preventable losses")
-print("5. Consumer volume ≠ profit (11.5% vs Home Office 12%)")
+def print_diagnostics(aggs):
+    """Diagnostics for interactive runs, from the report aggregates only."""
+    print(f"Rows read: {aggs['rows_read']:,}")
+
+    totals = aggs['totals']
+    print("\n" + "="*50)
+    print("PROFIT ANALYSIS")
+    print("="*50)
+    print(f"Profit range: ${totals['profit_min']:,.0f} to ${totals['profit_max']:,.0f}")
+    print(f"Negative profits (losses): {totals['loss_orders']} orders")
+    print(f"\nOrders with $0 sales: {aggs['zero_sales']}")
+    print(f"\nHighest margin: {totals['margin_max']:.1f}%")
+    print(f"Lowest margin: {totals['margin_min']:.1f}%")
+    print(f"Negative margins (losses): {totals['negative_margin']} orders")
+    print("Order margin percentiles (±1pp): " + ", ".join(
+        f"{name} {value:.1f}%" for name, value in aggs['margin_percentiles'].items()))
+    print(f"\nDiscount disasters: {totals['disasters']} orders")
+    print(aggs['worst_disasters'])
+    print(f"\nHigh-margin products (>{aggregates.GOLD_MINE_MARGIN}%): {totals['gold_mines']} orders")
+
+    print("\n" + "="*50)
+    print("PROFITABILITY BY CATEGORY")
+    print("="*50)
+    print(aggs['category_profit'])
+
+    print("\n" + "="*60)
+    print("DASHBOARD LAYOUT PLAN")
+    print("="*60)
+    print(DASHBOARD_LAYOUT)
+
+    print("\nKey Insights:")
+    for i, insight in enumerate(key_insights(aggs), 1):
+        print(f"{i}. {insight}")
 
 
 # ============================================
-# AUTOMATED REPORT GENERATOR (Fixed - No Emojis)
+# CLI
 # ============================================
 
-print("\n" + "="*60)
-print("EXECUTIVE SUMMARY REPORT")
-print("="*60)
-
-total_sales = df['sales_clean'].sum()
-total_profit = df['profit_clean'].sum()
-overall_margin = (total_profit / total_sales) * 100
-loss_orders = (df['profit_clean'] < 0).sum()
-
-report = f"""
-SUPERSTORE SALES ANALYSIS REPORT (2011-2014)
-Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}
-
-FINANCIAL OVERVIEW:
-- Total Revenue: ${total_sales/1e6:.2f} million
-- Total Profit: ${total_profit/1e6:.2f} million  
-- Overall Margin: {overall_margin:.1f}%
-- Total Orders: {len(df):,}
-- Loss-making Orders: {loss_orders:,} ({loss_orders/len(df)*100:.1f}%)
-
-SEGMENT PERFORMANCE:
-- Consumer: 51% of sales, 11.5% margin (volume leader, margin laggard)
-- Corporate: 30% of sales, 11.6% margin (balanced)
-- Home Office: 18% of sales, 12.0% margin (efficiency champion)
-
-CATEGORY PERFORMANCE:
-- Technology: 37% of sales, 14.0% margin [STAR PERFORMER]
-- Office Supplies: 30% of sales, 13.7% margin [SOLID]
-- Furniture: 33% of sales, 7.0% margin [MARGIN KILLER]
-
-CRITICAL ISSUES:
-- 435 'discount disasters' (high sales, negative profit)
-- Worst case: 60% discount on furniture = -133% margin
-- Furniture shipping costs eroding profitability
-
-RECOMMENDATIONS:
-1. Cap furniture discounts at 20% (currently seeing 60%)
-2. Prioritize Home Office segment expansion (12% margin)
-3. Bundle high-margin Office Supplies with Technology
-4. Discontinue or reprice SAFCO Executive Armchair
-5. Investigate Technology category for expansion
-
-FILES GENERATED:
-- chart1_monthly_trend.png
-- chart2_segment_pie.png  
-- chart3_category_pie.png
-- chart4_profit_margin.png
-- chart5_sales_profit_scatter.png
-- chart6_segment_margin.png
-"""
-
-print(report)
-
-# Save report to file with UTF-8 encoding (handles all characters)
-with open('executive_summary_report.txt', 'w', encoding='utf-8') as f:
-    f.write(report)
-print("\nSaved: executive_summary_report.txt")
\ No newline at end of file
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Superstore sales batch report")
+    parser.add_argument('--data', default='sales_data.csv', help="sales CSV extract")
+    parser.add_argument('--out-dir', default='.', help="where charts and the report are written")
+    parser.add_argument('--headless', action='store_true',
+                        help="no chart windows and no diagnostic prints (nightly runs)")
+    parser.add_argument('--no-cache', action='store_true', help="recompute every stage")
+    parser.add_argument('--ingest', nargs='+', default=[], metavar='DELTA',
+                        help="append new order batch file(s) before reporting")
+    parser.add_argument('--chunk-rows', type=int, default=0, metavar='N',
+                        help="stream the CSV N rows at a time (fixed memory for large extracts)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help="processes used to aggregate and render charts")
+    parser.add_argument('--slices', nargs='+', default=[], metavar='DIM',
+                        choices=aggregates.SLICE_DIMENSIONS,
+                        help="also write a report per value of each DIM (region, market, year)")
+    parser.add_argument('--chart-packs', action='store_true',
+                        help="also render the charts and report of every region x market")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile the extract in one streamed pass (also done in interactive "
+                             "runs) and write it as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.headless:
+        plt.switch_backend('Agg')
+    os.makedirs(args.out_dir, exist_ok=True)
+    cache = StageCache(os.path.dirname(os.path.abspath(args.data)), enabled=not args.no_cache)
+
+    for delta_path in args.ingest:
+        entry = ingest_delta(delta_path, args.data)
+        if entry is None:
+            print(f"Already ingested: {delta_path}")
+        else:
+            print(f"Ingested {entry['rows']:,} orders from {delta_path}")
+
+    # Keys chain: each stage hashes its upstream key with its own code, so the
+    # CSV is only read when something downstream actually needs recomputing.
+    # The CSV itself is hashed once per run
+    digest = file_digest(args.data)
+    ingest_key = stage_key(digest, code_fingerprint(ingest, read_sales_csv))
+    clean_key = stage_key(ingest_key, code_fingerprint(clean, clean_sales_data))
+    if args.chunk_rows:
+        # Streaming: the rows never exist all at once, so there is no ingest/clean stage
+        partials_key = stage_key(digest, 'stream', code_fingerprint(
+            aggregates.stream_partials, read_sales_csv, clean_sales_data))
+    else:
+        partials_key = stage_key(clean_key, code_fingerprint(partials, aggregates.partial_aggregates))
+    # Ingested order batches are merged in here, without touching the base stages
+    deltas = delta_entries(args.data)
+    aggregate_key = stage_key(partials_key, [entry['digest'] for entry in deltas], code_fingerprint(
+        aggregate, aggregates.merge_partials, aggregates.finalize, charts.density_from_fine_grid))
+    if args.chunk_rows:
+        cells_key = stage_key(digest, 'stream', code_fingerprint(
+            aggregates.stream_partials, aggregates.partials_by_cell, read_sales_csv, clean_sales_data))
+    else:
+        cells_key = stage_key(clean_key, code_fingerprint(cells, aggregates.partials_by_cell))
+    cells_key = stage_key(cells_key, [entry['digest'] for entry in deltas],
+                          code_fingerprint(aggregates.merge_cells))
+
+    raw = None
+
+    def load_raw():
+        nonlocal raw
+        if raw is None:
+            raw = cache.run('ingest', ingest_key, lambda: ingest(args.data))
+        return raw
+
+    def load_clean():
+        return cache.run('clean', clean_key, lambda: clean(load_raw()))
+
+    def load_partials():
+        if args.chunk_rows:
+            return aggregates.stream_partials(args.data, args.chunk_rows)
+        return partials(load_clean(), jobs=args.jobs)
+
+    def load_aggregates():
+        base = cache.run('partials', partials_key, load_partials)
+        return aggregate(base, [load_delta_partials(args.data, entry) for entry in deltas])
+
+    def load_cells():
+        if args.chunk_rows:
+            base = aggregates.stream_partials(args.data, args.chunk_rows,
+                                              columns=SLICE_COLUMNS, by_cell=True)
+        else:
+            base = cells(load_clean())
+        delta_cells = []
+        for entry in deltas:
+            batch = load_delta_cells(args.data, entry)
+            if batch is None:
+                print(f"Warning: {entry['source']} predates per-slice partials and is "
+                      f"missing from the slice reports; re-ingest it to include it")
+            else:
+                delta_cells.append(batch)
+        return aggregates.merge_cells([base] + delta_cells)
+
+    # Data profile of the CSV: one chunked pass, cached like a stage
+    if args.profile or not args.headless:
+        profile_key = stage_key(digest, code_fingerprint(
+            profile_csv, partial_profile, merge_profiles, finalize_profile, read_sales_csv))
+        profile = cache.run('profile', profile_key, lambda: profile_csv(
+            args.data, args.chunk_rows or aggregates.DEFAULT_CHUNK_ROWS))
+        write_profile(profile, args.out_dir)
+        print("="*50)
+        print("DATA PROFILE")
+        print("="*50)
+        print(format_profile(profile))
+        print()
+
+    aggs = cache.run('aggregate', aggregate_key, load_aggregates)
+    if not args.headless:
+        print_diagnostics(aggs)
+
+    with cache.timed('render'):
+        rendered, skipped = render(aggs, args.out_dir, cache, jobs=args.jobs,
+                                   keep_open=not args.headless)
+    with cache.timed('report'):
+        text = report(aggs, args.out_dir)
+    if args.slices or args.chart_packs:
+        cell_partials = cache.run('cells', cells_key, load_cells)
+    if args.slices:
+        with cache.timed('slices'):
+            n_slices = slice_reports(cell_partials, args.slices, args.out_dir)
+    if args.chart_packs:
+        with cache.timed('packs'):
+            packs_rendered, packs_unchanged = render_chart_packs(
+                cell_partials, args.out_dir, cache, jobs=args.jobs)
+
+    if not args.headless:
+        print(text)
+    for stage, seconds, how in cache.timings:
+        print(f"{stage:<10} {how:<4} {seconds*1000:8.1f} ms")
+    print(f"Charts rendered: {len(rendered)}, unchanged: {len(skipped)}")
+    print(f"Saved: {REPORT_FILE}")
+    if args.profile or not args.headless:
+        print(f"Saved: {PROFILE_FILE}")
+    if args.slices:
+        print(f"Saved: {n_slices} slice reports under {os.path.join(args.out_dir, 'slices')}")
+    if args.chart_packs:
+        print(f"Chart packs rendered: {packs_rendered}, unchanged: {packs_unchanged}")
+
+    if rendered and not args.headless:
+        plt.show()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
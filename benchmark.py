@@ -0,0 +1,294 @@
+"""Benchmark suite: load, filter, KPI, chart and report timings on synthetic data.
+
+Each size runs on a synthetic extract (``synthetic_data``) generated once
+under ``.cache/bench/`` and reused.  Results are written as JSON with one
+entry per size and benchmark, so runs of two versions can be diffed, and can
+be checked against a baseline run with per-benchmark regression thresholds.
+
+    python benchmark.py                                   # 50k rows -> bench_results.json
+    python benchmark.py --sizes 50k 1m 10m --out main.json
+    python benchmark.py --baseline main.json --threshold 1.25 --thresholds limits.json
+
+``limits.json`` maps benchmark name patterns to allowed slowdown ratios,
+e.g. ``{"chart.*": 1.5, "filter.*": 1.1}``; the longest matching pattern wins.
+"""
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+import aggregates
+import app
+from charts import (DASHBOARD_CHARTS, REPORT_CHARTS, REPORT_DPI, apply_report_style,
+                    sales_profit_density)
+from column_store import load_shared_data, store_root_for
+from cube import SalesCube, discount_grid, summarize_rows
+from data_loader import (CACHE_DIR_NAME, cache_dir_for, clean_sales_data, load_clean_data,
+                         read_sales_csv)
+from filters import BitmapIndex, apply_filters
+from products import ProductRollup
+from profiling import profile_csv
+from render_cache import render_png
+from sqlite_source import SqliteSource, build_sales_db
+from synthetic_data import SIZES, parse_size, write_sales_csv
+
+BENCH_DIR = os.path.join(CACHE_DIR_NAME, 'bench')
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 1.25        # fail when more than 25% slower than the baseline
+
+# Runs slower than this are not repeated (load and report at 10M+ rows)
+SINGLE_RUN_SECONDS = 5.0
+
+# Differences below this are timer noise, whatever the ratio
+NOISE_SECONDS = 0.002
+
+
+def dataset_path(size, bench_dir=BENCH_DIR):
+    """Synthetic extract for ``size``, generated on first use."""
+    os.makedirs(bench_dir, exist_ok=True)
+    path = os.path.join(bench_dir, f'sales_{size}.csv')
+    if not os.path.exists(path):
+        print(f"Generating {parse_size(size):,} rows -> {path}")
+        write_sales_csv(path + '.tmp', parse_size(size))
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def measure(func, repeat=DEFAULT_REPEAT, setup=None):
+    """Best/median wall time of ``func()``; ``setup()`` runs untimed before each call."""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if times[-1] > SINGLE_RUN_SECONDS:
+            break
+    return {'best_s': min(times), 'median_s': statistics.median(times), 'runs': len(times)}
+
+
+# ============================================
+# BENCHMARKS
+# ============================================
+
+def filter_cases(df):
+    """Named sidebar selections covering each filter path."""
+    first = df['order_date'].iloc[0].date()
+    last = df['order_date'].iloc[-1].date()
+    month_start = (pd.Timestamp(last) - pd.offsets.MonthBegin(1)).date()
+    year_start = (pd.Timestamp(last) - pd.DateOffset(years=1)).date()
+    regions = sorted(df['region'].unique())[:3]
+    return {
+        'all': dict(start_date=first, end_date=last),
+        'year': dict(start_date=year_start, end_date=last),
+        'month': dict(start_date=month_start, end_date=last),
+        'category': dict(start_date=first, end_date=last, category='Technology'),
+        'segment_regions': dict(start_date=first, end_date=last, segment='Corporate',
+                                regions=regions),
+        'combined': dict(start_date=year_start, end_date=last, category='Furniture',
+                         segment='Consumer', regions=regions),
+        'sales_range': dict(start_date=first, end_date=last, sales_range=(100.0, 1000.0)),
+    }
+
+
+def run_benchmarks(path, repeat=DEFAULT_REPEAT, skip=()):
+    """Time every benchmark on the extract at ``path``; returns ``{name: result}``."""
+    results = {}
+
+    def bench(name, func, rows=None, setup=None, runs=repeat):
+        if any(fnmatch.fnmatch(name, pattern) for pattern in skip):
+            return
+        results[name] = {**measure(func, runs, setup), 'rows': rows}
+        print(f"  {name:<40} {results[name]['best_s']*1000:10.2f} ms")
+
+    # Load: raw parse, cleaning, first cache build and the cached path the dashboard uses
+    raw = read_sales_csv(path)
+    bench('load.read_csv', lambda: read_sales_csv(path), len(raw))
+    bench('load.clean', lambda: clean_sales_data(raw), len(raw))
+    drop_cache = lambda: shutil.rmtree(cache_dir_for(path), ignore_errors=True)
+    bench('load.cache_build', lambda: load_clean_data(path), len(raw), setup=drop_cache)
+    bench('load.cached', lambda: load_clean_data(path), len(raw))
+    drop_stores = lambda: shutil.rmtree(store_root_for(path), ignore_errors=True)
+    bench('load.store_build', lambda: load_shared_data(path), len(raw), setup=drop_stores)
+    bench('load.store_attach', lambda: load_shared_data(path), len(raw))
+    bench('load.profile', lambda: profile_csv(path), len(raw))
+    raw = None   # rebound rather than deleted: the lambdas above close over it
+
+    # The dashboard's frame: read-only views of the memory-mapped store
+    df = load_shared_data(path)
+    rows = len(df)
+    bench('build.bitmap_index', lambda: BitmapIndex(df), rows)
+    bench('build.cube', lambda: SalesCube(df, jobs=1), rows)
+    bench('build.product_rollup', lambda: ProductRollup(df), rows)
+    index, cube, rollup = BitmapIndex(df), SalesCube(df, jobs=1), ProductRollup(df)
+
+    # Dashboard filter paths, KPI sums and product tables
+    cases = filter_cases(df)
+    filtered = {}
+    for name, case in cases.items():
+        filtered[name] = apply_filters(df, index=index, **case)
+        bench(f'filter.{name}', lambda case=case: apply_filters(df, index=index, **case),
+              len(filtered[name]))
+
+    for name in ['all', 'month', 'combined']:
+        case = {k: v for k, v in cases[name].items() if k != 'sales_range'}
+        bench(f'kpi.cube.{name}', lambda case=case: cube.summary(df, index=index, **case),
+              len(filtered[name]))
+    for name in ['all', 'combined']:
+        bench(f'kpi.margin_sketch.{name}', lambda case=cases[name]:
+              cube.margin_sketch(df, index=index, **case).percentiles(), len(filtered[name]))
+    bench('kpi.rows.sales_range', lambda: summarize_rows(filtered['sales_range']),
+          len(filtered['sales_range']))
+    bench('kpi.discount_grid.all', lambda: discount_grid(filtered['all']), len(filtered['all']))
+    bench('products.whole_history', lambda: rollup.top_bottom(df, whole_history=True), rows)
+    bench('products.month', lambda: rollup.top_bottom(filtered['month']), len(filtered['month']))
+
+    # Every dashboard chart for the unfiltered selection, rendered like the dashboard does
+    summary = cube.summary(df, index=index, **cases['all'])
+    sketch = cube.margin_sketch(df, index=index, **cases['all'])
+    inputs = {'summary': summary, 'density': sales_profit_density(filtered['all']),
+              'sketch': sketch, 'discount': discount_grid(filtered['all'])}
+    for chart_id, (draw, source) in DASHBOARD_CHARTS.items():
+        bench(f'chart.dashboard.{chart_id}', lambda draw=draw, source=source:
+              render_png(draw(inputs[source])), len(filtered['all']))
+
+    # SQLite source: build, then every query of a selection pushed down into SQL
+    db_path = os.path.join(os.path.dirname(path), f'{os.path.splitext(os.path.basename(path))[0]}.db')
+    bench('sqlite.build', lambda: build_sales_db(path, db_path), rows, runs=1)
+    if not os.path.exists(db_path):   # sqlite.build skipped
+        build_sales_db(path, db_path)
+    source = SqliteSource(db_path)
+
+    def sqlite_view(case):
+        view = source.select({**dict(category="All", segment="All", regions=[], sales_range=None),
+                              **case})
+        return view.sketch, view.top_bottom(), view.discount, view.density
+    for name in ['all', 'month', 'combined', 'sales_range']:
+        # Views are dropped before each run, so every query runs again
+        bench(f'sqlite.view.{name}', lambda case=cases[name]: sqlite_view(case),
+              len(filtered[name]), setup=lambda: source._views.clear())
+
+    # Report: aggregation, each chart at print resolution, then the whole headless app
+    bench('report.aggregates', lambda: aggregates.report_aggregates(df), rows)
+    aggs = aggregates.report_aggregates(df)
+    apply_report_style()
+    for filename, (draw, names) in REPORT_CHARTS.items():
+        args = [aggs[name] for name in names]
+        bench(f'chart.report.{os.path.splitext(filename)[0]}',
+              lambda draw=draw, args=args: render_png(draw(*args), dpi=REPORT_DPI))
+    df = filtered = inputs = None   # free them for the app run, as with raw above
+
+    def run_app():
+        with tempfile.TemporaryDirectory() as out_dir, contextlib.redirect_stdout(io.StringIO()):
+            app.main(['--data', path, '--out-dir', out_dir, '--headless', '--no-cache',
+                      '--jobs', '1'])
+    bench('report.app', run_app, rows, runs=1)
+    return results
+
+
+# ============================================
+# RESULTS
+# ============================================
+
+def environment():
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def threshold_for(name, thresholds, default):
+    matches = [pattern for pattern in thresholds if fnmatch.fnmatch(name, pattern)]
+    return thresholds[max(matches, key=len)] if matches else default
+
+
+def compare(results, baseline, default=DEFAULT_THRESHOLD, thresholds=None):
+    """Benchmarks slower than the baseline by more than their threshold.
+
+    Returns a list of dicts with size, name, baseline/current best time,
+    ratio and the threshold that was exceeded.
+    """
+    regressions = []
+    for size, benches in results['results'].items():
+        for name, result in benches.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            limit = threshold_for(name, thresholds or {}, default)
+            before, after = base['best_s'], result['best_s']
+            if after - before > NOISE_SECONDS and after > before * limit:
+                regressions.append({'size': size, 'name': name, 'baseline_s': before,
+                                    'current_s': after, 'ratio': after / before,
+                                    'threshold': limit})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, filters, KPIs, charts and report")
+    parser.add_argument('--sizes', nargs='+', default=['50k'],
+                        help=f"dataset sizes ({', '.join(SIZES)} or row counts)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--out', default='bench_results.json', help="results JSON")
+    parser.add_argument('--skip', nargs='+', default=[], metavar='PATTERN',
+                        help="benchmark name patterns to skip, e.g. 'chart.report.*'")
+    parser.add_argument('--baseline', help="results JSON of a previous run to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown ratio vs the baseline")
+    parser.add_argument('--thresholds', help="JSON of {name pattern: ratio} overrides")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = {'environment': environment(), 'results': {}}
+    for size in args.sizes:
+        path = dataset_path(size)
+        print(f"\n{size} ({parse_size(size):,} rows)")
+        results['results'][size] = run_benchmarks(path, args.repeat, args.skip)
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"\nSaved: {args.out}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    thresholds = {}
+    if args.thresholds:
+        with open(args.thresholds, encoding='utf-8') as f:
+            thresholds = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold, thresholds)
+    for r in regressions:
+        print(f"REGRESSION {r['size']} {r['name']}: {r['baseline_s']*1000:.2f} ms -> "
+              f"{r['current_s']*1000:.2f} ms (x{r['ratio']:.2f} > x{r['threshold']:.2f})")
+    if not regressions:
+        print(f"No regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
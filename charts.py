@@ -0,0 +1,500 @@
+"""Chart helpers shared by the batch report (app.py) and the dashboard.
+
+The six report charts are plain functions of small, pre-computed
+aggregates (see ``aggregates.finalize``) that return a matplotlib figure,
+so they can be rendered, cached and re-rendered independently.
+"""
+import matplotlib.colors as mcolors
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.patches import Patch
+
+from aggregates import BENCHMARK_MARGIN, DISASTER_SALES, period_label
+from data_loader import DISCOUNT_BAND_OF_BIN, DISCOUNT_BANDS, DISCOUNT_STEP
+
+# Define your brand colors (use these everywhere)
+COLORS = {
+    'primary': '#2E86AB',      # Blue - main brand
+    'secondary': '#A23B72',    # Magenta - accent
+    'tertiary': '#F18F01',     # Orange - highlight
+    'success': '#2ecc71',      # Green - positive
+    'danger': '#e74c3c',       # Red - negative/warning
+    'warning': '#f1c40f',      # Yellow - caution
+    'neutral': '#95a5a6'       # Gray - neutral
+}
+
+# Category colors (consistent across all charts)
+CATEGORY_COLORS = {
+    'Technology': '#2E86AB',      # Blue
+    'Furniture': '#A23B72',       # Magenta
+    'Office Supplies': '#F18F01'  # Orange
+}
+
+# Segment colors (consistent across all charts)
+SEGMENT_COLORS = {
+    'Consumer': '#e74c3c',      # Red - emotional
+    'Corporate': '#3498db',     # Blue - professional
+    'Home Office': '#2ecc71'    # Green - growth
+}
+
+# Global matplotlib style for the report charts
+REPORT_STYLE = {
+    'font.size': 10,
+    'axes.titlesize': 14,
+    'axes.labelsize': 12,
+    'figure.dpi': 100,
+}
+
+REPORT_DPI = 300
+
+
+def apply_report_style():
+    plt.rcParams.update(REPORT_STYLE)
+
+
+# ============================================
+# SALES VS PROFIT DENSITY
+# ============================================
+
+DENSITY_BINS = 120
+
+# Individually plotted points: high sales, negative profit ("discount disasters",
+# threshold DISASTER_SALES)
+MAX_OUTLIER_POINTS = 2000
+
+
+def discount_disasters(df):
+    """Boolean mask of the discount-disaster rows (sales > $1K, negative profit)."""
+    return (df['sales_clean'] > DISASTER_SALES) & (df['profit_clean'] < 0)
+
+
+def sales_profit_density(df, bins=DENSITY_BINS, max_outliers=MAX_OUTLIER_POINTS):
+    """Per-category 2-D histograms of sales vs profit plus the outlier points.
+
+    All rows are counted in one vectorized ``histogramdd`` pass over
+    (category, sales, profit).  Discount-disaster rows are also kept as
+    points; if there are more than ``max_outliers`` they are thinned by a
+    deterministic sample stratified by category.
+    """
+    category = df['category'].astype('category')
+    names = list(category.cat.categories)
+    codes = category.cat.codes.to_numpy()
+    sales = df['sales_clean'].to_numpy()
+    profit = df['profit_clean'].to_numpy()
+
+    sales_edges = np.linspace(0, max(float(sales.max()), 1.0), bins + 1)
+    profit_lo, profit_hi = float(profit.min()), float(profit.max())
+    if profit_lo == profit_hi:
+        profit_lo, profit_hi = profit_lo - 1, profit_hi + 1
+    profit_edges = np.linspace(profit_lo, profit_hi, bins + 1)
+    category_edges = np.arange(len(names) + 1) - 0.5
+
+    counts, _ = np.histogramdd((codes, sales, profit),
+                               bins=(category_edges, sales_edges, profit_edges))
+
+    outliers = df.loc[discount_disasters(df), ['category', 'sales_clean', 'profit_clean']]
+    if len(outliers) > max_outliers:
+        outliers = (outliers.groupby('category', observed=True, group_keys=False)
+                    .sample(frac=max_outliers / len(outliers), random_state=0))
+
+    return {
+        'categories': names,
+        'counts': counts,
+        'sales_edges': sales_edges,
+        'profit_edges': profit_edges,
+        'outliers': outliers,
+    }
+
+
+def density_from_fine_grid(fine_counts, fine_bin, outliers, bins=DENSITY_BINS):
+    """Re-bin mergeable fine-grid counts into ``sales_profit_density`` output.
+
+    ``fine_counts`` is a Series indexed by (category, sales bin, profit bin)
+    on a fixed grid of ``fine_bin`` dollars (see ``aggregates``).  Each fine
+    cell is assigned to the display cell containing its centre.
+    """
+    names = sorted(fine_counts.index.get_level_values(0).unique())
+    cat = pd.Categorical(fine_counts.index.get_level_values(0), categories=names).codes
+    sales = (fine_counts.index.get_level_values(1).to_numpy() + 0.5) * fine_bin
+    profit = (fine_counts.index.get_level_values(2).to_numpy() + 0.5) * fine_bin
+
+    sales_hi = max(float(sales.max()) + fine_bin / 2, 1.0) if len(sales) else 1.0
+    sales_edges = np.linspace(0, sales_hi, bins + 1)
+    if len(profit):
+        profit_lo, profit_hi = float(profit.min()) - fine_bin / 2, float(profit.max()) + fine_bin / 2
+    else:
+        profit_lo, profit_hi = -1.0, 1.0
+    profit_edges = np.linspace(profit_lo, profit_hi, bins + 1)
+
+    counts, _ = np.histogramdd((cat, sales, profit),
+                               bins=(np.arange(len(names) + 1) - 0.5, sales_edges, profit_edges),
+                               weights=fine_counts.to_numpy())
+    return {
+        'categories': names,
+        'counts': counts,
+        'sales_edges': sales_edges,
+        'profit_edges': profit_edges,
+        'outliers': outliers,
+    }
+
+
+def plot_sales_profit_density(ax, density, colors, legend=True):
+    """Draw ``sales_profit_density`` output: one shaded layer per category."""
+    counts = density['counts']
+    extent = (density['sales_edges'][0], density['sales_edges'][-1],
+              density['profit_edges'][0], density['profit_edges'][-1])
+    scale = np.log1p(counts.max()) or 1.0
+
+    handles = []
+    for i, name in enumerate(density['categories']):
+        layer = counts[i]
+        if not layer.any():
+            continue
+        color = colors.get(name, 'gray')
+        rgba = np.zeros(layer.shape + (4,))
+        rgba[..., :3] = mcolors.to_rgb(color)
+        # Log-scaled opacity so single orders stay visible next to dense cells
+        rgba[..., 3] = np.where(layer > 0, 0.25 + 0.7 * np.log1p(layer) / scale, 0)
+        ax.imshow(rgba.transpose(1, 0, 2), origin='lower', extent=extent,
+                  aspect='auto', interpolation='nearest')
+        handles.append(Patch(color=color, label=name))
+
+    outliers = density['outliers']
+    if len(outliers):
+        ax.scatter(outliers['sales_clean'], outliers['profit_clean'],
+                   c=[colors.get(c, 'gray') for c in outliers['category']],
+                   s=14, edgecolors='black', linewidth=0.4, zorder=3)
+
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    if legend:
+        ax.legend(handles=handles, fontsize=8)
+    return handles
+
+
+# ============================================
+# REPORT CHARTS
+# ============================================
+
+def chart_monthly_trend(monthly_sales):
+    """CHART 1: monthly sales trend (line chart) from a month-indexed Series."""
+    fig = plt.figure(figsize=(14, 6))
+
+    plt.plot(monthly_sales.index, monthly_sales.values,
+             marker='o', linewidth=2.5, markersize=5,
+             color=COLORS['primary'], label='Monthly Sales')
+
+    plt.fill_between(monthly_sales.index, monthly_sales.values,
+                     alpha=0.3, color=COLORS['primary'])
+
+    plt.title(f"Monthly Sales Trend ({period_label(monthly_sales)})", fontsize=16, fontweight='bold', pad=20)
+    plt.xlabel("Date", fontsize=12)
+    plt.ylabel("Total Sales ($)", fontsize=12)
+    plt.xticks(rotation=45)
+
+    # Format y-axis to millions
+    plt.gca().yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
+
+    plt.grid(True, alpha=0.3, linestyle='--')
+    plt.legend(loc='upper left')
+
+    # Add annotation for peak
+    peak_month = monthly_sales.idxmax()
+    peak_sales = monthly_sales[peak_month]
+    plt.annotate(f'Peak: ${peak_sales/1e6:.2f}M',
+                 xy=(peak_month, peak_sales),
+                 xytext=(10, 10), textcoords='offset points',
+                 bbox=dict(boxstyle='round,pad=0.5', facecolor=COLORS['warning'], alpha=0.7),
+                 arrowprops=dict(arrowstyle='->', connectionstyle='arc3,rad=0'))
+
+    plt.tight_layout()
+    return fig
+
+
+def _revenue_pie(sales, colors, legend_title, title, footer):
+    fig = plt.figure(figsize=(10, 8))
+
+    wedges, texts, autotexts = plt.pie(
+        sales.values,
+        labels=None,
+        autopct='%1.1f%%',
+        startangle=90,
+        colors=[colors[name] for name in sales.index],
+        explode=[0.03] * len(sales),
+        pctdistance=0.75,
+        wedgeprops={'edgecolor': 'white', 'linewidth': 2}
+    )
+
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontsize(11)
+        autotext.set_weight('bold')
+
+    plt.legend(wedges, sales.index, title=legend_title,
+               loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+
+    plt.title(title, fontsize=16, fontweight='bold', pad=20)
+
+    plt.figtext(0.5, 0.02, footer, ha='center', fontsize=10, style='italic', color='gray')
+
+    plt.tight_layout()
+    return fig
+
+
+def chart_segment_pie(segment_sales, n_orders, totals):
+    """CHART 2: revenue share by customer segment."""
+    return _revenue_pie(
+        segment_sales, SEGMENT_COLORS, "Customer Segments",
+        "Revenue Distribution by Customer Segment",
+        f"Total: ${segment_sales.sum()/1e6:.2f}M | {n_orders:,} orders | "
+        f"Avg Margin: {totals['overall_margin']:.1f}%")
+
+
+def chart_category_pie(category_sales, category):
+    """CHART 3: revenue share by product category."""
+    margin = category['profit'] / category['sales'] * 100
+    leader = margin.idxmax()
+    return _revenue_pie(
+        category_sales, CATEGORY_COLORS, "Product Categories",
+        "Revenue Distribution by Product Category",
+        f"Total: ${category_sales.sum()/1e6:.2f}M | {leader} leads with {margin[leader]:.0f}% margin")
+
+
+def chart_category_margin(category_margin):
+    """CHART 4: average profit margin by category (bar chart)."""
+    # Reorder to match color priority: Tech, Office, Furniture
+    category_margin = category_margin.reindex(['Technology', 'Office Supplies', 'Furniture']).dropna()
+
+    fig = plt.figure(figsize=(10, 6))
+
+    bars = plt.bar(category_margin.index, category_margin.values,
+                   color=[CATEGORY_COLORS[cat] for cat in category_margin.index],
+                   edgecolor='black', linewidth=1.2)
+
+    plt.title('Average Profit Margin by Category', fontsize=16, fontweight='bold', pad=20)
+    plt.ylabel('Profit Margin (%)', fontsize=12)
+    plt.xlabel('')
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 0.5,
+                 f'{height:.1f}%', ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    # Add break-even line
+    plt.axhline(y=0, color=COLORS['danger'], linestyle='--', linewidth=2, alpha=0.7, label='Break-even')
+
+    # Add industry benchmark (typical retail: 10%)
+    plt.axhline(y=BENCHMARK_MARGIN, color=COLORS['success'], linestyle=':', linewidth=2, alpha=0.7,
+                label=f'Industry Benchmark ({BENCHMARK_MARGIN}%)')
+
+    plt.legend(loc='upper right')
+    plt.ylim(min(-5, category_margin.min() - 3), max(20, category_margin.max() + 3))
+    plt.grid(True, alpha=0.3, axis='y')
+
+    # Add warning text above the categories below the benchmark
+    for bar in bars:
+        if bar.get_height() < BENCHMARK_MARGIN:
+            plt.text(bar.get_x() + bar.get_width()/2., max(bar.get_height(), 0) + 2.5,
+                     '[WARNING] Below benchmark', ha='center', fontsize=10,
+                     color=COLORS['danger'], fontweight='bold')
+
+    plt.tight_layout()
+    return fig
+
+
+def chart_sales_profit(density, totals):
+    """CHART 5: sales vs profit density with the discount-disaster zone."""
+    fig = plt.figure(figsize=(12, 8))
+
+    # Binned density per category: every order counts, render cost stays constant;
+    # the discount disasters are drawn on top as individual points
+    category_handles = plot_sales_profit_density(plt.gca(), density, CATEGORY_COLORS, legend=False)
+
+    plt.axhline(y=0, color=COLORS['danger'], linestyle='--', linewidth=2, alpha=0.8, label='Break-even')
+    plt.axvline(x=DISASTER_SALES, color=COLORS['warning'], linestyle=':', linewidth=2, alpha=0.8,
+                label=f'High Sales Threshold (${DISASTER_SALES/1e3:g}K)')
+
+    plt.xlabel('Sales ($)', fontsize=12)
+    plt.ylabel('Profit ($)', fontsize=12)
+    plt.title('Sales vs Profit: The "Kill Zone" of Discount Disasters',
+              fontsize=16, fontweight='bold', pad=20)
+
+    # Highlight discount disasters zone
+    plt.fill_between([DISASTER_SALES, 10000], [-2000, -2000], [0, 0],
+                     alpha=0.2, color=COLORS['danger'], label='Discount Disaster Zone')
+
+    plt.legend(handles=category_handles + plt.gca().get_legend_handles_labels()[0],
+               loc='upper right', title='Categories')
+    plt.grid(True, alpha=0.3)
+
+    # Add annotation
+    plt.text(2500, -1500, f"{totals['disasters']:,} orders here\n(high sales, negative profit)",
+             fontsize=10, color=COLORS['danger'], fontweight='bold',
+             bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+
+    plt.tight_layout()
+    return fig
+
+
+def chart_segment_margin(segment_margin, segment_sales):
+    """CHART 6: average profit margin by customer segment (bar chart)."""
+    # Reorder: Home Office, Corporate, Consumer (by margin)
+    segment_margin = segment_margin.sort_values(ascending=False)
+
+    fig = plt.figure(figsize=(10, 6))
+
+    bars = plt.bar(segment_margin.index, segment_margin.values,
+                   color=[SEGMENT_COLORS[seg] for seg in segment_margin.index],
+                   edgecolor='black', linewidth=1.2)
+
+    plt.title('Profit Margin by Customer Segment', fontsize=16, fontweight='bold', pad=20)
+    plt.ylabel('Profit Margin (%)', fontsize=12)
+    plt.xlabel('')
+
+    # Add value labels
+    for bar in bars:
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 0.2,
+                 f'{height:.1f}%', ha='center', va='bottom', fontsize=11, fontweight='bold')
+
+    # Add benchmark line
+    plt.axhline(y=BENCHMARK_MARGIN, color=COLORS['success'], linestyle=':', linewidth=2, alpha=0.7,
+                label=f'Industry Benchmark ({BENCHMARK_MARGIN}%)')
+
+    plt.legend(loc='upper right')
+    top = max(15, segment_margin.max() + 3)
+    plt.ylim(min(0, segment_margin.min() - 1), top)
+    plt.grid(True, alpha=0.3, axis='y')
+
+    # Add insight text for the most profitable segment
+    best = segment_margin.index[0]
+    insight = 'Small but profitable!' if best == segment_sales.idxmin() else 'Highest margin'
+    plt.text(0.5, top - 2, f'{best}: {insight}',
+             fontsize=10, color=COLORS['success'], fontweight='bold',
+             bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
+
+    plt.tight_layout()
+    return fig
+
+
+# chart file -> (chart function, name of its input in the finalized aggregates)
+REPORT_CHARTS = {
+    'chart1_monthly_trend.png': (chart_monthly_trend, ('monthly_sales',)),
+    'chart2_segment_pie.png': (chart_segment_pie, ('segment_sales', 'rows_read', 'totals')),
+    'chart3_category_pie.png': (chart_category_pie, ('category_sales', 'category')),
+    'chart4_profit_margin.png': (chart_category_margin, ('category_margin',)),
+    'chart5_sales_profit_scatter.png': (chart_sales_profit, ('density', 'totals')),
+    'chart6_segment_margin.png': (chart_segment_margin, ('segment_margin', 'segment_sales')),
+}
+
+
+# ============================================
+# DASHBOARD CHARTS
+# ============================================
+
+def dashboard_category_sales(category_summary):
+    """Sales per category (bar chart) from a cube/row summary."""
+    cat_sales = category_summary['sales'].sort_values(ascending=False)
+    fig, ax = plt.subplots(figsize=(8, 5))
+    bars = ax.bar(cat_sales.index, cat_sales.values, color=[CATEGORY_COLORS.get(c, 'gray') for c in cat_sales.index])
+    ax.set_ylabel("Sales ($)")
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
+    for bar in bars:
+        h = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., h, f'${h/1e6:.1f}M', ha='center', va='bottom', fontsize=9)
+    return fig
+
+
+def dashboard_category_margin(category_summary):
+    """Average profit margin per category (bar chart) from a cube/row summary."""
+    cat_margin = category_summary['margin_sum'] / category_summary['orders']
+    fig, ax = plt.subplots(figsize=(8, 5))
+    bars = ax.bar(cat_margin.index, cat_margin.values, color=[CATEGORY_COLORS.get(c, 'gray') for c in cat_margin.index])
+    ax.set_ylabel("Profit Margin (%)")
+    ax.axhline(y=0, color='red', linestyle='--')
+    for bar in bars:
+        h = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., h, f'{h:.1f}%', ha='center', va='bottom', fontsize=9)
+    return fig
+
+
+def dashboard_sales_profit(density):
+    """Sales vs profit density of the filtered orders (``sales_profit_density`` output)."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    plot_sales_profit_density(ax, density, CATEGORY_COLORS)
+    ax.axhline(y=0, color='red', linestyle='--')
+    ax.set_xlabel('Sales ($)')
+    ax.set_ylabel('Profit ($)')
+    return fig
+
+
+def dashboard_margin_histogram(sketch):
+    """Distribution of per-order profit margins from a ``MarginSketch``, losses in red."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    counts, bins = sketch.histogram(bins=25)
+    patches = ax.bar(bins[:-1], counts, width=np.diff(bins), align='edge',
+                     alpha=0.7, color='steelblue', edgecolor='black')
+    for patch, left in zip(patches, bins[:-1]):
+        if left < 0:
+            patch.set_facecolor('#e74c3c')
+    ax.axvline(x=0, color='red', linestyle='--')
+    ax.axvline(x=sketch.mean, color='green', linestyle='--')
+    ax.set_xlabel('Profit Margin (%)')
+    ax.set_ylabel('Orders')
+    return fig
+
+
+def dashboard_discount_heatmap(grid):
+    """Orders per discount step x margin band from a ``cube.discount_grid``, log colour scale."""
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.set_xlabel('Discount Rate')
+    ax.set_ylabel('Profit Margin (%)')
+    codes = np.flatnonzero(grid['counts'].sum(axis=1))
+    if not len(codes):
+        return fig
+    first, last = codes[0], codes[-1] + 1
+    starts, stop, edges = grid['sketch'].bin_groups(bins=40)
+    cells = np.add.reduceat(grid['counts'][first:last, :stop], starts, axis=1)
+    mesh = ax.pcolormesh(np.arange(first, last + 1) - 0.5, edges, np.ma.masked_equal(cells.T, 0),
+                         cmap='viridis', norm=mcolors.LogNorm(vmin=1, vmax=max(cells.max(), 10)))
+    ax.set_xticks(np.arange(first, last))
+    ax.set_xticklabels([f'{code * DISCOUNT_STEP:.0%}' for code in range(first, last)], fontsize=8)
+    ax.axhline(y=0, color='red', linestyle='--')
+    fig.colorbar(mesh, ax=ax, label='Orders')
+    return fig
+
+
+def dashboard_discount_ranges(grid):
+    """Average margin per discount band from the per-code sums of a ``cube.discount_grid``."""
+    n_bands = len(DISCOUNT_BANDS)
+    in_band = DISCOUNT_BAND_OF_BIN >= 0   # no-discount orders are in no band
+    bands = DISCOUNT_BAND_OF_BIN[in_band]
+    orders = np.bincount(bands, weights=grid['counts'].sum(axis=1)[in_band], minlength=n_bands)
+    margin_sum = np.bincount(bands, weights=grid['margin_sum'][in_band], minlength=n_bands)
+    present = orders > 0
+    disc_margin = pd.Series(margin_sum[present] / orders[present],
+                            index=np.array(list(DISCOUNT_BANDS))[present])
+    fig, ax = plt.subplots(figsize=(8, 6))
+    colors = np.array(['#2ecc71', '#f1c40f', '#e67e22', '#e74c3c', '#8e44ad'])
+    bars = ax.bar(disc_margin.index, disc_margin.values, color=colors[present])
+    ax.set_ylabel('Avg Margin (%)')
+    ax.axhline(y=0, color='red', linestyle='--')
+    for bar in bars:
+        h = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., h, f'{h:.1f}%', ha='center', va='bottom')
+    return fig
+
+
+# dashboard chart id -> (chart function, its input: the selection's category
+# 'summary', sales/profit 'density', margin 'sketch' or 'discount' grid, named
+# like the results of a data_sources view)
+DASHBOARD_CHARTS = {
+    'category_sales': (dashboard_category_sales, 'summary'),
+    'category_margin': (dashboard_category_margin, 'summary'),
+    'sales_profit': (dashboard_sales_profit, 'density'),
+    'margin_histogram': (dashboard_margin_histogram, 'sketch'),
+    'discount_margin': (dashboard_discount_heatmap, 'discount'),
+    'discount_ranges': (dashboard_discount_ranges, 'discount'),
+}
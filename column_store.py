@@ -0,0 +1,162 @@
+"""Read-only, memory-mapped columnar store of the cleaned sales frame.
+
+The first process to need a data version writes the cleaned frame (see
+``data_loader.load_clean_data``) as one ``.npy`` file per column under
+``.cache/store/<extract>/<version>/``; categorical columns are stored as
+their integer codes plus a category list in the manifest, so every column is
+a flat fixed-width array.  Every other session and process (Streamlit
+workers behind a load balancer, benchmark runs) only memory-maps those files:
+the frame it gets wraps the mapped arrays without copying, the operating
+system keeps one copy of the pages for all of them, and no CSV or Parquet
+decoding happens after the first build.
+
+Stores are written to a temporary directory and renamed into place, so a
+reader never sees a half-written store and concurrent builders do not clash
+(the first rename wins).  The frames are read-only: date-range slices of
+them are zero-copy views, anything that needs to change values must copy.
+
+An ingested order batch whose orders are not older than the stored ones is
+added with ``extend_shared_data``: the new store is the mapped columns of the
+previous one with the batch's rows appended (categorical codes stay valid,
+new values get new codes), so neither the CSV nor the cache is decoded again.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_VERSION, cache_dir_for, data_version, load_clean_data
+
+STORE_DIR_NAME = 'store'
+MANIFEST_FILE = 'manifest.json'
+
+# Bump when the on-disk layout below changes
+STORE_VERSION = 1
+
+
+def store_root_for(path):
+    """Directory holding the stores of every data version of the CSV at ``path``."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir_for(path), STORE_DIR_NAME, stem)
+
+
+def store_dir_for(path, version=None):
+    """Store directory of ``version`` (default: the current ``data_version``) of ``path``."""
+    version = data_version(path) if version is None else version
+    token = f'{STORE_VERSION}-{CACHE_VERSION}-{version}'.encode('utf-8')
+    return os.path.join(store_root_for(path), hashlib.blake2b(token, digest_size=8).hexdigest())
+
+
+def write_store(df, store_dir):
+    """Write ``df`` as a column store at ``store_dir`` (atomically); returns ``store_dir``.
+
+    Object/string columns are stored as categoricals.  If another process
+    finished the same store first, its copy is kept.
+    """
+    if os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        return store_dir
+    parent = os.path.dirname(store_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = f'{store_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        column = df[name]
+        if column.dtype == object or isinstance(column.dtype, pd.StringDtype):
+            column = column.astype('category')
+        entry = {'name': name, 'file': f'{i}.npy'}
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            values = column.cat.codes.to_numpy()
+            entry['categories'] = column.cat.categories.tolist()
+            entry['ordered'] = bool(column.cat.ordered)
+        else:
+            values = column.to_numpy()
+        np.save(os.path.join(tmp_dir, entry['file']), values, allow_pickle=False)
+        columns.append(entry)
+
+    manifest = {'version': STORE_VERSION, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    try:
+        os.rename(tmp_dir, store_dir)
+    except OSError:   # another process renamed its store into place first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return store_dir
+
+
+def open_store(store_dir):
+    """Read-only frame over the memory-mapped columns of the store at ``store_dir``."""
+    with open(os.path.join(store_dir, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+    columns = {}
+    for entry in manifest['columns']:
+        values = np.load(os.path.join(store_dir, entry['file']), mmap_mode='r')
+        if 'categories' in entry:
+            dtype = pd.CategoricalDtype(entry['categories'], ordered=entry['ordered'])
+            values = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        columns[entry['name']] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def prune_stores(path, keep):
+    """Remove the stores of older data versions of ``path``; mapped files stay readable.
+
+    Stores still being written (by another process) are left alone.
+    """
+    root = store_root_for(path)
+    for name in os.listdir(root):
+        if os.path.join(root, name) != keep and '.tmp-' not in name:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def append_rows(df, rows):
+    """``df`` with ``rows`` appended; the category codes of ``df`` stay valid."""
+    columns = {}
+    for name in df.columns:
+        column, added = df[name], rows[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            known = column.cat.categories
+            new = pd.Index(pd.unique(added.dropna().astype(str)))
+            dtype = pd.CategoricalDtype(known.append(new.difference(known, sort=False)),
+                                        ordered=column.cat.ordered)
+            codes = np.concatenate([column.cat.codes.to_numpy(),
+                                    pd.Categorical(added.astype(object), dtype=dtype).codes])
+            columns[name] = pd.Categorical.from_codes(codes, dtype=dtype)
+        else:
+            columns[name] = np.concatenate([column.to_numpy(),
+                                            added.to_numpy().astype(column.dtype, copy=False)])
+    return pd.DataFrame(columns, copy=False)
+
+
+def extend_shared_data(path, base, rows, version=None):
+    """The frame of ``version`` of ``path``: the shared frame ``base`` of an
+    earlier version with the order batch ``rows`` appended (see module docstring).
+
+    ``rows`` must not start before the last order of ``base``.  Other
+    processes attach to the store the first one writes, like in
+    ``load_shared_data``.
+    """
+    store_dir = store_dir_for(path, version)
+    if not os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        write_store(append_rows(base, rows), store_dir)
+        prune_stores(path, keep=store_dir)
+    return open_store(store_dir)
+
+
+def load_shared_data(path='sales_data.csv', version=None):
+    """The cleaned frame of ``path`` from its column store, built on first use.
+
+    ``version`` is the ``data_version`` the caller already has, if any.
+    Order batches appended to the cache are included, like in
+    ``load_clean_data``.
+    """
+    store_dir = store_dir_for(path, version)
+    if not os.path.exists(os.path.join(store_dir, MANIFEST_FILE)):
+        write_store(load_clean_data(path), store_dir)
+        prune_stores(path, keep=store_dir)
+    return open_store(store_dir)
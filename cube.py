@@ -0,0 +1,200 @@
+"""Pre-aggregated sales cube for the dashboard's KPI cards and overview charts.
+
+The cube is built once at load time at the grain month x category x segment x
+region.  Every cell holds additive measures only (sums and counts), so any
+combination of sidebar filters is answered by summing the matching cells.
+Date ranges that do not start or end on a month boundary take the whole
+months from the cube and scan only the raw rows of the partial edge months,
+which the date-sorted frame yields as small contiguous slices.
+
+Each cell also keeps a mergeable sketch of its profit margins
+(``sketches.MarginSketch``), so the margin histogram, mean and percentiles
+of a selection are merged from cells the same way.  For the same reason an
+ingested order batch is added by merging the cells of its rows only
+(``SalesCube.appended``).
+"""
+import numpy as np
+import pandas as pd
+
+from aggregates import MEASURES, row_measures
+from data_loader import N_DISCOUNT_BINS
+from engine import run_partitioned
+from filters import filter_rows, row_bounds
+from sketches import N_MARGIN_BINS, MarginSketch, margin_bins
+
+CUBE_DIMENSIONS = ['month', 'category', 'segment', 'region']
+
+
+def summarize_rows(df, by='category'):
+    """Measures of raw rows summed per ``by`` (same shape as ``SalesCube.summary``)."""
+    rows = row_measures(df)
+    summary = rows.groupby(df[by], observed=True).sum()
+    return summary[summary['orders'] > 0]
+
+
+def discount_grid(df):
+    """Orders per discount code x margin sketch bin of raw rows, in one ``bincount``.
+
+    Returns ``counts`` (``N_DISCOUNT_BINS`` x ``N_MARGIN_BINS``), the margin
+    sum per discount code and the ``MarginSketch`` of all coded rows, which
+    groups the margin bins for display.  Rows without a discount code or
+    margin are left out.
+    """
+    codes = df['discount_bin'].to_numpy()
+    margins = df['profit_margin'].to_numpy(dtype='float64')
+    valid = (codes >= 0) & np.isfinite(margins)
+    if not valid.all():
+        codes, margins = codes[valid], margins[valid]
+    codes = codes.astype('int64')
+    cells = codes * N_MARGIN_BINS + margin_bins(margins)
+    counts = np.bincount(cells, minlength=N_DISCOUNT_BINS * N_MARGIN_BINS)
+    counts = counts.reshape(N_DISCOUNT_BINS, N_MARGIN_BINS)
+    margin_sum = np.bincount(codes, weights=margins, minlength=N_DISCOUNT_BINS)
+    sketch = (MarginSketch(counts.sum(axis=0), margin_sum.sum(), margins.min(), margins.max())
+              if len(margins) else MarginSketch())
+    return {'counts': counts, 'margin_sum': margin_sum, 'sketch': sketch}
+
+
+def split_months(start_date, end_date):
+    """Split an inclusive day range into whole months and partial edges.
+
+    Returns ``(full_months, edges)``: ``full_months`` is ``(first, stop)`` of
+    the whole months inside the range (or ``None``), ``edges`` the non-empty
+    ``[start, stop)`` timestamp ranges left over at either end.
+    """
+    start = pd.Timestamp(start_date)
+    stop = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+
+    first_full = start.to_period('M').start_time
+    if first_full < start:
+        first_full = (start + pd.offsets.MonthBegin(1)).normalize()
+    last_full = stop.to_period('M').start_time
+
+    if first_full < last_full:
+        edges = [(start, first_full), (last_full, stop)]
+        return (first_full, last_full), [(a, b) for a, b in edges if a < b]
+    return None, [(start, stop)] if start < stop else []
+
+
+# Columns the cube is built from
+CUBE_SOURCE_COLUMNS = ['order_date', 'category', 'segment', 'region',
+                       'sales_clean', 'profit_clean', 'profit_margin']
+
+# Per-cell margin sketch columns: counts per sketch bin, then the extremes
+MARGIN_BIN_COLUMNS = [f'margin_bin_{i}' for i in range(N_MARGIN_BINS)]
+
+
+def cube_cells(df):
+    """Cube cells (one row per month/category/segment/region) of a frame or partition."""
+    rows = row_measures(df)
+    rows['month'] = df['order_date'].to_numpy().astype('datetime64[M]')
+    for dim in CUBE_DIMENSIONS[1:]:
+        rows[dim] = df[dim]
+    rows['margin_min'] = rows['margin_max'] = df['profit_margin']
+    grouped = rows.groupby(CUBE_DIMENSIONS, observed=True)
+    cells = pd.concat([grouped[MEASURES].sum(),
+                       grouped['margin_min'].min(), grouped['margin_max'].max()], axis=1)
+
+    # Margin counts per cell and sketch bin in one bincount
+    cell = grouped.ngroup().to_numpy()
+    counts = np.bincount(cell * N_MARGIN_BINS + margin_bins(df['profit_margin']),
+                         minlength=len(cells) * N_MARGIN_BINS).reshape(len(cells), N_MARGIN_BINS)
+    bins = pd.DataFrame(counts, index=cells.index, columns=MARGIN_BIN_COLUMNS)
+    return pd.concat([cells, bins], axis=1).reset_index()
+
+
+def merge_cube_cells(parts):
+    """Merge ``cube_cells`` of disjoint partitions (cells at their boundaries are summed)."""
+    grouped = pd.concat(parts, ignore_index=True).groupby(CUBE_DIMENSIONS, observed=True)
+    return pd.concat([grouped[MEASURES].sum(),
+                      grouped['margin_min'].min(), grouped['margin_max'].max(),
+                      grouped[MARGIN_BIN_COLUMNS].sum()], axis=1).reset_index()
+
+
+class SalesCube:
+    """Month x category x segment x region sums over a date-sorted frame."""
+
+    def __init__(self, df, jobs=1):
+        # Large frames are aggregated by time partition on a process pool
+        self._set_cells(run_partitioned(df, cube_cells, merge_cube_cells, jobs=jobs,
+                                        columns=CUBE_SOURCE_COLUMNS))
+
+    def _set_cells(self, cells):
+        # Sketch counts as one compact matrix aligned with the cell rows
+        self.margin_counts = cells[MARGIN_BIN_COLUMNS].to_numpy(dtype='int32')
+        self.cells = cells.drop(columns=MARGIN_BIN_COLUMNS)
+        self.months = self.cells['month'].to_numpy()
+
+    def appended(self, rows):
+        """Cube of the frame with ``rows`` appended; this one is left as it is.
+
+        Only ``rows`` are aggregated; their cells are merged into a copy of
+        the existing ones.
+        """
+        cells = pd.concat([self.cells, pd.DataFrame(self.margin_counts, index=self.cells.index,
+                                                    columns=MARGIN_BIN_COLUMNS)], axis=1)
+        cube = object.__new__(SalesCube)
+        cube._set_cells(merge_cube_cells([cells, cube_cells(rows[CUBE_SOURCE_COLUMNS])]))
+        return cube
+
+    def _cell_mask(self, start, stop, category, segment, regions):
+        cells = self.cells
+        mask = (self.months >= np.datetime64(start)) & (self.months < np.datetime64(stop))
+        if category != "All":
+            mask &= (cells['category'] == category).to_numpy()
+        if segment != "All":
+            mask &= (cells['segment'] == segment).to_numpy()
+        if regions:
+            mask &= cells['region'].isin(regions).to_numpy()
+        return mask
+
+    def summary(self, df, start_date, end_date, category="All", segment="All",
+                regions=None, index=None, by='category'):
+        """Measures per ``by`` for the sidebar selection (sales slider at default).
+
+        ``df`` / ``index`` are the frame the cube was built from and its
+        ``BitmapIndex``; they are only used for partial months at the edges.
+        """
+        full_months, edges = split_months(start_date, end_date)
+
+        parts = []
+        if full_months is not None:
+            mask = self._cell_mask(*full_months, category, segment, regions)
+            parts.append(self.cells[mask].groupby(by, observed=True)[MEASURES].sum())
+
+        # Partial months at the edges come from the raw rows
+        for edge_start, edge_stop in edges:
+            lo, hi = row_bounds(df, edge_start, edge_stop)
+            if lo < hi:
+                rows = filter_rows(df, lo, hi, category, segment, regions, index=index)
+                parts.append(summarize_rows(rows, by=by))
+
+        if not parts:
+            return pd.DataFrame(columns=MEASURES, dtype='float64')
+        summary = pd.concat(parts).groupby(level=0, observed=True).sum()
+        return summary[summary['orders'] > 0]
+
+    def margin_sketch(self, df, start_date, end_date, category="All", segment="All",
+                      regions=None, index=None):
+        """Merged ``MarginSketch`` of the sidebar selection (sales slider at default).
+
+        Whole months are merged from the cells; partial edge months are
+        sketched from their raw rows, like ``summary``.
+        """
+        full_months, edges = split_months(start_date, end_date)
+
+        sketch = MarginSketch()
+        if full_months is not None:
+            mask = self._cell_mask(*full_months, category, segment, regions)
+            if mask.any():
+                cells = self.cells[mask]
+                sketch += MarginSketch(self.margin_counts[mask].sum(axis=0),
+                                       cells['margin_sum'].sum(),
+                                       cells['margin_min'].min(), cells['margin_max'].max())
+
+        for edge_start, edge_stop in edges:
+            lo, hi = row_bounds(df, edge_start, edge_stop)
+            if lo < hi:
+                rows = filter_rows(df, lo, hi, category, segment, regions, index=index)
+                sketch += MarginSketch.from_values(rows['profit_margin'])
+        return sketch
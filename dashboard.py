@@ -1,8 +1,28 @@
 # dashboard.py
+import os
+
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+
+from charts import (dashboard_category_margin, dashboard_category_sales,
+                    dashboard_discount_heatmap, dashboard_discount_ranges,
+                    dashboard_margin_histogram, dashboard_sales_profit)
+from data_sources import open_steps, source_version
+from export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, export_file
+from instrumentation import SectionProfiler, configure_json_log
+from render_cache import FigureCache
+from warmup import Warmup, render_default_charts, selection_state
+
+# Source extract, or a SQLite database (.db/.sqlite) built with sqlite_source.py;
+# overridable so the dashboard can run against other data (e.g. benchmarks)
+DATA_PATH = os.environ.get("SALES_DATA_PATH", "sales_data.csv")
+
+# How often the "warming" page checks whether the startup build has finished
+WARMUP_POLL_SECONDS = 0.5
+
+# Per-section timings as JSON lines on stderr, for the log pipeline
+if os.environ.get("DASHBOARD_PERF_LOG"):
+    configure_json_log()
 
 # Page configuration
 st.set_page_config(
@@ -12,26 +32,65 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Sections are only timed when the performance panel (bottom of the sidebar)
+# is open or JSON logging is on
+profiler = SectionProfiler(show=st.session_state.get("perf_panel", False))
+
 # ============================================
 # LOAD DATA
 # ============================================
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv("sales_data.csv")
-    df['sales_clean'] = df['sales'].astype(str).str.replace(',', '').astype(float)
-    df['profit_clean'] = df['profit'].astype(str).str.replace(',', '').astype(float)
-    df = df[df['sales_clean'] > 0]
-    df['profit_margin'] = (df['profit_clean'] / df['sales_clean']) * 100
-    df['order_date'] = pd.to_datetime(df['order_date'], format='mixed', dayfirst=True)
-    
-    # Clean discount if exists
-    if 'discount' in df.columns:
-        df['discount_clean'] = df['discount'].astype(str).str.replace(',', '').astype(float)
-    
-    return df
-
-df = load_data()
+@st.cache_resource
+def load_figure_cache():
+    # Rendered chart PNGs shared by all sessions of this process
+    return FigureCache()
+
+
+@st.cache_resource
+def ready_sources():
+    # Last data source each process finished building, per path: new order
+    # batches are appended to it instead of rebuilding everything
+    return {}
+
+
+@st.cache_resource(max_entries=1)
+def start_warmup(version):
+    # One background build per data version and process, polled by every session.
+    # ``version`` changes with the CSV or when a new order batch is ingested
+    figure_cache = load_figure_cache()
+    previous = ready_sources().get(DATA_PATH)
+    return Warmup(open_steps(DATA_PATH, version, previous) + [
+        # Charts of the unfiltered view, the first thing every session shows
+        ('charts', lambda built: render_default_charts(figure_cache, version, built['source'])),
+    ]).start()
+
+profiler.section('load')
+version = source_version(DATA_PATH)
+figure_cache = load_figure_cache()
+warmup = start_warmup(version)
+
+# Sessions arriving while the build runs get a progress page that reruns itself
+# until the warm-up is done, instead of waiting on it
+if warmup.error is not None:
+    start_warmup.clear()
+    st.error(f"Loading {DATA_PATH} failed; reload the page to retry.")
+    st.exception(warmup.error)
+    st.stop()
+if not warmup.ready:
+    status = warmup.status()
+    st.title("📊 Superstore Sales Dashboard")
+    st.info("⏳ Warming up: loading the data and pre-rendering the default view. "
+            "The dashboard appears as soon as it is ready.")
+    st.progress(status['done'] / status['total'],
+                text=f"Building {status['step'] or 'data'} ({status['done']}/{status['total']})")
+    profiler.finish()
+    warmup.wait(WARMUP_POLL_SECONDS)
+    st.rerun()
+
+source = warmup.results['source']
+ready_sources()[DATA_PATH] = source
+bounds = source.bounds()
+profiler.rows(bounds['rows'])
 
 # ============================================
 # HEADER
@@ -44,24 +103,25 @@ st.markdown("Interactive analysis of sales, profit, and margins (2011-2014)")
 # SIDEBAR FILTERS
 # ============================================
 
+profiler.section('filters')
 st.sidebar.header("🔍 Filters")
 
 # Date range
-min_date = df['order_date'].min().date()
-max_date = df['order_date'].max().date()
+min_date = bounds['min_date']
+max_date = bounds['max_date']
 start_date = st.sidebar.date_input("Start Date", min_date, min_value=min_date, max_value=max_date)
 end_date = st.sidebar.date_input("End Date", max_date, min_value=min_date, max_value=max_date)
 
 # Category
-selected_category = st.sidebar.selectbox("Select Category", ["All"] + list(df['category'].unique()))
-selected_segment = st.sidebar.selectbox("Select Segment", ["All"] + list(df['segment'].unique()))
+selected_category = st.sidebar.selectbox("Select Category", ["All"] + bounds['categories'])
+selected_segment = st.sidebar.selectbox("Select Segment", ["All"] + bounds['segments'])
 
 # Region
-selected_regions = st.sidebar.multiselect("Select Regions", list(df['region'].unique()), default=[])
+selected_regions = st.sidebar.multiselect("Select Regions", bounds['regions'], default=[])
 
 # Sales range
-min_sales_val = float(df['sales_clean'].min())
-max_sales_val = float(df['sales_clean'].max())
+min_sales_val = bounds['min_sales']
+max_sales_val = bounds['max_sales']
 min_sales, max_sales = st.sidebar.slider("Sales Range ($)", min_sales_val, max_sales_val, 
                                          (min_sales_val, max_sales_val), step=100.0)
 
@@ -69,80 +129,83 @@ min_sales, max_sales = st.sidebar.slider("Sales Range ($)", min_sales_val, max_s
 # APPLY FILTERS
 # ============================================
 
-filtered_df = df.copy()
-filtered_df = filtered_df[(filtered_df['order_date'].dt.date >= start_date) & 
-                          (filtered_df['order_date'].dt.date <= end_date)]
+sales_range = None
+if (min_sales, max_sales) != (min_sales_val, max_sales_val):
+    sales_range = (min_sales, max_sales)
+
+# The source resolves the selection (bitmaps and cube in memory, indexed SQL for
+# a database); each result below is computed on first use only
+view = source.select({'start_date': start_date, 'end_date': end_date,
+                      'category': selected_category, 'segment': selected_segment,
+                      'regions': selected_regions, 'sales_range': sales_range})
+
+st.sidebar.metric("Filtered Records", f"{view.count:,}")
+
+# Per-category sums for the KPI cards and overview charts
+category_summary = view.summary
+margin_sketch = view.sketch
+n_orders = int(category_summary['orders'].sum())
+profiler.rows(view.count)
 
-if selected_category != "All":
-    filtered_df = filtered_df[filtered_df['category'] == selected_category]
-if selected_segment != "All":
-    filtered_df = filtered_df[filtered_df['segment'] == selected_segment]
-if selected_regions:
-    filtered_df = filtered_df[filtered_df['region'].isin(selected_regions)]
-filtered_df = filtered_df[(filtered_df['sales_clean'] >= min_sales) & 
-                          (filtered_df['sales_clean'] <= max_sales)]
+# Every chart below is a function of this state only: rendered PNGs are
+# reused for repeated selections instead of redrawing them
+filter_state = selection_state(version, **view.selection)
 
-st.sidebar.metric("Filtered Records", f"{len(filtered_df):,}")
+def show_chart(chart_id, draw):
+    st.image(figure_cache.get_or_render(chart_id, filter_state, draw), width="stretch")
 
 # ============================================
 # KPI CARDS
 # ============================================
 
+profiler.section('kpis', rows=n_orders)
 st.subheader("📈 Key Metrics")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_sales = filtered_df['sales_clean'].sum()
-    st.metric("💰 Total Sales", f"${total_sales/1e6:.2f}M", f"{len(filtered_df):,} orders")
+    total_sales = category_summary['sales'].sum()
+    st.metric("💰 Total Sales", f"${total_sales/1e6:.2f}M", f"{n_orders:,} orders")
 
 with col2:
-    total_profit = filtered_df['profit_clean'].sum()
+    total_profit = category_summary['profit'].sum()
     margin = (total_profit/total_sales*100) if total_sales > 0 else 0
     st.metric("📈 Total Profit", f"${total_profit/1e6:.2f}M", f"{margin:.1f}% margin")
 
 with col3:
-    aov = filtered_df['sales_clean'].mean()
+    aov = total_sales / n_orders if n_orders > 0 else float('nan')
     st.metric("🛒 Avg Order Value", f"${aov:,.0f}")
 
 with col4:
-    losses = len(filtered_df[filtered_df['profit_clean'] < 0])
-    loss_pct = (losses/len(filtered_df)*100) if len(filtered_df) > 0 else 0
+    losses = int(category_summary['loss_orders'].sum())
+    loss_pct = (losses/n_orders*100) if n_orders > 0 else 0
     st.metric("⚠️ Loss Orders", f"{losses:,}", f"{loss_pct:.1f}%", delta_color="inverse")
 
+# Order margin percentiles, merged from the cube cells' margin sketches
+# (within 1 percentage point of the exact values, see sketches.py)
+margin_percentiles = margin_sketch.percentiles()
+col5, col6, col7, col8 = st.columns(4)
+col5.metric("📉 P5 Order Margin", f"{margin_percentiles['p5']:.1f}%")
+col6.metric("⚖️ Median Order Margin", f"{margin_percentiles['median']:.1f}%")
+col7.metric("📈 P95 Order Margin", f"{margin_percentiles['p95']:.1f}%")
+col8.metric("🧮 Mean Order Margin", f"{margin_sketch.mean:.1f}%")
+
 # ============================================
 # MAIN CHARTS
 # ============================================
 
+profiler.section('overview_charts', rows=n_orders)
 st.subheader("📊 Overview")
 col_chart1, col_chart2 = st.columns(2)
 
 with col_chart1:
-    if len(filtered_df) > 0:
-        cat_sales = filtered_df.groupby('category')['sales_clean'].sum().sort_values(ascending=False)
-        fig, ax = plt.subplots(figsize=(8, 5))
-        colors = {'Technology': '#2E86AB', 'Furniture': '#A23B72', 'Office Supplies': '#F18F01'}
-        bars = ax.bar(cat_sales.index, cat_sales.values, color=[colors.get(c, 'gray') for c in cat_sales.index])
-        ax.set_ylabel("Sales ($)")
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'${x/1e6:.1f}M'))
-        for bar in bars:
-            h = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., h, f'${h/1e6:.1f}M', ha='center', va='bottom', fontsize=9)
-        st.pyplot(fig)
+    if n_orders > 0:
+        show_chart('category_sales', lambda: dashboard_category_sales(category_summary))
     else:
         st.warning("No data")
 
 with col_chart2:
-    if len(filtered_df) > 0:
-        cat_margin = filtered_df.groupby('category')['profit_margin'].mean()
-        fig, ax = plt.subplots(figsize=(8, 5))
-        colors = {'Technology': '#2E86AB', 'Furniture': '#A23B72', 'Office Supplies': '#F18F01'}
-        bars = ax.bar(cat_margin.index, cat_margin.values, color=[colors.get(c, 'gray') for c in cat_margin.index])
-        ax.set_ylabel("Profit Margin (%)")
-        ax.axhline(y=0, color='red', linestyle='--')
-        for bar in bars:
-            h = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., h, f'{h:.1f}%', ha='center', va='bottom', fontsize=9)
-        st.pyplot(fig)
+    if n_orders > 0:
+        show_chart('category_margin', lambda: dashboard_category_margin(category_summary))
     else:
         st.warning("No data")
 
@@ -155,117 +218,131 @@ st.subheader("🔍 Advanced Analysis")
 
 col_adv1, col_adv2 = st.columns(2)
 
+profiler.section('scatter', rows=view.count)
 with col_adv1:
     st.markdown("**💸 Sales vs Profit Scatter**")
-    if len(filtered_df) > 0:
-        plot_df = filtered_df.sample(min(500, len(filtered_df)))
-        fig, ax = plt.subplots(figsize=(8, 6))
-        for cat in plot_df['category'].unique():
-            d = plot_df[plot_df['category'] == cat]
-            ax.scatter(d['sales_clean'], d['profit_clean'], label=cat, alpha=0.6, s=40)
-        ax.axhline(y=0, color='red', linestyle='--')
-        ax.set_xlabel('Sales ($)')
-        ax.set_ylabel('Profit ($)')
-        ax.legend(fontsize=8)
-        st.pyplot(fig)
+    if view.count > 0:
+        # Density of every filtered order per category, disasters as points
+        show_chart('sales_profit', lambda: dashboard_sales_profit(view.density))
         
-        disasters = len(filtered_df[(filtered_df['sales_clean'] > 1000) & (filtered_df['profit_clean'] < 0)])
+        disasters = view.disasters
         if disasters > 0:
             st.error(f"⚠️ {disasters} discount disasters")
 
+profiler.section('histogram', rows=view.count)
 with col_adv2:
     st.markdown("**📊 Profit Margin Distribution**")
-    if len(filtered_df) > 0:
-        fig, ax = plt.subplots(figsize=(8, 6))
-        n, bins, patches = ax.hist(filtered_df['profit_margin'], bins=25, alpha=0.7, color='steelblue', edgecolor='black')
-        for patch, left in zip(patches, bins[:-1]):
-            if left < 0:
-                patch.set_facecolor('#e74c3c')
-        ax.axvline(x=0, color='red', linestyle='--')
-        ax.axvline(x=filtered_df['profit_margin'].mean(), color='green', linestyle='--')
-        ax.set_xlabel('Profit Margin (%)')
-        ax.set_ylabel('Orders')
-        st.pyplot(fig)
+    if view.count > 0:
+        show_chart('margin_histogram', lambda: dashboard_margin_histogram(margin_sketch))
         
-        neg_pct = (filtered_df['profit_margin'] < 0).mean() * 100
-        st.info(f"{neg_pct:.1f}% orders are unprofitable")
+        st.info(f"{loss_pct:.1f}% orders are unprofitable")
 
 # ============================================
 # TOP/BOTTOM PRODUCTS
 # ============================================
 
+profiler.section('products', rows=view.count)
 st.markdown("---")
 st.subheader("🏆 Product Performance")
 
 col_top, col_bottom = st.columns(2)
 
+# Ranked by product (all of its order lines)
+top10, bottom10 = view.top_bottom()
+
+# Formatting is done by the table widget, not per cell in Python
+product_columns = {
+    'product_name': st.column_config.TextColumn("Product"),
+    'profit': st.column_config.NumberColumn("Profit", format="dollar"),
+    'sales': st.column_config.NumberColumn("Sales", format="dollar"),
+    'orders': st.column_config.NumberColumn("Orders", format="%d"),
+    'margin': st.column_config.NumberColumn("Margin", format="%.1f%%"),
+}
+
 with col_top:
     st.markdown("**⭐ Top 10 Most Profitable**")
-    if len(filtered_df) > 0:
-        top10 = filtered_df.nlargest(10, 'profit_clean')[['product_name', 'profit_clean', 'profit_margin']]
-        top10['profit_clean'] = top10['profit_clean'].apply(lambda x: f"${x:,.0f}")
-        top10['profit_margin'] = top10['profit_margin'].apply(lambda x: f"{x:.1f}%")
-        st.dataframe(top10, hide_index=True, use_container_width=True)
+    if view.count > 0:
+        st.dataframe(top10, hide_index=True, width="stretch", column_config=product_columns)
 
 with col_bottom:
     st.markdown("**⚠️ Top 10 Biggest Losses**")
-    if len(filtered_df) > 0:
-        bottom10 = filtered_df.nsmallest(10, 'profit_clean')[['product_name', 'profit_clean', 'profit_margin']]
-        bottom10['profit_clean'] = bottom10['profit_clean'].apply(lambda x: f"${x:,.0f}")
-        bottom10['profit_margin'] = bottom10['profit_margin'].apply(lambda x: f"{x:.1f}%")
-        st.dataframe(bottom10, hide_index=True, use_container_width=True)
+    if view.count > 0:
+        st.dataframe(bottom10, hide_index=True, width="stretch", column_config=product_columns)
 
 # ============================================
 # DISCOUNT ANALYSIS (if data available)
 # ============================================
 
-if 'discount_clean' in filtered_df.columns:
+profiler.section('discount_charts', rows=view.count)
+if view.has_discount:
     st.markdown("---")
     st.subheader("💰 Discount Impact")
-    
+
+    # Both charts read one discount x margin grid of the selection, built only
+    # if one of them is not in the figure cache
+
     col_d1, col_d2 = st.columns(2)
     
     with col_d1:
         st.markdown("**Discount vs Margin**")
-        fig, ax = plt.subplots(figsize=(8, 6))
-        scatter = ax.scatter(filtered_df['discount_clean'], filtered_df['profit_margin'], 
-                           alpha=0.5, c=filtered_df['sales_clean'], cmap='viridis', s=30)
-        ax.set_xlabel('Discount Rate')
-        ax.set_ylabel('Profit Margin (%)')
-        ax.axhline(y=0, color='red', linestyle='--')
-        plt.colorbar(scatter, label='Sales ($)')
-        st.pyplot(fig)
+        show_chart('discount_margin', lambda: dashboard_discount_heatmap(view.discount))
     
     with col_d2:
         st.markdown("**Margin by Discount Range**")
-        filtered_df['disc_range'] = pd.cut(filtered_df['discount_clean'], 
-                                          bins=[0, 0.1, 0.2, 0.3, 0.5, 1.0],
-                                          labels=['0-10%', '10-20%', '20-30%', '30-50%', '50%+'])
-        disc_margin = filtered_df.groupby('disc_range')['profit_margin'].mean()
-        fig, ax = plt.subplots(figsize=(8, 6))
-        colors = ['#2ecc71', '#f1c40f', '#e67e22', '#e74c3c', '#8e44ad']
-        bars = ax.bar(disc_margin.index, disc_margin.values, color=colors[:len(disc_margin)])
-        ax.set_ylabel('Avg Margin (%)')
-        ax.axhline(y=0, color='red', linestyle='--')
-        for bar in bars:
-            h = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., h, f'{h:.1f}%', ha='center', va='bottom')
-        st.pyplot(fig)
+        show_chart('discount_ranges', lambda: dashboard_discount_ranges(view.discount))
 
 # ============================================
 # DATA EXPORT
 # ============================================
 
+profiler.section('export', rows=view.count)
 st.markdown("---")
 st.subheader("💾 Export Data")
 
-csv = filtered_df.to_csv(index=False).encode('utf-8')
-st.download_button("📥 Download Filtered CSV", csv, 
-                   f"sales_filtered_{start_date}_{end_date}.csv", "text/csv")
-
-st.dataframe(filtered_df[['order_date', 'category', 'segment', 'region', 'sales_clean', 
-                         'profit_clean', 'profit_margin']].head(50), use_container_width=True)
+# Nothing is serialized on ordinary reruns: the file is written in chunks only
+# when the download button is clicked (gzip'd by default, as it is held in memory)
+col_fmt, col_cols = st.columns([1, 3])
+with col_fmt:
+    export_format = st.selectbox("Format", list(EXPORT_FORMATS),
+                                 index=list(EXPORT_FORMATS).index(DEFAULT_EXPORT_FORMAT))
+with col_cols:
+    export_columns = st.multiselect("Columns", view.columns, default=view.columns)
+
+extension, mime = EXPORT_FORMATS[export_format]
+if export_columns:
+    st.download_button("📥 Download Filtered Data",
+                       profiler.wrap('export_file',
+                                     lambda: export_file(view.export_data(export_columns),
+                                                         export_format, export_columns),
+                                     rows=view.count),
+                       f"sales_filtered_{start_date}_{end_date}.{extension}", mime)
+else:
+    st.warning("Select at least one column to export.")
+
+st.dataframe(view.preview(50), width="stretch")
 
 # Footer
 st.markdown("---")
-st.markdown("Built with Streamlit | Superstore Sales Analysis 2011-2014")
\ No newline at end of file
+st.markdown("Built with Streamlit | Superstore Sales Analysis 2011-2014")
+
+# ============================================
+# PERFORMANCE PANEL
+# ============================================
+
+perf_records = profiler.finish()
+if st.sidebar.toggle("⏱️ Performance", key="perf_panel") and perf_records:
+    with st.sidebar.expander("Last rerun", expanded=True):
+        perf_table = pd.DataFrame(perf_records)[['section', 'wall_ms', 'rows', 'peak_mem_mb']]
+        st.dataframe(perf_table, hide_index=True, width="stretch", column_config={
+            'section': st.column_config.TextColumn("Section"),
+            'wall_ms': st.column_config.NumberColumn("ms", format="%.1f"),
+            'rows': st.column_config.NumberColumn("Rows", format="%d"),
+            'peak_mem_mb': st.column_config.NumberColumn("Peak MB", format="%.1f"),
+        })
+        st.caption(f"Total {perf_table['wall_ms'].sum():,.0f} ms")
+    with st.sidebar.expander("Chart cache"):
+        cache_stats = figure_cache.stats()
+        st.caption(f"{cache_stats['entries']} charts, {cache_stats['bytes'] / 2**20:.1f} of "
+                   f"{cache_stats['max_bytes'] / 2**20:.0f} MB | {cache_stats['hit_rate']:.0%} hits "
+                   f"({cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses, "
+                   f"{cache_stats['evictions']:,} evictions)")
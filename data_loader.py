@@ -0,0 +1,320 @@
+"""Loading and cleaning of the Superstore sales extract.
+
+``read_sales_csv`` is the shared ingest path for ``app.py`` and the
+dashboard: it reads only the requested columns with an explicit schema,
+parses thousands separators in the C parser and dictionary-encodes the
+low-cardinality dimensions.
+
+The cleaned frame is cached on disk in a columnar binary format next to the
+source CSV, so a fresh process only pays for a binary read.  The cache is
+keyed on the CSV's size, modification time and content hash and is rebuilt
+only when the CSV itself changes.
+
+New order batches can be appended to the cache without touching the CSV
+(``append_delta``, driven by ``incremental.ingest_delta``): each batch is
+stored as its own cleaned part and read back after the base frame.  A new
+base extract supersedes the batches, which are dropped when it is cached.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from date_parsing import parse_dates
+
+# Bump whenever the cleaning below changes so stale caches are rebuilt
+CACHE_VERSION = 4
+CACHE_DIR_NAME = '.cache'
+DELTA_DIR_NAME = 'deltas'
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:  # Parquet needs pyarrow; fall back to pickle without it
+    CACHE_FORMAT = 'pickle'
+
+
+# ============================================
+# TYPED INGEST
+# ============================================
+
+# Explicit schema for every column we ever read.  Money columns are parsed as
+# floats directly (``thousands=','`` strips the separators), dimensions are
+# categorical, dates stay strings until they are parsed on purpose.
+SCHEMA = {
+    'order_date': 'str',
+    'ship_date': 'str',
+    'year': 'int16',
+    'category': 'category',
+    'segment': 'category',
+    'region': 'category',
+    'market': 'category',
+    'country': 'category',
+    'product_name': 'category',
+    'sales': 'float64',
+    'profit': 'float64',
+    'discount': 'float64',
+}
+
+# Columns the dashboard actually uses
+DASHBOARD_COLUMNS = ['order_date', 'category', 'segment', 'region',
+                     'product_name', 'sales', 'profit', 'discount']
+
+# Dashboard columns plus the slice dimensions of the per-slice reports
+SLICE_COLUMNS = DASHBOARD_COLUMNS + ['market', 'year']
+
+# Columns the batch report (app.py) uses: the report and its slices need
+# nothing else (no ship dates or countries)
+REPORT_COLUMNS = SLICE_COLUMNS
+
+
+def read_sales_csv(path='sales_data.csv', columns=DASHBOARD_COLUMNS, **kwargs):
+    """Read ``columns`` of the sales CSV with the typed schema.
+
+    Columns missing from the file (e.g. ``discount`` in older extracts) are
+    skipped rather than raising.  Extra keyword arguments go to
+    ``pd.read_csv`` (e.g. ``chunksize``).
+    """
+    wanted = set(columns)
+    return pd.read_csv(
+        path,
+        usecols=lambda c: c in wanted,
+        dtype={c: t for c, t in SCHEMA.items() if c in wanted},
+        thousands=',',
+        **kwargs,
+    )
+
+
+def memory_usage_mb(df):
+    """Resident size of a frame in MB, including string/object payloads."""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+
+# ============================================
+# CLEANING
+# ============================================
+
+# Discounts are coded once at load on a 5% grid: code k covers (5(k-1)%, 5k%],
+# code 0 is no discount and -1 a missing one.  The dashboard's discount bands
+# are groups of whole codes, right-closed like ``pd.cut``: orders without a
+# discount are in no band (band -1).
+DISCOUNT_STEP = 0.05
+N_DISCOUNT_BINS = 21
+DISCOUNT_BANDS = {'0-10%': 0.1, '10-20%': 0.2, '20-30%': 0.3, '30-50%': 0.5, '50%+': 1.0}
+DISCOUNT_BAND_OF_BIN = np.searchsorted(
+    np.round(np.array(list(DISCOUNT_BANDS.values())) / DISCOUNT_STEP), np.arange(N_DISCOUNT_BINS))
+DISCOUNT_BAND_OF_BIN[0] = -1
+
+
+def discount_bins(discount):
+    """int8 discount codes (see ``DISCOUNT_STEP``) of a discount rate column."""
+    steps = np.ceil(np.round(np.asarray(discount, dtype='float64') / DISCOUNT_STEP, 6))
+    valid = np.isfinite(steps) & (steps >= 0) & (steps < N_DISCOUNT_BINS)
+    return np.where(valid, steps, -1).astype('int8')
+
+
+def clean_sales_data(df, sort=True):
+    """Add the numeric/date columns used by the dashboard and drop $0 sales.
+
+    Expects a frame from ``read_sales_csv``; the money columns are already
+    numeric, so they are renamed rather than copied.  The result is sorted
+    by ``order_date`` so date ranges can be found by binary search, unless
+    ``sort=False`` (chunks that are only aggregated).
+    """
+    df = df.rename(columns={'sales': 'sales_clean', 'profit': 'profit_clean',
+                            'discount': 'discount_clean'})
+    df = df[df['sales_clean'] > 0].copy()
+    df['profit_margin'] = (df['profit_clean'] / df['sales_clean']) * 100
+    if 'discount_clean' in df:
+        df['discount_bin'] = discount_bins(df['discount_clean'])
+    df['order_date'] = parse_dates(df['order_date'])
+    if not sort:
+        return df
+    return df.sort_values('order_date', kind='stable', ignore_index=True)
+
+
+# ============================================
+# ON-DISK CACHE
+# ============================================
+
+def file_digest(path, chunk_size=1 << 20):
+    """Content hash of a file, read in fixed-size chunks."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_dir_for(path):
+    """The cache directory used for the CSV at ``path``."""
+    return os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+
+
+def delta_dir_for(path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir_for(path), DELTA_DIR_NAME, stem)
+
+
+def _cache_paths(path):
+    cache_dir = cache_dir_for(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    data_path = os.path.join(cache_dir, f'{stem}.{CACHE_FORMAT}')
+    meta_path = os.path.join(cache_dir, f'{stem}.meta.json')
+    return cache_dir, data_path, meta_path
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_meta(meta_path, meta):
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    _write_atomic(meta_path, write)
+
+
+def _read_frame(data_path):
+    if CACHE_FORMAT == 'parquet':
+        return pd.read_parquet(data_path)
+    return pd.read_pickle(data_path)
+
+
+def _write_frame(df, data_path):
+    if CACHE_FORMAT == 'parquet':
+        _write_atomic(data_path, lambda tmp: df.to_parquet(tmp))
+    else:
+        _write_atomic(data_path, lambda tmp: df.to_pickle(tmp))
+
+
+def cache_is_fresh(path):
+    """True when the on-disk cache for ``path`` matches the current CSV."""
+    _, data_path, meta_path = _cache_paths(path)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(data_path):
+        return False
+    if meta.get('version') != CACHE_VERSION or meta.get('format') != CACHE_FORMAT:
+        return False
+
+    stat = os.stat(path)
+    if meta['size'] != stat.st_size:
+        return False
+    if meta['mtime_ns'] == stat.st_mtime_ns:
+        return True
+
+    # Touched but maybe not changed: only the content hash can tell
+    if meta['digest'] != file_digest(path):
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    _write_meta(meta_path, meta)
+    return True
+
+
+def _concat_parts(frames):
+    """Base frame plus delta parts, kept date-sorted and categorical."""
+    if len(frames) == 1:
+        return frames[0]
+    base = frames[0]
+    df = pd.concat(frames, ignore_index=True)
+    for column in base.columns:
+        if isinstance(base[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    if not df['order_date'].is_monotonic_increasing:
+        df = df.sort_values('order_date', kind='stable', ignore_index=True)
+    return df
+
+
+def delta_entries(path):
+    """Order batches appended to the cache of ``path`` since its base extract."""
+    _, _, meta_path = _cache_paths(path)
+    meta = _read_meta(meta_path) if cache_is_fresh(path) else None
+    return list(meta.get('deltas', [])) if meta else []
+
+
+def base_version(path):
+    """Cheap token of the base extract of ``path`` alone (no order batches)."""
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def data_version(path):
+    """Cheap token that changes whenever the cached data for ``path`` changes."""
+    _, _, meta_path = _cache_paths(path)
+    deltas = (_read_meta(meta_path) or {}).get('deltas', [])
+    last = deltas[-1]['digest'] if deltas else ''
+    return f"{base_version(path)}+{len(deltas)}-{last}"
+
+
+def read_delta(path, entry):
+    """Cleaned rows of one order batch appended to ``path`` (an entry of ``delta_entries``)."""
+    return _read_frame(os.path.join(delta_dir_for(path), entry['file']))
+
+
+def append_delta(path, df, digest, **info):
+    """Record a cleaned order batch as a new part of the cache for ``path``.
+
+    ``digest`` identifies the batch (its file hash); ``info`` is stored with
+    it in the cache metadata.  Only the batch is written.
+    """
+    if not cache_is_fresh(path):
+        load_clean_data(path)
+    _, _, meta_path = _cache_paths(path)
+    meta = _read_meta(meta_path)
+
+    delta_dir = delta_dir_for(path)
+    os.makedirs(delta_dir, exist_ok=True)
+    part_path = os.path.join(delta_dir, f'{digest}.{CACHE_FORMAT}')
+    _write_frame(df, part_path)
+
+    entry = {'digest': digest, 'file': os.path.basename(part_path), 'rows': len(df), **info}
+    meta.setdefault('deltas', []).append(entry)
+    _write_meta(meta_path, meta)
+    return entry
+
+
+def load_clean_data(path='sales_data.csv', use_cache=True):
+    """Return the cleaned sales frame, served from the on-disk cache if fresh.
+
+    Order batches appended with ``append_delta`` are included.
+    """
+    if not use_cache:
+        return clean_sales_data(read_sales_csv(path))
+
+    cache_dir, data_path, meta_path = _cache_paths(path)
+    if cache_is_fresh(path):
+        parts = [read_delta(path, entry) for entry in _read_meta(meta_path).get('deltas', [])]
+        return _concat_parts([_read_frame(data_path)] + parts)
+
+    stat = os.stat(path)
+    digest = file_digest(path)
+    df = clean_sales_data(read_sales_csv(path))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_frame(df, data_path)
+    _write_meta(meta_path, {
+        'version': CACHE_VERSION,
+        'format': CACHE_FORMAT,
+        'source': os.path.basename(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'digest': digest,
+        'rows': len(df),
+        'deltas': [],
+    })
+    # Batches appended to the previous extract are superseded by this one
+    shutil.rmtree(delta_dir_for(path), ignore_errors=True)
+    return df
@@ -0,0 +1,202 @@
+"""Pluggable data sources behind the dashboard.
+
+A source answers the dashboard's questions about a sidebar selection (a
+dict of ``start_date``, ``end_date``, ``category``, ``segment``,
+``regions`` and ``sales_range``, as taken by ``filters.apply_filters``):
+``source.bounds()`` gives the sidebar's choices and ``source.select(selection)``
+a view with the KPI summary, margin sketch, chart inputs, product tables,
+preview and export rows of that selection.  The view's chart inputs are
+named like the inputs in ``charts.DASHBOARD_CHARTS``.
+
+- ``FrameSource``: the cleaned extract in memory (the shared column store)
+  with its bitmap index, cube and product rollup.
+- ``sqlite_source.SqliteSource``: a SQLite database, queried with the
+  filters pushed down into indexed WHERE clauses and GROUP BYs, for
+  histories larger than memory.
+
+``open_steps`` lists the build steps of either source for ``warmup.Warmup``;
+the dashboard picks the SQLite source for ``.db``/``.sqlite`` paths.  Given
+the ``FrameSource`` of an earlier data version, a version that only adds
+order batches (``incremental.ingest_delta``) is built by appending the
+batches' rows to its column store, bitmaps, cube cells and product rollup.
+Batches with orders older than the last one already loaded would have to
+go inside the date-sorted frame, so they, and a changed base extract, are
+still a full rebuild.  The SQLite source reads the database as it is.
+"""
+import os
+from functools import cached_property
+
+import pandas as pd
+
+from charts import discount_disasters, sales_profit_density
+from column_store import extend_shared_data, load_shared_data
+from cube import SalesCube, discount_grid, summarize_rows
+from data_loader import base_version, data_version, delta_entries, read_delta
+from engine import default_jobs
+from filters import BitmapIndex, apply_filters
+from products import ProductRollup
+from sketches import MarginSketch
+from sqlite_source import SqliteSource, is_sqlite_path
+
+
+def source_version(path):
+    """Cheap token that changes whenever the data behind ``path`` changes."""
+    if is_sqlite_path(path):
+        stat = os.stat(path)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+    return data_version(path)
+
+
+def appended_rows(previous, path, entries):
+    """Rows of the order batches ``entries`` has beyond ``previous`` (a ``FrameSource``).
+
+    ``None`` when the data of ``path`` is not ``previous`` plus later orders:
+    a new base extract, other batches, or orders older than its last one.
+    """
+    if not isinstance(previous, FrameSource) or previous.base != base_version(path):
+        return None
+    digests = [entry['digest'] for entry in entries]
+    if len(digests) <= len(previous.deltas) or digests[:len(previous.deltas)] != previous.deltas:
+        return None
+    rows = pd.concat([read_delta(path, entry) for entry in entries[len(previous.deltas):]],
+                     ignore_index=True)
+    if set(rows.columns) != set(previous.df.columns):
+        return None
+    rows = rows[list(previous.df.columns)].sort_values('order_date', kind='stable',
+                                                       ignore_index=True)
+    if len(previous.df) and rows['order_date'].iloc[0] < previous.df['order_date'].iloc[-1]:
+        return None
+    return rows
+
+
+def open_steps(path, version, previous=None):
+    """``(name, build)`` steps that end with the data source of ``path`` as ``'source'``.
+
+    ``previous`` is the source of an earlier version of ``path``, if any;
+    new order batches are appended to it (see the module docstring).
+    """
+    if is_sqlite_path(path):
+        return [('source', lambda built: SqliteSource(path))]
+    base, entries = base_version(path), delta_entries(path)
+    deltas = [entry['digest'] for entry in entries]
+    rows = appended_rows(previous, path, entries)
+    if rows is not None:
+        return [
+            ('data', lambda built: extend_shared_data(path, previous.df, rows, version)),
+            ('source', lambda built: previous.appended(built['data'], rows, deltas)),
+        ]
+    return [
+        # Read-only frame over the memory-mapped column store, shared by every
+        # session (and its pages by every worker process)
+        ('data', lambda built: load_shared_data(path, version)),
+        # Packed bitmaps for category/segment/region
+        ('index', lambda built: BitmapIndex(built['data'])),
+        # Month x category x segment x region sums behind the KPI cards and overview charts
+        ('cube', lambda built: SalesCube(built['data'], jobs=default_jobs())),
+        # Per-product sums for every category x segment x region cell
+        ('products', lambda built: ProductRollup(built['data'])),
+        ('source', lambda built: FrameSource(built['data'], built['index'], built['cube'],
+                                             built['products'], base, deltas)),
+    ]
+
+
+class FrameSource:
+    """The cleaned frame in memory with its bitmap index, cube and product rollup.
+
+    ``base`` / ``deltas`` identify the data it holds: the ``base_version`` of
+    the extract and the digests of the order batches appended to it.
+    """
+
+    def __init__(self, df, index, cube, rollup, base=None, deltas=()):
+        self.df = df
+        self.index = index
+        self.cube = cube
+        self.rollup = rollup
+        self.base = base
+        self.deltas = list(deltas)
+        # discount_bin is the load-time code of discount_clean, not an extract column
+        self.columns = [c for c in df.columns if c != 'discount_bin']
+        self._bounds = {
+            'min_date': df['order_date'].min().date(),
+            'max_date': df['order_date'].max().date(),
+            'categories': list(df['category'].unique()),
+            'segments': list(df['segment'].unique()),
+            'regions': list(df['region'].unique()),
+            'min_sales': float(df['sales_clean'].min()),
+            'max_sales': float(df['sales_clean'].max()),
+            'rows': len(df),
+        }
+
+    def bounds(self):
+        return self._bounds
+
+    def select(self, selection):
+        return FrameView(self, selection)
+
+    def appended(self, df, rows, deltas):
+        """Source of ``df`` (this frame plus ``rows``); only ``rows`` are indexed."""
+        return FrameSource(df, self.index.appended(rows), self.cube.appended(rows),
+                           self.rollup.appended(rows), self.base, deltas)
+
+
+class FrameView:
+    """A sidebar selection of a ``FrameSource``; results are computed once, when first used."""
+
+    def __init__(self, source, selection):
+        self.source = source
+        self.selection = selection
+        # The frame is sorted by order_date: the date range is a binary-searched
+        # slice (no copy); category/segment/region resolve as bitmap AND/OR inside it
+        self.rows = apply_filters(source.df, index=source.index, **selection)
+        self.count = len(self.rows)
+        self.columns = source.columns
+        self.has_discount = 'discount_bin' in self.rows.columns
+        # Without the sales slider the cube answers from whole-month cells
+        self._cube_selection = (None if selection.get('sales_range') is not None else
+                                {k: v for k, v in selection.items() if k != 'sales_range'})
+
+    @cached_property
+    def summary(self):
+        if self._cube_selection is None:
+            return summarize_rows(self.rows)
+        return self.source.cube.summary(self.source.df, index=self.source.index,
+                                        **self._cube_selection)
+
+    @cached_property
+    def sketch(self):
+        if self._cube_selection is None:
+            return MarginSketch.from_values(self.rows['profit_margin'])
+        return self.source.cube.margin_sketch(self.source.df, index=self.source.index,
+                                              **self._cube_selection)
+
+    @cached_property
+    def density(self):
+        # Every filtered order per category, disasters as points
+        return sales_profit_density(self.rows)
+
+    @cached_property
+    def disasters(self):
+        return int(discount_disasters(self.rows).sum())
+
+    @cached_property
+    def discount(self):
+        # One bincount over the load-time discount codes
+        return discount_grid(self.rows)
+
+    def top_bottom(self):
+        """Top/bottom products; the per-cell rollup answers whole-history selections."""
+        bounds = self.source.bounds()
+        selection = self.selection
+        whole_history = (selection['start_date'] <= bounds['min_date']
+                         and selection['end_date'] >= bounds['max_date']
+                         and selection.get('sales_range') is None)
+        return self.source.rollup.top_bottom(self.rows, selection.get('category', "All"),
+                                             selection.get('segment', "All"),
+                                             selection.get('regions'), whole_history=whole_history)
+
+    def preview(self, n=50):
+        return self.rows[['order_date', 'category', 'segment', 'region', 'sales_clean',
+                          'profit_clean', 'profit_margin']].head(n)
+
+    def export_data(self, columns=None):
+        return self.rows
@@ -0,0 +1,158 @@
+"""Partitioned multi-core aggregation over shared-memory columns.
+
+``run_partitioned`` splits a cleaned frame into partitions, either
+contiguous row ranges (the frame is date-sorted, so these are time ranges)
+or by the codes of a dimension (rows with equal values land together), runs
+a reduction on every partition in a process pool and merges the partial
+results.  The reduction must be
+mergeable, e.g. ``aggregates.partial_aggregates`` with ``merge_partials`` or
+the cube's cell sums.
+
+The columns are copied once into shared memory (``SharedFrame``); workers
+attach to the blocks and wrap them in numpy views, so no rows are pickled
+and each worker only touches its own partition.  Workers are spawned rather
+than forked, which is safe from threaded hosts such as the dashboard.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Below this many rows spawning the pool costs more than it saves (~1-2 s)
+MIN_PARALLEL_ROWS = 5_000_000
+
+# More partitions than workers, so one slow partition does not hold up the rest
+PARTITIONS_PER_JOB = 2
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block, but spawned workers share
+        # the parent's resource tracker, so it is still unlinked exactly once
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrame:
+    """Columns of a frame in shared memory, described by a picklable ``spec``.
+
+    Numeric, boolean and datetime columns are stored as-is; categorical and
+    string columns as integer codes plus their categories.  Use as a context
+    manager so the blocks are released.
+    """
+
+    def __init__(self, df, columns=None):
+        self.blocks = []
+        self.spec = {'rows': len(df), 'columns': []}
+        for name in columns or df.columns:
+            values = df[name]
+            categories = None
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = list(values.cat.categories)
+                array = values.cat.codes.to_numpy()
+            elif (pd.api.types.is_numeric_dtype(values.dtype)
+                  or pd.api.types.is_datetime64_dtype(values.dtype)):
+                array = values.to_numpy()
+            else:
+                codes, uniques = pd.factorize(values)
+                categories = list(uniques)
+                array = codes
+            self.spec['columns'].append(self._share(name, np.ascontiguousarray(array), categories))
+
+    def _share(self, name, array, categories):
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.blocks.append(shm)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        return {'name': name, 'block': shm.name, 'dtype': array.dtype.str, 'categories': categories}
+
+    def close(self):
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_frame(spec, rows=None):
+    """Frame over the shared columns of ``spec``, restricted to ``rows``.
+
+    ``rows`` is a ``slice`` (a view, no copy) or an index array (a gather).
+    Returns ``(frame, blocks)``; close the blocks once the frame is no longer used.
+    """
+    blocks, columns = [], {}
+    for column in spec['columns']:
+        shm = _attach(column['block'])
+        blocks.append(shm)
+        array = np.ndarray((spec['rows'],), dtype=np.dtype(column['dtype']), buffer=shm.buf)
+        if rows is not None:
+            array = array[rows]
+        if column['categories'] is not None:
+            columns[column['name']] = pd.Categorical.from_codes(array, column['categories'])
+        else:
+            columns[column['name']] = array
+    return pd.DataFrame(columns, copy=False), blocks
+
+
+def _run_partition(spec, func, partition, n_partitions, partition_by):
+    if partition_by is None:
+        bounds = np.linspace(0, spec['rows'], n_partitions + 1).astype(int)
+        rows = slice(bounds[partition], bounds[partition + 1])
+    else:
+        key_spec = {'rows': spec['rows'],
+                    'columns': [c for c in spec['columns'] if c['name'] == partition_by]}
+        codes_frame, code_blocks = attach_frame(key_spec)
+        codes = np.asarray(codes_frame[partition_by].cat.codes)
+        rows = np.flatnonzero(codes % n_partitions == partition)
+        del codes_frame, codes
+        for shm in code_blocks:
+            shm.close()
+
+    frame, blocks = attach_frame(spec, rows)
+    try:
+        # Results must not reference the shared buffers once they are closed
+        result = func(frame)
+    finally:
+        del frame
+        for shm in blocks:
+            try:
+                shm.close()
+            except BufferError:  # a view escaped into the result; freed with the process
+                pass
+    return result
+
+
+def run_partitioned(df, func, merge, jobs=None, columns=None, partition_by=None,
+                    min_rows=MIN_PARALLEL_ROWS):
+    """``merge([func(part) for part in partitions of df])`` on a process pool.
+
+    ``func`` and ``merge`` must be module-level functions.  Partitions are
+    contiguous row ranges or, when ``partition_by`` names a dimension, the
+    rows whose code in it is congruent modulo the partition count.  Only
+    ``columns`` are shared with the workers.  Small frames and ``jobs <= 1``
+    run ``func(df)`` in this process.
+    """
+    jobs = default_jobs() if jobs is None else jobs
+    if jobs <= 1 or len(df) < min_rows:
+        return func(df)
+
+    n_partitions = jobs * PARTITIONS_PER_JOB
+    context = multiprocessing.get_context('spawn')
+    with SharedFrame(df, columns) as shared:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+            futures = [pool.submit(_run_partition, shared.spec, func, partition,
+                                   n_partitions, partition_by)
+                       for partition in range(n_partitions)]
+            return merge([future.result() for future in futures])
@@ -0,0 +1,177 @@
+"""Executive summary text, computed from the finalized report aggregates.
+
+Every figure and every named segment, category or product in the summary
+comes from ``aggregates.finalize`` output, so the same template serves the
+whole extract and any slice of it (a region, market or year): only the
+aggregates passed in differ.
+"""
+import pandas as pd
+
+from aggregates import BENCHMARK_MARGIN, DISASTER_SALES, period_label
+
+# Discount cap the recommendations propose for the weakest category
+DISCOUNT_CAP = 0.20
+
+REPORT_TEMPLATE = """
+{title} ({period})
+Generated: {generated}
+
+FINANCIAL OVERVIEW:
+- Total Revenue: ${total_sales_m:.2f} million
+- Total Profit: ${total_profit_m:.2f} million
+- Overall Margin: {overall_margin:.1f}%
+- Total Orders: {orders:,}
+- Loss-making Orders: {loss_orders:,} ({loss_pct:.1f}%)
+- Order Margin: median {margin_median:.1f}% (5th-95th percentile: {margin_p5:.1f}% to {margin_p95:.1f}%)
+
+SEGMENT PERFORMANCE:
+{segment_lines}
+
+CATEGORY PERFORMANCE:
+{category_lines}
+
+CRITICAL ISSUES:
+{issue_lines}
+
+RECOMMENDATIONS:
+{recommendation_lines}
+
+FILES GENERATED:
+{file_lines}"""
+
+
+def _performance(measures):
+    """Sales share and weighted margin (%) per row of a segment/category frame."""
+    sales = measures['sales']
+    return pd.DataFrame({
+        'share': sales / sales.sum() * 100 if sales.sum() else 0.0,
+        'margin': (measures['profit'] / sales * 100).where(sales > 0, 0.0),
+    }).sort_values('share', ascending=False)
+
+
+def _segment_lines(segments):
+    # Ranked on the values as printed, so equal figures always get equal tags
+    share, margin = segments['share'].round(0), segments['margin'].round(1)
+    ranked = margin.max() > margin.min()
+    lines = []
+    for name, row in segments.iterrows():
+        tags = []
+        if share[name] == share.max():
+            tags.append('volume leader')
+        if ranked and margin[name] == margin.max():
+            tags.append('efficiency champion')
+        elif ranked and margin[name] == margin.min():
+            tags.append('margin laggard')
+        lines.append(f"- {name}: {row['share']:.0f}% of sales, {row['margin']:.1f}% margin "
+                     f"({', '.join(tags) or 'balanced'})")
+    return lines
+
+
+def _category_lines(categories):
+    margin = categories['margin'].round(1)   # as printed, see _segment_lines
+    ranked = margin.max() > margin.min()
+    lines = []
+    for name, row in categories.iterrows():
+        if ranked and margin[name] == margin.max():
+            tag = 'STAR PERFORMER'
+        elif ranked and margin[name] == margin.min():
+            tag = 'MARGIN KILLER'
+        else:
+            tag = 'SOLID'
+        lines.append(f"- {name}: {row['share']:.0f}% of sales, {row['margin']:.1f}% margin [{tag}]")
+    return lines
+
+
+def _disaster_discount(aggs, category):
+    """Deepest discount among ``category``'s discount disasters, or ``None``."""
+    value = aggs['disaster_discount'].get(category)
+    return None if value is None or pd.isna(value) else value
+
+
+def report_context(aggs, title='SUPERSTORE SALES ANALYSIS REPORT', files=()):
+    """Template fields for ``aggs`` (the output of ``aggregates.finalize``)."""
+    totals = aggs['totals']
+    orders = totals['orders']
+    segments = _performance(aggs['segment'])
+    categories = _performance(aggs['category'])
+    worst = aggs['worst_disasters']
+
+    issues = [f"- {totals['disasters']:,} 'discount disasters' (sales over ${DISASTER_SALES:,}, "
+              f"negative profit): ${abs(totals['disaster_loss'])/1e3:,.0f}K lost"]
+    if len(worst):
+        case = worst.iloc[0]
+        issues.append(f"- Worst case: {case['discount_clean']:.0%} discount on "
+                      f"{case['category'].lower()} = {case['profit_margin']:.0f}% margin")
+    for name, row in categories[categories['margin'] < BENCHMARK_MARGIN].iterrows():
+        issues.append(f"- {name} margin {row['margin']:.1f}% is below the "
+                      f"{BENCHMARK_MARGIN}% benchmark")
+
+    recommendations = []
+    if len(categories):
+        by_margin = categories.sort_values('margin', ascending=False)
+        weakest = by_margin.index[-1]
+        deepest = _disaster_discount(aggs, weakest)
+        seen = f" (currently seeing {deepest:.0%})" if deepest is not None else ''
+        recommendations.append(f"Cap {weakest.lower()} discounts at {DISCOUNT_CAP:.0%}{seen}")
+    if len(segments):
+        best_segment = segments['margin'].idxmax()
+        recommendations.append(f"Prioritize {best_segment} segment expansion "
+                               f"({segments.loc[best_segment, 'margin']:.1f}% margin)")
+    if len(categories) > 1:
+        recommendations.append(f"Bundle high-margin {by_margin.index[1]} with {by_margin.index[0]}")
+    if len(worst):
+        recommendations.append(f"Discontinue or reprice {worst.iloc[0]['product_name']}")
+    if len(categories):
+        recommendations.append(f"Investigate {by_margin.index[0]} category for expansion")
+
+    return {
+        'title': title,
+        'period': period_label(aggs['monthly_sales']),
+        'generated': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M'),
+        'total_sales_m': totals['total_sales'] / 1e6,
+        'total_profit_m': totals['total_profit'] / 1e6,
+        'overall_margin': totals['overall_margin'],
+        'orders': orders,
+        'loss_orders': totals['loss_orders'],
+        'loss_pct': totals['loss_orders'] / orders * 100 if orders else 0.0,
+        'margin_median': aggs['margin_percentiles']['median'],
+        'margin_p5': aggs['margin_percentiles']['p5'],
+        'margin_p95': aggs['margin_percentiles']['p95'],
+        'segment_lines': '\n'.join(_segment_lines(segments)),
+        'category_lines': '\n'.join(_category_lines(categories)),
+        'issue_lines': '\n'.join(issues),
+        'recommendation_lines': '\n'.join(f"{i}. {text}"
+                                          for i, text in enumerate(recommendations, 1)),
+        'file_lines': ''.join(f"- {filename}\n" for filename in files) or "- none\n",
+    }
+
+
+def key_insights(aggs):
+    """One-line takeaways of ``aggs`` for the interactive run's console."""
+    totals = aggs['totals']
+    segments = _performance(aggs['segment'])
+    categories = _performance(aggs['category'])
+    insights = []
+    if len(categories):
+        best, worst = categories['margin'].idxmax(), categories['margin'].idxmin()
+        insights.append(f"{best} = highest margin ({categories.loc[best, 'margin']:.1f}%) "
+                        f"with {categories.loc[best, 'share']:.0f}% of sales")
+        deepest = _disaster_discount(aggs, worst)
+        seen = f" with discounts up to {deepest:.0%}" if deepest is not None else ''
+        insights.append(f"{worst} = lowest margin ({categories.loc[worst, 'margin']:.1f}%){seen}")
+    if len(segments):
+        smallest, best = segments['share'].idxmin(), segments['margin'].idxmax()
+        insights.append(f"{smallest} = smallest segment ({segments.loc[smallest, 'share']:.0f}% "
+                        f"of sales), {segments.loc[smallest, 'margin']:.1f}% margin")
+        leader = segments['share'].idxmax()
+        if leader != best:
+            insights.append(f"{leader} volume ≠ profit ({segments.loc[leader, 'margin']:.1f}% "
+                            f"vs {best} {segments.loc[best, 'margin']:.1f}%)")
+    insights.append(f"{totals['disasters']:,} discount disasters = "
+                    f"${abs(totals['disaster_loss'])/1e3:,.0f}K in preventable losses")
+    return insights
+
+
+def build_report(aggs, title='SUPERSTORE SALES ANALYSIS REPORT', files=()):
+    """Executive summary text for ``aggs``; ``files`` are listed as generated."""
+    return REPORT_TEMPLATE.format(**report_context(aggs, title, files))
@@ -0,0 +1,104 @@
+"""Chunked export of filtered sales data to CSV, gzip'd CSV or Parquet.
+
+Exports are written a fixed number of rows at a time, so the rows being
+converted never take more memory than one chunk.  The finished file itself
+is held in memory: Streamlit's ``download_button`` serves ``bytes``, not a
+stream.  The gzip'd CSV is therefore the default format; it is about a
+quarter of the plain CSV's size.  The data is a frame or an iterable of
+frames (e.g. the chunks of a SQL result,
+``sqlite_source.SqliteView.export_data``; at least one, possibly empty),
+which are written in the pieces they come in.  The dashboard only calls into
+this module when a download is actually requested.
+
+``columns=None`` exports every column; an empty list is an error rather
+than "everything".
+"""
+import gzip
+import io
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export needs pyarrow
+    pa = pq = None
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# label -> (file extension, mime type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+}
+if pq is not None:
+    EXPORT_FORMATS['Parquet'] = ('parquet', 'application/vnd.apache.parquet')
+
+# The finished file is held in memory for the download, so compress by default
+DEFAULT_EXPORT_FORMAT = 'CSV (gzip)'
+
+
+def _select(df, columns):
+    return df if columns is None else df[list(columns)]
+
+
+def _chunks(df, columns, chunk_rows):
+    if not isinstance(df, pd.DataFrame):
+        for chunk in df:
+            yield _select(chunk, columns)
+        return
+    df = _select(df, columns)
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def iter_csv_chunks(df, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """CSV text of ``df`` in pieces of at most ``chunk_rows`` rows, header first."""
+    header = True
+    for chunk in _chunks(df, columns, chunk_rows):
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+    if header:  # empty selection: still emit the header line
+        yield _select(df, columns).head(0).to_csv(index=False)
+
+
+def write_export(df, fileobj, fmt=DEFAULT_EXPORT_FORMAT, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream ``df`` into a binary file object in the given ``EXPORT_FORMATS`` format."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt!r}")
+    if columns is not None and not len(columns):
+        raise ValueError("No columns selected for export")
+
+    if fmt == 'Parquet':
+        writer = None
+        for chunk in _chunks(df, columns, chunk_rows):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(fileobj, table.schema)
+            writer.write_table(table)
+        if writer is None:
+            empty = _select(df, columns)
+            writer = pq.ParquetWriter(fileobj, pa.Table.from_pandas(empty.head(0), preserve_index=False).schema)
+        writer.close()
+        return
+
+    if fmt == 'CSV (gzip)':
+        with gzip.GzipFile(fileobj=fileobj, mode='wb') as gz:
+            with io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+                for piece in iter_csv_chunks(df, columns, chunk_rows):
+                    text.write(piece)
+        return
+
+    for piece in iter_csv_chunks(df, columns, chunk_rows):
+        fileobj.write(piece.encode('utf-8'))
+
+
+def export_file(df, fmt=DEFAULT_EXPORT_FORMAT, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """The bytes of an export, written in chunks.
+
+    Returned as ``bytes``: the type Streamlit's deferred ``download_button``
+    data accepts (it rejects open file objects other than ``BytesIO``).
+    """
+    fileobj = io.BytesIO()
+    write_export(df, fileobj, fmt, columns, chunk_rows)
+    return fileobj.getvalue()
@@ -0,0 +1,169 @@
+"""Sidebar filter evaluation for the dashboard.
+
+The cleaned frame is sorted by ``order_date`` (see ``data_loader``), so a date
+range is a contiguous block of rows that binary search finds without
+touching the rest of the data.  The remaining filters are evaluated on that
+block only, and a new frame is materialized only if they remove rows.
+
+``BitmapIndex`` holds one packed bitmap per distinct value of the
+low-cardinality dimensions, built once at load time.  With it, category,
+segment and region filters resolve as bitwise AND/OR over the bytes that
+cover the date window instead of rescanning string columns.  Rows appended
+to the frame (an ingested order batch) only pack their own bits onto the
+existing bitmaps (``BitmapIndex.appended``).
+"""
+import numpy as np
+import pandas as pd
+
+
+def row_bounds(df, start, stop):
+    """Positional bounds ``(lo, hi)`` of the rows with ``start <= order_date < stop``."""
+    dates = df['order_date'].to_numpy()
+    lo = int(dates.searchsorted(np.datetime64(pd.Timestamp(start)), side='left'))
+    hi = int(dates.searchsorted(np.datetime64(pd.Timestamp(stop)), side='left'))
+    return lo, max(lo, hi)
+
+
+def date_range_bounds(df, start_date, end_date):
+    """Positional bounds ``(lo, hi)`` of the rows whose order day is in range."""
+    # Inclusive end day: everything before the following midnight
+    return row_bounds(df, start_date, pd.Timestamp(end_date) + pd.Timedelta(days=1))
+
+
+def date_range_slice(df, start_date, end_date):
+    """Contiguous, non-copying slice of a date-sorted frame for a day range."""
+    lo, hi = date_range_bounds(df, start_date, end_date)
+    return df.iloc[lo:hi]
+
+
+# ============================================
+# BITMAP INDEX
+# ============================================
+
+INDEXED_DIMENSIONS = ('category', 'segment', 'region')
+
+
+class BitmapIndex:
+    """Packed row bitmaps per value of each indexed dimension of a frame."""
+
+    def __init__(self, df, dimensions=INDEXED_DIMENSIONS):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for dim in dimensions:
+            column = df[dim].astype('category')
+            codes = column.cat.codes.to_numpy()
+            self.bitmaps[dim] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(column.cat.categories)
+            }
+
+    def appended(self, rows):
+        """Index of the frame with ``rows`` appended; this one is left as it is.
+
+        Only the bits of ``rows`` are computed: they are packed onto the
+        last, partly used byte of each existing bitmap.
+        """
+        index = object.__new__(BitmapIndex)
+        index.n_rows = self.n_rows + len(rows)
+        index.bitmaps = {}
+        used = self.n_rows % 8   # bits of the last byte that hold rows
+        for dim, bitmaps in self.bitmaps.items():
+            column = rows[dim].astype('category')
+            codes = column.cat.codes.to_numpy()
+            added = {value: codes == code for code, value in enumerate(column.cat.categories)}
+            none = np.zeros(len(rows), dtype=bool)
+            index.bitmaps[dim] = {}
+            for value in [*bitmaps, *(v for v in added if v not in bitmaps)]:
+                old = bitmaps.get(value)
+                if old is None:
+                    old = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+                bits = added.get(value, none)
+                if used:
+                    bits = np.concatenate([np.unpackbits(old[-1:], count=used).astype(bool), bits])
+                    old = old[:-1]
+                index.bitmaps[dim][value] = np.concatenate([old, np.packbits(bits)])
+        return index
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for values in self.bitmaps.values() for b in values.values())
+
+    def _window(self, dim, value, first, last):
+        bitmap = self.bitmaps[dim].get(value)
+        if bitmap is None:
+            return np.zeros(last - first, dtype=np.uint8)
+        return bitmap[first:last]
+
+    def select(self, lo, hi, **selections):
+        """Boolean mask over rows ``lo:hi`` matching every selection.
+
+        Each keyword is a dimension mapped to one value or a list of values
+        (OR-ed together).  Returns ``None`` when there is nothing to filter.
+        """
+        selections = {dim: values for dim, values in selections.items() if values}
+        if not selections:
+            return None
+
+        # Work on whole bytes covering the window, trim to the exact rows at the end
+        first, last = lo // 8, (hi + 7) // 8
+        packed = None
+        for dim, values in selections.items():
+            if isinstance(values, str):
+                values = [values]
+            bits = self._window(dim, values[0], first, last)
+            for value in values[1:]:
+                bits = bits | self._window(dim, value, first, last)
+            packed = bits if packed is None else packed & bits
+
+        offset = lo - first * 8
+        return np.unpackbits(packed, count=offset + hi - lo)[offset:].astype(bool)
+
+
+# ============================================
+# FILTERING
+# ============================================
+
+def apply_filters(df, start_date, end_date, category="All", segment="All",
+                  regions=None, sales_range=None, index=None):
+    """Apply the sidebar filters to the date-sorted frame.
+
+    ``sales_range`` is ``(min_sales, max_sales)`` or ``None`` when the slider
+    is at its full range.  With a ``BitmapIndex`` of ``df`` the dimension
+    filters are answered from its bitmaps.
+    """
+    lo, hi = date_range_bounds(df, start_date, end_date)
+    return filter_rows(df, lo, hi, category, segment, regions, sales_range, index)
+
+
+def filter_rows(df, lo, hi, category="All", segment="All", regions=None,
+                sales_range=None, index=None):
+    """Apply the non-date filters to rows ``lo:hi`` of ``df``."""
+    window = df.iloc[lo:hi]
+
+    mask = None
+    def narrow(condition):
+        nonlocal mask
+        condition = np.asarray(condition)
+        mask = condition if mask is None else mask & condition
+
+    if index is not None:
+        selected = index.select(lo, hi,
+                                category=None if category == "All" else category,
+                                segment=None if segment == "All" else segment,
+                                region=regions)
+        if selected is not None:
+            narrow(selected)
+    else:
+        if category != "All":
+            narrow(window['category'] == category)
+        if segment != "All":
+            narrow(window['segment'] == segment)
+        if regions:
+            narrow(window['region'].isin(regions))
+    if sales_range is not None:
+        sales = window['sales_clean']
+        narrow((sales >= sales_range[0]) & (sales <= sales_range[1]))
+
+    if mask is None:
+        return window
+    return window[mask]
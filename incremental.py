@@ -0,0 +1,105 @@
+"""Incremental ingest of new order batches (e.g. the daily order files).
+
+``ingest_delta`` validates and cleans only the rows of the batch, appends
+them to the dashboard's on-disk data cache as a separate part and stores the
+batch's mergeable report aggregates (whole batch and per region x market x
+year cell) next to it.  Nothing about the existing
+history is re-read: the report merges the batch partials into the cached
+aggregates of the base extract (see ``app.py``), and the dashboard picks the
+new part up on its next rerun (``data_loader.data_version``) and appends its
+rows to the structures it already has (``data_sources.open_steps``).
+"""
+import os
+import pickle
+
+from aggregates import partial_aggregates, partials_by_cell, slice_keys
+from data_loader import (DASHBOARD_COLUMNS, SLICE_COLUMNS, _write_atomic, append_delta,
+                         cache_is_fresh, clean_sales_data, delta_dir_for, delta_entries,
+                         file_digest, load_clean_data, read_sales_csv)
+from date_parsing import parse_dates_with_report
+
+# Columns a batch must have; discount is optional like in read_sales_csv
+REQUIRED_COLUMNS = ['order_date', 'category', 'segment', 'region', 'product_name',
+                    'sales', 'profit']
+
+def validate_delta(raw):
+    """Raise ``ValueError`` describing every problem with a raw order batch."""
+    problems = []
+    missing = [c for c in REQUIRED_COLUMNS if c not in raw.columns]
+    if missing:
+        problems.append(f"missing columns: {', '.join(missing)}")
+
+    present = [c for c in REQUIRED_COLUMNS if c in raw.columns]
+    nulls = raw[present].isnull().sum()
+    for column, count in nulls[nulls > 0].items():
+        problems.append(f"{count} rows without {column}")
+
+    if 'order_date' in raw.columns:
+        _, report = parse_dates_with_report(raw['order_date'].dropna())
+        if len(report['unparsed_rows']):
+            problems.append(f"{len(report['unparsed_rows'])} unparseable order dates "
+                            f"(e.g. {list(report['unparsed_values'][:3])})")
+    if 'sales' in raw.columns and (raw['sales'] < 0).any():
+        problems.append(f"{int((raw['sales'] < 0).sum())} rows with negative sales")
+
+    if problems:
+        raise ValueError("Invalid order batch: " + "; ".join(problems))
+
+
+def _partials_path(data_path, digest, kind='partials'):
+    return os.path.join(delta_dir_for(data_path), f'{digest}.{kind}.pkl')
+
+
+def _dump(path, obj):
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _write_atomic(path, write)
+
+
+def load_delta_partials(data_path, entry):
+    """Report partials stored for one ingested batch (an entry of ``delta_entries``)."""
+    with open(_partials_path(data_path, entry['digest']), 'rb') as f:
+        return pickle.load(f)
+
+
+def load_delta_cells(data_path, entry):
+    """Per-cell partials of one ingested batch, or ``None`` for batches ingested
+    before they were stored."""
+    path = _partials_path(data_path, entry['digest'], 'cells')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def ingest_delta(delta_path, data_path='sales_data.csv'):
+    """Append the order batch at ``delta_path`` to the data of ``data_path``.
+
+    Returns the batch's cache entry, and ``None`` if this exact file was
+    already ingested.  Cost is proportional to the batch, apart from the
+    one-off build of the base cache if it does not exist yet.
+    """
+    if not cache_is_fresh(data_path):
+        load_clean_data(data_path)  # batches are appended to the cached base extract
+
+    digest = file_digest(delta_path)
+    if any(entry['digest'] == digest for entry in delta_entries(data_path)):
+        return None
+
+    raw = read_sales_csv(delta_path, columns=SLICE_COLUMNS)
+    validate_delta(raw)
+    zero_sales = raw['sales'] == 0
+    df = clean_sales_data(raw)
+
+    # Partials first: the batch only becomes visible once its entry is recorded
+    os.makedirs(delta_dir_for(data_path), exist_ok=True)
+    _dump(_partials_path(data_path, digest),
+          partial_aggregates(df, rows_read=len(raw), zero_sales=int(zero_sales.sum())))
+    _dump(_partials_path(data_path, digest, 'cells'),
+          partials_by_cell(df, zero_sales_keys=slice_keys(raw[zero_sales])))
+
+    # The dashboard cache only keeps its own columns
+    extra = [c for c in SLICE_COLUMNS if c not in DASHBOARD_COLUMNS and c in df]
+    return append_delta(data_path, df.drop(columns=extra), digest,
+                        source=os.path.basename(delta_path), rows_read=len(raw))
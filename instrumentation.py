@@ -0,0 +1,123 @@
+"""Per-section wall time, row counts and peak memory of a dashboard rerun.
+
+The dashboard marks where each of its sections starts
+(``profiler.section('kpis')``); a section runs until the next one starts or
+the rerun ``finish``es.  For every section the profiler records wall time,
+the rows it processed and the peak of traced memory above the level at its
+start (``tracemalloc``, which also sees numpy/pandas buffers).  Records are
+shown in the dashboard's performance panel and/or written as one JSON object
+per line to the ``dashboard.perf`` logger.
+
+An inactive profiler (panel off, logger silent) does nothing beyond one
+attribute check per call, and tracemalloc is only running while an active
+rerun is being profiled.  Memory figures are process-wide, so reruns of
+other sessions running at the same time are included in them.
+"""
+import json
+import logging
+import sys
+import time
+import tracemalloc
+import uuid
+
+logger = logging.getLogger('dashboard.perf')
+
+
+def configure_json_log(stream=None):
+    """Send the profiler's JSON lines to ``stream`` (stderr) as bare messages."""
+    if not any(getattr(h, '_perf_json', False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._perf_json = True
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _emit(record):
+    logger.info(json.dumps(record, default=str))
+
+
+def log_event(record):
+    """Write ``record`` as a JSON line if the ``dashboard.perf`` logger is on."""
+    if logger.isEnabledFor(logging.INFO):
+        _emit(record)
+
+
+class SectionProfiler:
+    """Sequential section timer for one rerun; see the module docstring."""
+
+    def __init__(self, show=False, log=None):
+        self.log = logger.isEnabledFor(logging.INFO) if log is None else log
+        self.active = show or self.log
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.records = []
+        self._current = None
+        self._started_tracing = False
+        if self.active:
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            self._rerun_start = time.perf_counter()
+
+    def section(self, name, rows=None):
+        """End the current section and start ``name``."""
+        if not self.active:
+            return
+        self._close()
+        tracemalloc.reset_peak()
+        self._current = {'section': name, 'rows': rows,
+                         'mem_start': tracemalloc.get_traced_memory()[0],
+                         'start': time.perf_counter()}
+
+    def rows(self, n):
+        """Rows processed by the current section."""
+        if self.active and self._current is not None:
+            self._current['rows'] = int(n)
+
+    def _close(self):
+        current = self._current
+        if current is None:
+            return
+        seconds = time.perf_counter() - current['start']
+        peak = tracemalloc.get_traced_memory()[1]
+        record = {'event': 'dashboard_section', 'rerun': self.rerun_id,
+                  'section': current['section'], 'wall_ms': round(seconds * 1000, 2),
+                  'rows': current['rows'],
+                  'peak_mem_mb': round(max(peak - current['mem_start'], 0) / 2**20, 2)}
+        self.records.append(record)
+        self._current = None
+        if self.log:
+            _emit(record)
+
+    def finish(self):
+        """End the last section and the rerun; returns the section records."""
+        if not self.active:
+            return self.records
+        self._close()
+        peak = max((r['peak_mem_mb'] for r in self.records), default=0.0)
+        total = {'event': 'dashboard_rerun', 'rerun': self.rerun_id,
+                 'wall_ms': round((time.perf_counter() - self._rerun_start) * 1000, 2),
+                 'sections': len(self.records), 'peak_mem_mb': peak}
+        if self.log:
+            _emit(total)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.active = False
+        return self.records
+
+    def wrap(self, name, func, rows=None):
+        """``func`` logged as its own record when called, e.g. a deferred download."""
+        if not self.log:
+            return func
+        rerun_id = self.rerun_id
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            _emit({'event': 'dashboard_call', 'rerun': rerun_id, 'section': name,
+                   'wall_ms': round((time.perf_counter() - start) * 1000, 2),
+                   'rows': rows})
+            return result
+        return timed
@@ -0,0 +1,157 @@
+"""Stage cache for the batch report pipeline (app.py).
+
+Every stage output is pickled under ``.cache/pipeline/`` and keyed by a hash
+of its inputs: the upstream stage's key (or the source file's content hash)
+plus a fingerprint of the code that produces it.  A stage whose key is
+already on disk is loaded instead of run, and a stage whose output is not
+needed downstream is not touched at all.
+
+Rendered charts are tracked per file in a small manifest, keyed by the
+chart's input data and its drawing code, so changing one chart re-renders
+only that chart.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+import types
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CACHE_DIR_NAME, _write_atomic
+
+PIPELINE_DIR_NAME = 'pipeline'
+RENDER_MANIFEST = 'render.json'
+
+
+def stage_key(*parts):
+    """Hash of the parts' reprs (strings, numbers, other keys)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _update_digest(digest, obj):
+    # Pickle bytes of pandas objects depend on internal layout, so hash content
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        digest.update(repr((type(obj).__name__, obj.shape, list(obj.index.names),
+                            [str(t) for t in np.atleast_1d(obj.dtypes)])).encode('utf-8'))
+        if isinstance(obj, pd.DataFrame):
+            digest.update(repr(list(obj.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.dtype.str, obj.shape)).encode('utf-8'))
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=repr):
+            digest.update(repr(key).encode('utf-8'))
+            _update_digest(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f'{type(obj).__name__}{len(obj)}'.encode('utf-8'))
+        for item in obj:
+            _update_digest(digest, item)
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+    digest.update(b'\0')
+
+
+def data_key(obj):
+    """Content hash of a chart's inputs (series, frames, arrays and plain values)."""
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, obj)
+    return digest.hexdigest()
+
+
+def _fingerprint_parts(func, seen):
+    if func in seen:
+        return
+    seen.add(func)
+    yield inspect.getsource(func)
+    module = func.__module__
+    for name in func.__code__.co_names:
+        value = func.__globals__.get(name)
+        if isinstance(value, types.FunctionType) and value.__module__ == module:
+            yield from _fingerprint_parts(value, seen)
+        elif isinstance(value, (dict, list, tuple, str, int, float)):
+            yield f'{name}={value!r}'
+
+
+def code_fingerprint(*funcs):
+    """Hash of the functions' source, following same-module helpers and constants."""
+    seen = set()
+    return stage_key(*(part for func in funcs for part in _fingerprint_parts(func, seen)))
+
+
+class StageCache:
+    """Pickled stage outputs under ``<root>/.cache/pipeline``, one key per stage."""
+
+    def __init__(self, root='.', enabled=True):
+        self.dir = os.path.join(root, CACHE_DIR_NAME, PIPELINE_DIR_NAME)
+        self.enabled = enabled
+        self.timings = []   # (stage, seconds, 'hit' | 'run')
+        if enabled:
+            os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.dir, f'{stage}-{key}.pkl')
+
+    def _prune(self, stage, keep):
+        for name in os.listdir(self.dir):
+            if name.startswith(f'{stage}-') and name != os.path.basename(keep):
+                os.remove(os.path.join(self.dir, name))
+
+    def run(self, stage, key, compute):
+        """Return the cached output of ``stage`` for ``key``, computing it on a miss."""
+        start = time.perf_counter()
+        path = self._path(stage, key)
+        if self.enabled and os.path.exists(path):
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            self.timings.append((stage, time.perf_counter() - start, 'hit'))
+            return value
+
+        value = compute()
+        if self.enabled:
+            def write(tmp_path):
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            _write_atomic(path, write)
+            self._prune(stage, path)
+        self.timings.append((stage, time.perf_counter() - start, 'run'))
+        return value
+
+    @contextmanager
+    def timed(self, stage):
+        """Record the wall time of an uncached stage (render, report)."""
+        start = time.perf_counter()
+        yield
+        self.timings.append((stage, time.perf_counter() - start, 'run'))
+
+    # Render manifest: output file -> key it was rendered from
+
+    def _manifest_path(self):
+        return os.path.join(self.dir, RENDER_MANIFEST)
+
+    def render_manifest(self):
+        if not self.enabled:
+            return {}
+        try:
+            with open(self._manifest_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_render_manifest(self, manifest):
+        if not self.enabled:
+            return
+
+        def write(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+        _write_atomic(self._manifest_path(), write)
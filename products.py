@@ -0,0 +1,155 @@
+"""Product-level rollup behind the dashboard's top/bottom product tables.
+
+Rankings are by product (total profit over all its order lines), not by
+individual order line.  ``ProductRollup`` is built once at load time and
+holds per-product partial sums for every category x segment x region cell,
+stored cell by cell so a selection of cells is a handful of contiguous
+slices.  Totals for a selection are one ``bincount`` over those slices, and
+top/bottom-K come from ``argpartition`` rather than a full sort.  The
+whole-history lists for every category/segment combination are precomputed.
+An ingested order batch is rolled up on its own and merged into the partial
+sums (``ProductRollup.appended``).
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+TOP_K = 10
+
+CELL_DIMENSIONS = ['category', 'segment', 'region']
+
+
+def product_totals(codes, profit, sales, n_products, orders=None):
+    """Per-product profit/sales/order totals from parallel arrays of product codes.
+
+    ``orders`` are per-entry order counts when the arrays are already partial
+    sums; without it every entry is one order line.
+    """
+    counts = np.bincount(codes, weights=orders, minlength=n_products)
+    return pd.DataFrame({
+        'profit': np.bincount(codes, weights=profit, minlength=n_products),
+        'sales': np.bincount(codes, weights=sales, minlength=n_products),
+        'orders': counts.astype('int64'),
+    })
+
+
+def _product_partials(df, codes):
+    """Profit/sales/order sums per cell and product code, sorted by cell."""
+    keys = [df[dim] for dim in CELL_DIMENSIONS] + [codes.rename('product')]
+    return (pd.DataFrame({'profit': df['profit_clean'], 'sales': df['sales_clean']})
+            .groupby(keys, observed=True)
+            .agg(profit=('profit', 'sum'), sales=('sales', 'sum'), orders=('profit', 'size'))
+            .reset_index())
+
+
+def top_bottom(totals, products, k=TOP_K):
+    """The ``k`` most and least profitable products of a totals frame."""
+    totals = totals[totals['orders'] > 0]
+    profit = totals['profit'].to_numpy()
+    k = min(k, len(totals))
+    if k == 0:
+        empty = pd.DataFrame(columns=['product_name', 'profit', 'sales', 'orders', 'margin'])
+        return empty, empty
+
+    def pick(order):
+        picked = totals.iloc[order].copy()
+        picked.insert(0, 'product_name', products[picked.index])
+        picked['margin'] = picked['profit'] / picked['sales'] * 100
+        return picked.reset_index(drop=True)
+
+    top = np.argpartition(-profit, k - 1)[:k]
+    bottom = np.argpartition(profit, k - 1)[:k]
+    top = top[np.argsort(-profit[top], kind='stable')]
+    bottom = bottom[np.argsort(profit[bottom], kind='stable')]
+    return pick(top), pick(bottom)
+
+
+class ProductRollup:
+    """Per-cell product partial sums with precomputed whole-history top-K lists."""
+
+    def __init__(self, df, k=TOP_K):
+        product = df['product_name'].astype('category')
+        self._set_partials(np.asarray(product.cat.categories, dtype=object),
+                           _product_partials(df, product.cat.codes), k)
+
+    def appended(self, rows):
+        """Rollup of the frame with ``rows`` appended; this one is left as it is.
+
+        Only ``rows`` are rolled up; products new in ``rows`` get new codes.
+        """
+        names = pd.Index(pd.unique(rows['product_name'].astype(str)))
+        products = np.concatenate([self.products,
+                                   np.asarray(names.difference(self.products, sort=False),
+                                              dtype=object)])
+        codes = pd.Series(pd.Categorical(rows['product_name'].astype(object),
+                                         categories=products).codes, index=rows.index)
+        lengths = self.cell_bounds[:, 1] - self.cell_bounds[:, 0]
+        existing = self.cells.loc[self.cells.index.repeat(lengths)].reset_index(drop=True)
+        existing['product'] = self.product_codes
+        existing['profit'] = self.profit
+        existing['sales'] = self.sales
+        existing['orders'] = self.orders
+        partials = (pd.concat([existing, _product_partials(rows, codes)], ignore_index=True)
+                    .groupby(CELL_DIMENSIONS + ['product'], observed=True)
+                    [['profit', 'sales', 'orders']].sum()
+                    .reset_index())
+        rollup = object.__new__(ProductRollup)
+        rollup._set_partials(products, partials, self.k)
+        return rollup
+
+    def _set_partials(self, products, partials, k):
+        self.k = k
+        self.products = products
+        self.n_products = len(products)
+        self.product_codes = partials['product'].to_numpy()
+        self.profit = partials['profit'].to_numpy()
+        self.sales = partials['sales'].to_numpy()
+        self.orders = partials['orders'].to_numpy()
+
+        cell_keys = partials[CELL_DIMENSIONS]
+        keys_array = cell_keys.to_numpy()
+        starts = np.flatnonzero(np.r_[True, (keys_array[1:] != keys_array[:-1]).any(axis=1)])
+        self.cells = cell_keys.iloc[starts].reset_index(drop=True)
+        self.cell_bounds = np.c_[starts, np.r_[starts[1:], len(partials)]]
+
+        # Whole-history lists for every category/segment combination
+        categories = ["All"] + sorted(self.cells['category'].astype(str).unique())
+        segments = ["All"] + sorted(self.cells['segment'].astype(str).unique())
+        self.precomputed = {
+            (category, segment): top_bottom(self._cell_totals(category, segment, None),
+                                            self.products, k)
+            for category, segment in itertools.product(categories, segments)
+        }
+
+    def _cell_totals(self, category, segment, regions):
+        mask = np.ones(len(self.cells), dtype=bool)
+        if category != "All":
+            mask &= (self.cells['category'] == category).to_numpy()
+        if segment != "All":
+            mask &= (self.cells['segment'] == segment).to_numpy()
+        if regions:
+            mask &= self.cells['region'].isin(regions).to_numpy()
+
+        rows = np.concatenate([np.arange(lo, hi) for lo, hi in self.cell_bounds[mask]] or
+                              [np.empty(0, dtype=np.intp)])
+        return product_totals(self.product_codes[rows], self.profit[rows], self.sales[rows],
+                              self.n_products, orders=self.orders[rows])
+
+    def top_bottom(self, filtered_df, category="All", segment="All", regions=None,
+                   whole_history=False):
+        """Top/bottom-K products of a selection.
+
+        With ``whole_history`` (full date range, sales slider at default) the
+        answer comes from the per-cell partials; otherwise the rows of
+        ``filtered_df`` are rolled up directly.
+        """
+        if whole_history:
+            if not regions and (category, segment) in self.precomputed:
+                return self.precomputed[(category, segment)]
+            return top_bottom(self._cell_totals(category, segment, regions), self.products, self.k)
+
+        codes = pd.Categorical(filtered_df['product_name'], categories=self.products).codes
+        totals = product_totals(codes, filtered_df['profit_clean'].to_numpy(),
+                                filtered_df['sales_clean'].to_numpy(), self.n_products)
+        return top_bottom(totals, self.products, self.k)
@@ -0,0 +1,253 @@
+"""Single-pass data profile of the sales extract (``python app.py --profile``).
+
+``partial_profile`` reduces a raw frame (``read_sales_csv``) or one chunk of
+it to everything the old interactive diagnostics printed from separate
+scans (``info()``, ``describe()``, ``isnull().sum()``, the distinct
+regions/markets/segments/categories) plus the data-quality counts the report
+relies on: $0 sales, negative profits and the order margin extremes.  Each
+column is reduced once per chunk:
+
+- dimensions: value counts (from the categorical codes), so distinct values
+  and their number come for free;
+- numbers: count, sum, sum of squared deviations, minimum, maximum, zeros
+  and negatives, merged with the pairwise mean/variance update;
+- dates: parsed minimum and maximum and the count of unparseable strings.
+
+Like ``aggregates``, the partials are bounded by the number of distinct
+dimension values, not by rows, and merge exactly with ``merge_profiles``,
+so ``profile_csv`` profiles an extract of any size one chunk at a time.
+Quartiles are not exact in one bounded pass; the order margin percentiles
+come from the same fixed-grid sketch the dashboard uses (±1pp).
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DEFAULT_CHUNK_ROWS
+from data_loader import REPORT_COLUMNS, read_sales_csv
+from date_parsing import parse_dates_with_report
+from sketches import KPI_PERCENTILES, MarginSketch
+
+PROFILE_FILE = 'data_profile.json'
+
+# The report's columns plus the ones it does not read but whose quality is checked
+PROFILE_COLUMNS = REPORT_COLUMNS + ['ship_date', 'country']
+
+DATE_COLUMNS = ['order_date', 'ship_date']
+
+# Dimensions whose distinct values are listed in the summary (the rest only counted)
+LISTED_DIMENSIONS = {'region': 'Regions', 'market': 'Markets', 'segment': 'Segments',
+                     'category': 'Categories'}
+
+
+def _number_partial(values):
+    values = values[~np.isnan(values)]
+    count = len(values)
+    mean = values.mean() if count else 0.0
+    return {
+        'count': count,
+        'sum': float(values.sum()),
+        'm2': float(((values - mean) ** 2).sum()),
+        'min': float(values.min()) if count else np.inf,
+        'max': float(values.max()) if count else -np.inf,
+        'zeros': int((values == 0).sum()),
+        'negatives': int((values < 0).sum()),
+    }
+
+
+def _merge_numbers(a, b):
+    count = a['count'] + b['count']
+    if not count:
+        return a
+    # Chan et al.: M2 of the union from the two means and counts
+    delta = b['sum'] / max(b['count'], 1) - a['sum'] / max(a['count'], 1)
+    return {
+        'count': count,
+        'sum': a['sum'] + b['sum'],
+        'm2': a['m2'] + b['m2'] + delta ** 2 * a['count'] * b['count'] / count,
+        'min': min(a['min'], b['min']),
+        'max': max(a['max'], b['max']),
+        'zeros': a['zeros'] + b['zeros'],
+        'negatives': a['negatives'] + b['negatives'],
+    }
+
+
+def partial_profile(raw):
+    """Mergeable profile of a raw frame from ``read_sales_csv`` (or a chunk of one)."""
+    columns = {}
+    for name in raw.columns:
+        column = raw[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(column.cat.categories))
+            values = pd.Series(counts, index=column.cat.categories.astype(str))
+            columns[name] = {'kind': 'dimension', 'nulls': int((codes < 0).sum()),
+                             'values': values[values > 0]}
+        elif name in DATE_COLUMNS:
+            dates, report = parse_dates_with_report(column)
+            nulls = int(column.isna().sum())
+            columns[name] = {'kind': 'date', 'nulls': nulls,
+                             'unparsed': int(dates.isna().sum()) - nulls,
+                             'min': dates.min(), 'max': dates.max()}
+        else:
+            values = column.to_numpy(dtype='float64', na_value=np.nan)
+            columns[name] = {'kind': 'number', 'nulls': int(np.isnan(values).sum()),
+                             **_number_partial(values)}
+
+    part = {'rows': len(raw), 'columns': columns}
+    if 'sales' in raw and 'profit' in raw:
+        sales = raw['sales'].to_numpy(dtype='float64', na_value=np.nan)
+        profit = raw['profit'].to_numpy(dtype='float64', na_value=np.nan)
+        # Order margins of the rows the cleaning keeps (sales above $0)
+        kept = sales > 0
+        margin = profit[kept] / sales[kept] * 100
+        part['margin'] = MarginSketch.from_values(margin[~np.isnan(margin)])
+        part['negative_margin'] = int((margin < 0).sum())
+    return part
+
+
+def merge_profiles(parts):
+    """Combine profiles of disjoint chunks into the profile of all of them."""
+    parts = list(parts)
+    merged = {'rows': sum(p['rows'] for p in parts), 'columns': {}}
+    for name, first in parts[0]['columns'].items():
+        entries = [p['columns'][name] for p in parts]
+        entry = {'kind': first['kind'], 'nulls': sum(e['nulls'] for e in entries)}
+        if first['kind'] == 'dimension':
+            values = pd.concat([e['values'] for e in entries])
+            entry['values'] = values.groupby(level=0, sort=False).sum()
+        elif first['kind'] == 'date':
+            entry['unparsed'] = sum(e['unparsed'] for e in entries)
+            entry['min'] = min((e['min'] for e in entries if pd.notna(e['min'])), default=pd.NaT)
+            entry['max'] = max((e['max'] for e in entries if pd.notna(e['max'])), default=pd.NaT)
+        else:
+            numbers = entries[0]
+            for e in entries[1:]:
+                numbers = _merge_numbers(numbers, e)
+            entry.update({k: v for k, v in numbers.items() if k not in entry})
+        merged['columns'][name] = entry
+    if 'margin' in parts[0]:
+        merged['margin'] = sum((p['margin'] for p in parts), MarginSketch())
+        merged['negative_margin'] = sum(p['negative_margin'] for p in parts)
+    return merged
+
+
+def profile_csv(path, chunk_rows=DEFAULT_CHUNK_ROWS, columns=PROFILE_COLUMNS):
+    """Profile (``finalize_profile``) of a sales CSV, read ``chunk_rows`` rows at a time."""
+    merged = None
+    for raw in read_sales_csv(path, columns=columns, chunksize=chunk_rows):
+        part = partial_profile(raw)
+        merged = part if merged is None else merge_profiles([merged, part])
+    if merged is None:
+        raise ValueError(f"No rows in {path}")
+    profile = finalize_profile(merged)
+    profile['source'] = {'path': os.path.abspath(path), 'bytes': os.path.getsize(path)}
+    return profile
+
+
+def _plain(value):
+    """JSON-friendly number: ``None`` for NaN/inf, int for whole counts."""
+    if value is None or not np.isfinite(value):
+        return None
+    return int(value) if float(value).is_integer() and abs(value) < 2 ** 53 else float(value)
+
+
+def finalize_profile(partial):
+    """JSON-ready profile from a (merged) partial profile."""
+    rows = partial['rows']
+    columns = {}
+    for name, entry in partial['columns'].items():
+        out = {'kind': entry['kind'], 'nulls': entry['nulls'], 'non_null': rows - entry['nulls']}
+        if entry['kind'] == 'dimension':
+            values = entry['values'].sort_values(ascending=False, kind='stable')
+            out['distinct'] = len(values)
+            if name in LISTED_DIMENSIONS:
+                out['values'] = {k: int(v) for k, v in values.items()}
+            else:
+                out['top'] = {k: int(v) for k, v in values.head(10).items()}
+        elif entry['kind'] == 'date':
+            out['unparsed'] = entry['unparsed']
+            out['min'] = None if pd.isna(entry['min']) else entry['min'].date().isoformat()
+            out['max'] = None if pd.isna(entry['max']) else entry['max'].date().isoformat()
+        else:
+            count = entry['count']
+            out.update({
+                'mean': _plain(entry['sum'] / count) if count else None,
+                'std': _plain(np.sqrt(entry['m2'] / (count - 1))) if count > 1 else None,
+                'min': _plain(entry['min']),
+                'max': _plain(entry['max']),
+                'sum': _plain(entry['sum']),
+                'zeros': entry['zeros'],
+                'negatives': entry['negatives'],
+            })
+        columns[name] = out
+
+    checks = {}
+    if 'sales' in columns:
+        checks['zero_sales'] = columns['sales']['zeros']
+    if 'profit' in columns:
+        checks['negative_profit'] = columns['profit']['negatives']
+    if 'margin' in partial:
+        sketch = partial['margin']
+        checks['order_margin'] = {
+            'count': sketch.count,
+            'min': _plain(sketch.low),
+            'max': _plain(sketch.high),
+            'mean': _plain(sketch.mean) if sketch.count else None,
+            'negative': partial['negative_margin'],
+            **{name: _plain(value) for name, value in
+               sketch.percentiles({'p5': 5, 'p25': 25, **KPI_PERCENTILES, 'p75': 75}).items()},
+        }
+    return {'rows': rows, 'columns': columns, 'checks': checks}
+
+
+def write_profile(profile, out_dir):
+    """Write ``profile`` as ``PROFILE_FILE`` under ``out_dir``; returns the path."""
+    path = os.path.join(out_dir, PROFILE_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f, indent=2)
+    return path
+
+
+def _number(value, fmt):
+    return '-' if value is None else format(value, fmt)
+
+
+def format_profile(profile):
+    """Readable summary of a profile (what the interactive run prints)."""
+    lines = [f"Rows: {profile['rows']:,}"]
+    if 'source' in profile:
+        lines[0] += f"  ({profile['source']['bytes'] / 1e6:.1f} MB on disk)"
+
+    lines += ["", f"{'column':<14} {'kind':<10} {'non-null':>12} {'nulls':>8}  summary"]
+    for name, column in profile['columns'].items():
+        if column['kind'] == 'dimension':
+            summary = f"{column['distinct']:,} distinct"
+        elif column['kind'] == 'date':
+            summary = f"{column['min']} to {column['max']}, {column['unparsed']} unparsed"
+        else:
+            summary = (f"mean {_number(column['mean'], ',.2f')}, std {_number(column['std'], ',.2f')}, "
+                       f"min {_number(column['min'], ',.2f')}, max {_number(column['max'], ',.2f')}")
+        lines.append(f"{name:<14} {column['kind']:<10} {column['non_null']:>12,} "
+                     f"{column['nulls']:>8,}  {summary}")
+
+    for name, label in LISTED_DIMENSIONS.items():
+        column = profile['columns'].get(name)
+        if column is not None:
+            lines += ["", f"{label} ({column['distinct']}): {', '.join(column['values'])}"]
+
+    checks = profile['checks']
+    lines.append("")
+    if 'zero_sales' in checks:
+        lines.append(f"Orders with $0 sales: {checks['zero_sales']:,}")
+    if 'negative_profit' in checks:
+        lines.append(f"Negative profits (losses): {checks['negative_profit']:,} orders")
+    margin = checks.get('order_margin')
+    if margin is not None:
+        lines.append(f"Order margin: {_number(margin['min'], '.1f')}% to "
+                     f"{_number(margin['max'], '.1f')}%, {margin['negative']:,} negative")
+        lines.append("Order margin percentiles (±1pp): " + ", ".join(
+            f"{name} {_number(margin[name], '.1f')}%" for name in ['p5', 'p25', 'median', 'p75', 'p95']))
+    return "\n".join(lines)
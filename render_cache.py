@@ -0,0 +1,92 @@
+"""Bounded in-memory cache of rendered dashboard charts.
+
+Every chart is a pure function of the sidebar filter state, so its rendered
+PNG can be reused whenever the same (or a previously visited) selection
+comes back.  Entries are keyed by a canonical hash of the filter state plus
+the chart id and evicted least-recently-used once the cache exceeds its
+byte budget.  Figures are always closed after rendering so they never pile
+up in the worker.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Same savefig defaults st.pyplot uses, so cached charts look identical
+SAVEFIG_KWARGS = {'format': 'png', 'dpi': 200, 'bbox_inches': 'tight'}
+
+
+def state_key(chart_id, state):
+    """Canonical hash of ``chart_id`` plus a JSON-able filter state dict."""
+    payload = json.dumps([chart_id, state], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def render_png(fig, **savefig_kwargs):
+    """Render ``fig`` to PNG bytes and close it."""
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, **{**SAVEFIG_KWARGS, **savefig_kwargs})
+    finally:
+        plt.close(fig)
+    return buf.getvalue()
+
+
+class FigureCache:
+    """Thread-safe LRU of rendered chart bytes with a memory cap."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_render(self, chart_id, state, draw):
+        """PNG bytes for ``chart_id`` at ``state``; ``draw()`` returns a figure on a miss."""
+        key = state_key(chart_id, state)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+
+        # Render outside the lock so other sessions are not blocked
+        image = render_png(draw())
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = image
+                self.nbytes += len(image)
+            while self.nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= len(evicted)
+                self.evictions += 1
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,109 @@
+"""Mergeable fixed-bin histogram sketch of the profit margin distribution.
+
+Margins are counted on one fixed grid (``MARGIN_BIN_WIDTH`` percentage
+points from ``MARGIN_RANGE[0]`` to ``MARGIN_RANGE[1]``, plus an underflow
+and an overflow bin), so the sketches of any set of rows or cube cells merge
+by adding their counts, together with the exact count, sum, minimum and
+maximum.  A merged sketch gives the histogram, the exact mean and
+percentiles without touching the rows again.
+
+Error bounds: the mean, minimum and maximum are exact.  A percentile is
+interpolated linearly inside the bin that contains it, so when that bin is
+inside ``MARGIN_RANGE`` it is off by less than one bin width (1 percentage
+point).  Percentiles that fall in the underflow/overflow bins are only
+bounded by the sketch's minimum/maximum; with the default range that needs
+more than 5% of the selected orders below -200% or above +100% margin.
+"""
+import numpy as np
+
+MARGIN_BIN_WIDTH = 1.0
+MARGIN_RANGE = (-200.0, 100.0)
+
+MARGIN_EDGES = np.arange(MARGIN_RANGE[0], MARGIN_RANGE[1] + MARGIN_BIN_WIDTH / 2,
+                         MARGIN_BIN_WIDTH)
+N_MARGIN_BINS = len(MARGIN_EDGES) + 1   # inner bins plus underflow and overflow
+
+# Percentiles shown by the dashboard
+KPI_PERCENTILES = {'p5': 5, 'median': 50, 'p95': 95}
+
+
+def margin_bins(values):
+    """Sketch bin of every margin: 0 underflow, 1.. inner bins, last overflow."""
+    return np.searchsorted(MARGIN_EDGES, np.asarray(values, dtype='float64'), side='right')
+
+
+class MarginSketch:
+    """Counts on the fixed margin grid plus exact count, sum, min and max."""
+
+    def __init__(self, counts=None, total=0.0, low=np.inf, high=-np.inf):
+        self.counts = (np.zeros(N_MARGIN_BINS, dtype='int64') if counts is None
+                       else np.asarray(counts, dtype='int64'))
+        self.total = float(total)
+        self.low = float(low)
+        self.high = float(high)
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype='float64')
+        if not len(values):
+            return cls()
+        counts = np.bincount(margin_bins(values), minlength=N_MARGIN_BINS)
+        return cls(counts, values.sum(), values.min(), values.max())
+
+    def __add__(self, other):
+        return MarginSketch(self.counts + other.counts, self.total + other.total,
+                            min(self.low, other.low), max(self.high, other.high))
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float('nan')
+
+    def _bin_bounds(self):
+        """Lower/upper value bound of every bin, tightened to the min/max."""
+        lower = np.concatenate([[self.low], MARGIN_EDGES])
+        upper = np.concatenate([MARGIN_EDGES, [self.high]])
+        return np.clip(lower, self.low, self.high), np.clip(upper, self.low, self.high)
+
+    def quantile(self, q):
+        """Approximate ``q``-quantile (0..1); see the module docstring for the error."""
+        n = self.count
+        if not n:
+            return float('nan')
+        cumulative = np.cumsum(self.counts)
+        rank = q * n
+        i = min(int(np.searchsorted(cumulative, rank, side='left')), N_MARGIN_BINS - 1)
+        before = cumulative[i - 1] if i else 0
+        lower, upper = self._bin_bounds()
+        fraction = (rank - before) / self.counts[i] if self.counts[i] else 0.0
+        return float(lower[i] + (upper[i] - lower[i]) * fraction)
+
+    def percentiles(self, percentiles=KPI_PERCENTILES):
+        """``{name: value}`` for ``{name: percentile (0..100)}``."""
+        return {name: self.quantile(p / 100) for name, p in percentiles.items()}
+
+    def bin_groups(self, bins=25):
+        """``(starts, stop, edges)``: the occupied fine bins grouped whole into about ``bins``.
+
+        ``np.add.reduceat(counts[:stop], starts)`` sums any counts on the grid
+        per group; the underflow/overflow bins are stretched to the
+        minimum/maximum in ``edges``.
+        """
+        occupied = np.flatnonzero(self.counts)
+        if not len(occupied):
+            return np.zeros(0, dtype='int64'), 0, np.array([0.0])
+        first, last = occupied[0], occupied[-1] + 1
+        group = max(1, int(np.ceil((last - first) / bins)))
+        starts = np.arange(first, last, group)
+        lower, upper = self._bin_bounds()
+        return starts, last, np.append(lower[starts], upper[last - 1])
+
+    def histogram(self, bins=25):
+        """``(counts, edges)`` with about ``bins`` equal bins over the occupied range."""
+        starts, stop, edges = self.bin_groups(bins)
+        if not len(starts):
+            return np.zeros(0, dtype='int64'), edges
+        return np.add.reduceat(self.counts[:stop], starts), edges
@@ -0,0 +1,359 @@
+"""SQLite data source: sidebar filters and dashboard aggregates as indexed SQL.
+
+``build_sales_db`` streams a sales CSV through the usual cleaning
+(``data_loader.clean_sales_data``) into one ``sales`` table, chunk by chunk,
+with indexes on ``order_date``, ``category``, ``segment`` and ``region``.
+Every row also stores its margin sketch bin, discount code and sales/profit
+grid cells, so the dashboard's histograms are plain ``GROUP BY`` counts.
+
+``SqliteSource`` answers the same questions as the in-memory source
+(``data_sources.FrameSource``): each sidebar selection becomes one WHERE
+clause that SQLite resolves through its indexes, and every KPI card, chart
+and product table is a ``GROUP BY`` over it.  Only the grouped results (at
+most a few thousand rows) are read into pandas, so the history can be far
+larger than memory; the raw rows only leave the database for the 50-row
+preview and, chunk by chunk, for an export.
+
+    python sqlite_source.py sales_data.csv sales.db
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DISASTER_SALES, FINE_BIN, MEASURES
+from charts import MAX_OUTLIER_POINTS, density_from_fine_grid
+from data_loader import N_DISCOUNT_BINS, clean_sales_data, read_sales_csv
+from products import TOP_K
+from render_cache import state_key
+from sketches import N_MARGIN_BINS, MarginSketch, margin_bins
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+DEFAULT_CHUNK_ROWS = 500_000
+
+# Selections whose query results are kept, so going back to one costs no query
+VIEW_CACHE_SIZE = 32
+
+# Cleaned-frame columns stored as they are (order_date as 'YYYY-MM-DD' text)
+STORED_COLUMNS = ['order_date', 'category', 'segment', 'region', 'product_name',
+                  'sales_clean', 'profit_clean', 'discount_clean', 'profit_margin']
+
+# The table is stored in order_date order, so a date range is a contiguous run of
+# pages; the dimension indexes end in order_date so they also narrow the range
+INDEXES = {
+    'order_date': ['order_date'],
+    'category': ['category', 'order_date'],
+    'segment': ['segment', 'order_date'],
+    'region': ['region', 'order_date'],
+}
+
+# Rows returned by the preview table
+PREVIEW_COLUMNS = ['order_date', 'category', 'segment', 'region', 'sales_clean',
+                   'profit_clean', 'profit_margin']
+
+
+def is_sqlite_path(path):
+    return str(path).lower().endswith(SQLITE_EXTENSIONS)
+
+
+# ============================================
+# BUILD
+# ============================================
+
+def _db_rows(df):
+    """The stored columns plus the precomputed bins of a cleaned chunk."""
+    rows = df[[c for c in STORED_COLUMNS if c in df.columns]].copy()
+    rows['order_date'] = rows['order_date'].dt.strftime('%Y-%m-%d')
+    for column in ['category', 'segment', 'region', 'product_name']:
+        rows[column] = rows[column].astype(str)
+    margin = df['profit_margin']
+    rows['margin_bin'] = (pd.Series(margin_bins(margin), index=df.index, dtype='Int64')
+                          .mask(margin.isna()))
+    if 'discount_bin' in df.columns:
+        rows['discount_bin'] = df['discount_bin'].astype('int64')
+    rows['sales_bin'] = np.floor(df['sales_clean'] / FINE_BIN).astype('Int64')
+    rows['profit_bin'] = np.floor(df['profit_clean'] / FINE_BIN).astype('Int64')
+    return rows
+
+
+def build_sales_db(csv_path, db_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write the cleaned rows of ``csv_path`` into a new, indexed SQLite file at ``db_path``.
+
+    Chunks are first appended to a staging file, then copied over sorted by
+    ``order_date`` (SQLite sorts out of core).  The database is built under a
+    temporary name and renamed into place, so running dashboards keep
+    reading the old file until the new one is done.
+    """
+    tmp_path = f'{db_path}.tmp-{os.getpid()}'
+    staging_path = f'{tmp_path}.staging'
+    for path in (tmp_path, staging_path):
+        if os.path.exists(path):
+            os.remove(path)
+    bounds = {'rows': 0, 'min_sales': np.inf, 'max_sales': -np.inf}
+    columns = None
+    with closing(sqlite3.connect(staging_path)) as staging:
+        staging.execute('PRAGMA journal_mode = OFF')
+        staging.execute('PRAGMA synchronous = OFF')
+        for raw in read_sales_csv(csv_path, chunksize=chunk_rows):
+            rows = _db_rows(clean_sales_data(raw, sort=False))
+            rows.to_sql('sales', staging, if_exists='append', index=False)
+            columns = [c for c in rows.columns if c in STORED_COLUMNS]
+            bounds['rows'] += len(rows)
+            if len(rows):
+                bounds['min_sales'] = min(bounds['min_sales'], float(rows['sales_clean'].min()))
+                bounds['max_sales'] = max(bounds['max_sales'], float(rows['sales_clean'].max()))
+        staging.commit()
+
+    with closing(sqlite3.connect(tmp_path)) as conn:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('ATTACH DATABASE ? AS staging', (staging_path,))
+        conn.execute('CREATE TABLE sales AS SELECT * FROM staging.sales ORDER BY order_date')
+        conn.commit()
+        conn.execute('DETACH DATABASE staging')
+        os.remove(staging_path)
+        for name, index_columns in INDEXES.items():
+            conn.execute(f"CREATE INDEX idx_sales_{name} ON sales ({', '.join(index_columns)})")
+        conn.execute('ANALYZE')
+
+        # Sidebar bounds, so opening the database needs no full scan
+        bounds['columns'] = columns or []
+        conn.execute('CREATE TABLE sales_meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute("INSERT INTO sales_meta VALUES ('bounds', ?)", (json.dumps(bounds),))
+        conn.commit()
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+# ============================================
+# QUERIES
+# ============================================
+
+def where_clause(start_date, end_date, category="All", segment="All", regions=None,
+                 sales_range=None, date_bounds=None):
+    """``(sql, params)`` of the WHERE clause of a sidebar selection.
+
+    A date range covering ``date_bounds`` (the table's first and last day)
+    is left out, so whole-history selections scan the table in order
+    instead of going through the date index.
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    clauses, params = ['1'], []
+    if date_bounds is None or start > pd.Timestamp(date_bounds[0]) or end < pd.Timestamp(date_bounds[1]):
+        clauses = ['order_date BETWEEN ? AND ?']
+        params = [start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')]
+    if category != "All":
+        clauses.append('category = ?')
+        params.append(category)
+    if segment != "All":
+        clauses.append('segment = ?')
+        params.append(segment)
+    if regions:
+        clauses.append(f"region IN ({', '.join('?' * len(regions))})")
+        params.extend(regions)
+    if sales_range is not None:
+        clauses.append('sales_clean BETWEEN ? AND ?')
+        params.extend(float(v) for v in sales_range)
+    return ' AND '.join(clauses), params
+
+
+class SqliteSource:
+    """Read-only view of a database written by ``build_sales_db``."""
+
+    def __init__(self, path):
+        self.path = path
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+        with closing(self.connect()) as conn:
+            bounds = json.loads(conn.execute(
+                "SELECT value FROM sales_meta WHERE key = 'bounds'").fetchone()[0])
+            dims = {column: [value for (value,) in conn.execute(
+                        f'SELECT DISTINCT {column} FROM sales ORDER BY {column}')]
+                    for column in ['category', 'segment', 'region']}
+            min_date, max_date = conn.execute(
+                'SELECT MIN(order_date), MAX(order_date) FROM sales').fetchone()
+        self.columns = bounds['columns']
+        self._bounds = {
+            'min_date': pd.Timestamp(min_date).date(),
+            'max_date': pd.Timestamp(max_date).date(),
+            'categories': dims['category'],
+            'segments': dims['segment'],
+            'regions': dims['region'],
+            'min_sales': bounds['min_sales'],
+            'max_sales': bounds['max_sales'],
+            'rows': bounds['rows'],
+        }
+
+    def connect(self):
+        # One short-lived read-only connection per query: sessions run in their own threads
+        return sqlite3.connect(f'file:{os.path.abspath(self.path)}?mode=ro', uri=True)
+
+    def query(self, sql, params=()):
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=list(params))
+
+    def bounds(self):
+        return self._bounds
+
+    def select(self, selection):
+        """The view of ``selection``; recent views (and their results) are reused."""
+        key = state_key('selection', selection)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+        view = SqliteView(self, selection)
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        return view
+
+
+class SqliteView:
+    """A sidebar selection of a ``SqliteSource``; every result is one SQL query, made once."""
+
+    def __init__(self, source, selection):
+        self.source = source
+        self.selection = selection
+        bounds = source.bounds()
+        self.where, self.params = where_clause(
+            **selection, date_bounds=(bounds['min_date'], bounds['max_date']))
+        self.columns = source.columns
+        self.has_discount = 'discount_clean' in source.columns
+        self.count = int(self.summary['orders'].sum())
+
+    def _query(self, sql, params=()):
+        return self.source.query(sql.format(where=self.where), [*self.params, *params])
+
+    @cached_property
+    def summary(self):
+        summary = self._query(
+            "SELECT category, SUM(sales_clean) AS sales, SUM(profit_clean) AS profit, "
+            "COUNT(*) AS orders, SUM(profit_clean < 0) AS loss_orders, "
+            "SUM(profit_margin) AS margin_sum "
+            "FROM sales WHERE {where} GROUP BY category")
+        return summary.set_index('category')[MEASURES]
+
+    def _sketch(self, grouped):
+        counts = np.zeros(N_MARGIN_BINS, dtype='int64')
+        if not len(grouped):
+            return MarginSketch()
+        np.add.at(counts, grouped['margin_bin'].to_numpy('int64'), grouped['n'].to_numpy())
+        return MarginSketch(counts, grouped['total'].sum(), grouped['low'].min(), grouped['high'].max())
+
+    @cached_property
+    def sketch(self):
+        return self._sketch(self._query(
+            "SELECT margin_bin, COUNT(*) AS n, SUM(profit_margin) AS total, "
+            "MIN(profit_margin) AS low, MAX(profit_margin) AS high "
+            "FROM sales WHERE {where} AND margin_bin IS NOT NULL GROUP BY margin_bin"))
+
+    @cached_property
+    def discount(self):
+        grouped = self._query(
+            "SELECT discount_bin, margin_bin, COUNT(*) AS n, SUM(profit_margin) AS total, "
+            "MIN(profit_margin) AS low, MAX(profit_margin) AS high "
+            "FROM sales WHERE {where} AND discount_bin >= 0 AND margin_bin IS NOT NULL "
+            "GROUP BY discount_bin, margin_bin")
+        # An empty result comes back as float columns; the codes index the grid
+        codes = grouped['discount_bin'].to_numpy('int64')
+        counts = np.zeros((N_DISCOUNT_BINS, N_MARGIN_BINS), dtype='int64')
+        counts[codes, grouped['margin_bin'].to_numpy('int64')] = grouped['n'].to_numpy()
+        margin_sum = np.bincount(codes, weights=grouped['total'].to_numpy(),
+                                 minlength=N_DISCOUNT_BINS)
+        return {'counts': counts, 'margin_sum': margin_sum, 'sketch': self._sketch(grouped)}
+
+    @cached_property
+    def disasters(self):
+        return int(self._query(
+            "SELECT COUNT(*) AS n FROM sales WHERE {where} "
+            "AND sales_clean > ? AND profit_clean < 0", [DISASTER_SALES])['n'].iloc[0])
+
+    @cached_property
+    def density(self):
+        fine = self._query(
+            "SELECT category, sales_bin, profit_bin, COUNT(*) AS n FROM sales "
+            "WHERE {where} AND profit_bin IS NOT NULL GROUP BY category, sales_bin, profit_bin")
+        fine_counts = fine.set_index(['category', 'sales_bin', 'profit_bin'])['n']
+        # Discount disasters as points: a deterministic sample stratified by category
+        # (row hash order) when there are more than MAX_OUTLIER_POINTS
+        fraction = min(1.0, MAX_OUTLIER_POINTS / self.disasters) if self.disasters else 1.0
+        outliers = self._query(
+            "SELECT category, sales_clean, profit_clean FROM ("
+            " SELECT category, sales_clean, profit_clean,"
+            "  ROW_NUMBER() OVER (PARTITION BY category"
+            "   ORDER BY (rowid * 2654435761) % 4294967296) AS pick,"
+            "  COUNT(*) OVER (PARTITION BY category) AS n"
+            " FROM sales WHERE {where} AND sales_clean > ? AND profit_clean < 0)"
+            " WHERE pick <= ROUND(n * ?)", [DISASTER_SALES, fraction])
+        return density_from_fine_grid(fine_counts, FINE_BIN, outliers)
+
+    def top_bottom(self, k=TOP_K):
+        """Top/bottom-``k`` products by profit, from one grouped pass."""
+        ranked = self._query(
+            "WITH totals AS MATERIALIZED ("
+            " SELECT product_name, SUM(profit_clean) AS profit, SUM(sales_clean) AS sales,"
+            "  COUNT(*) AS orders FROM sales WHERE {where} GROUP BY product_name) "
+            "SELECT * FROM (SELECT 'top' AS side, * FROM totals ORDER BY profit DESC LIMIT ?) "
+            "UNION ALL "
+            "SELECT * FROM (SELECT 'bottom' AS side, * FROM totals ORDER BY profit ASC LIMIT ?)",
+            [k, k])
+        ranked['margin'] = ranked['profit'] / ranked['sales'] * 100
+
+        def side(name):
+            return ranked[ranked['side'] == name].drop(columns='side').reset_index(drop=True)
+        return side('top'), side('bottom')
+
+    def preview(self, n=50):
+        rows = self._query(f"SELECT {', '.join(PREVIEW_COLUMNS)} FROM sales WHERE {{where}} "
+                           "ORDER BY order_date LIMIT ?", [n])
+        rows['order_date'] = pd.to_datetime(rows['order_date'])
+        return rows
+
+    def export_data(self, columns=None, chunk_rows=100_000):
+        """The selected rows as frames of at most ``chunk_rows`` (always at least one)."""
+        columns = [c for c in (self.columns if columns is None else columns) if c in self.columns]
+        with closing(self.source.connect()) as conn:
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM sales WHERE {self.where}",
+                                  self.params)
+            first = True
+            while True:
+                batch = cursor.fetchmany(chunk_rows)
+                if batch or first:
+                    chunk = pd.DataFrame.from_records(batch, columns=columns)
+                    if 'order_date' in chunk:
+                        chunk['order_date'] = pd.to_datetime(chunk['order_date'])
+                    yield chunk
+                first = False
+                if len(batch) < chunk_rows:
+                    return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the dashboard's SQLite database from a sales CSV")
+    parser.add_argument('csv', help="sales CSV")
+    parser.add_argument('db', help="SQLite file to write (e.g. sales.db)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    build_sales_db(args.csv, args.db, args.chunk_rows)
+    rows = SqliteSource(args.db).bounds()['rows']
+    print(f"Saved: {args.db} ({rows:,} rows in {time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
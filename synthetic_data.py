@@ -0,0 +1,183 @@
+"""Synthetic Superstore-schema extracts for benchmarks and load tests.
+
+Rows follow the shape of the real extract: category/segment/market/region
+mixes, category-dependent discounts and margins, log-normal order values,
+money columns written with thousands separators and order dates in the
+mixed formats the loader has to handle (``31-12-2011``, ``31/12/2011`` and
+a few month-first ``12/31/2011``).  Output is generated and written in
+chunks, so 100M-row files need no more memory than 50K-row ones.
+
+    python synthetic_data.py 1m                    # -> sales_1m.csv
+    python synthetic_data.py 10m --out big.csv --seed 7
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+SIZES = {'50k': 50_000, '1m': 1_000_000, '10m': 10_000_000, '100m': 100_000_000}
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+FIRST_DATE = pd.Timestamp('2011-01-01')
+N_DAYS = 1461   # 2011-2014
+
+N_PRODUCTS = 3800
+
+CATEGORIES = {
+    # category: (share of orders, sub-categories, typical margin, discount weights)
+    'Office Supplies': (0.61, ['Binders', 'Storage', 'Art', 'Paper', 'Supplies'], 0.14,
+                        [0.55, 0.15, 0.15, 0.05, 0.05, 0.03, 0.02]),
+    'Technology': (0.20, ['Phones', 'Copiers', 'Machines', 'Accessories'], 0.14,
+                   [0.55, 0.2, 0.1, 0.05, 0.05, 0.03, 0.02]),
+    'Furniture': (0.19, ['Chairs', 'Tables', 'Bookcases', 'Furnishings'], 0.07,
+                  [0.35, 0.15, 0.15, 0.1, 0.1, 0.05, 0.1]),
+}
+DISCOUNTS = [0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+
+SEGMENTS = {'Consumer': 0.52, 'Corporate': 0.30, 'Home Office': 0.18}
+
+# region: (market, share of orders, countries)
+REGIONS = {
+    'Central': ('EU', 0.22, ['Germany', 'France', 'Italy', 'Austria']),
+    'South': ('LATAM', 0.12, ['Brazil', 'Argentina', 'Peru']),
+    'EMEA': ('EMEA', 0.10, ['Turkey', 'Egypt', 'Iran']),
+    'North': ('EU', 0.08, ['United Kingdom', 'Sweden', 'Norway']),
+    'Africa': ('Africa', 0.09, ['Nigeria', 'Morocco', 'South Africa']),
+    'Oceania': ('APAC', 0.07, ['Australia', 'New Zealand']),
+    'Southeast Asia': ('APAC', 0.07, ['Indonesia', 'Philippines', 'Vietnam']),
+    'North Asia': ('APAC', 0.05, ['China', 'Japan', 'South Korea']),
+    'Central Asia': ('APAC', 0.04, ['India', 'Pakistan']),
+    'West': ('US', 0.06, ['United States']),
+    'East': ('US', 0.05, ['United States']),
+    'Caribbean': ('LATAM', 0.03, ['Cuba', 'Dominican Republic']),
+    'Canada': ('Canada', 0.02, ['Canada']),
+}
+
+SHIP_MODES = {'Standard Class': 0.6, 'Second Class': 0.2, 'First Class': 0.15, 'Same Day': 0.05}
+PRIORITIES = {'Medium': 0.57, 'High': 0.3, 'Critical': 0.08, 'Low': 0.05}
+
+# (strftime format, share of rows); the month-first minority takes the slow fallback path
+DATE_FORMATS = [('%d-%m-%Y', 0.5), ('%d/%m/%Y', 0.45), ('%m/%d/%Y', 0.05)]
+
+
+def parse_size(size):
+    """Row count from a preset name (``'1m'``) or a plain number (``'250000'``)."""
+    size = str(size).lower().replace('_', '')
+    return SIZES[size] if size in SIZES else int(size)
+
+
+def _pick(rng, table, n):
+    names = list(table)
+    weights = np.array([table[name] if not isinstance(table[name], tuple) else table[name][1]
+                        for name in names], dtype=float)
+    return rng.choice(len(names), n, p=weights / weights.sum())
+
+
+def _money(values):
+    return pd.Series(values).map('{:,}'.format).to_numpy()
+
+
+def _date_strings():
+    """Every day of the range in every format, so rows only index into them."""
+    days = FIRST_DATE + pd.to_timedelta(np.arange(N_DAYS + 7), unit='D')
+    return days, [np.asarray(days.strftime(fmt)) for fmt, _ in DATE_FORMATS]
+
+
+def generate_chunk(rng, n, first_id=0):
+    """``n`` synthetic order lines with the raw CSV column layout (strings for dates/money)."""
+    days, formatted = _date_strings()
+    day = rng.integers(0, N_DAYS, n)
+    ship_day = day + rng.integers(0, 7, n)
+    date_format = rng.choice(len(DATE_FORMATS), n, p=[share for _, share in DATE_FORMATS])
+    order_date = np.choose(date_format, [strings[day] for strings in formatted])
+
+    category_names = list(CATEGORIES)
+    category = rng.choice(len(category_names), n, p=[CATEGORIES[c][0] for c in category_names])
+    region_names = list(REGIONS)
+    region = _pick(rng, REGIONS, n)
+    segment_names = list(SEGMENTS)
+    segment = _pick(rng, SEGMENTS, n)
+
+    sub_category = np.empty(n, dtype=object)
+    discount = np.empty(n)
+    base_margin = np.empty(n)
+    for i, name in enumerate(category_names):
+        rows = category == i
+        _, subs, margin, discount_weights = CATEGORIES[name]
+        sub_category[rows] = rng.choice(subs, rows.sum())
+        discount[rows] = rng.choice(DISCOUNTS, rows.sum(), p=discount_weights)
+        # Centred on the category's typical margin; deeper discounts push lines into losses
+        base_margin[rows] = margin + 1.5 * np.dot(DISCOUNTS, discount_weights)
+
+    country = np.empty(n, dtype=object)
+    for i, name in enumerate(region_names):
+        rows = region == i
+        country[rows] = rng.choice(REGIONS[name][2], rows.sum())
+
+    quantity = rng.integers(1, 15, n)
+    sales = np.round(rng.lognormal(4.8, 1.25, n) * np.sqrt(quantity)).astype(np.int64)
+    sales[rng.random(n) < 0.0001] = 0   # a few zero-sales lines, as in the real extract
+    profit = np.round(sales * (base_margin - 1.5 * discount + rng.normal(0, 0.15, n)), 1)
+    product = rng.zipf(1.3, n) % N_PRODUCTS
+
+    return pd.DataFrame({
+        'order_id': np.char.add('SYN-', np.arange(first_id, first_id + n).astype(str)),
+        'order_date': order_date,
+        'ship_date': formatted[0][ship_day],
+        'ship_mode': np.array(list(SHIP_MODES))[_pick(rng, SHIP_MODES, n)],
+        'customer_name': np.char.add('Customer ', rng.integers(0, 5000, n).astype(str)),
+        'segment': np.array(segment_names)[segment],
+        'state': 'State',
+        'country': country,
+        'market': np.array([REGIONS[r][0] for r in region_names])[region],
+        'region': np.array(region_names)[region],
+        'product_id': np.char.add('P-', product.astype(str)),
+        'category': np.array(category_names)[category],
+        'sub_category': sub_category,
+        'product_name': np.char.add('Product ', product.astype(str)),
+        'sales': _money(sales),
+        'quantity': quantity,
+        'discount': discount,
+        'profit': _money(profit),
+        'shipping_cost': np.round(sales * rng.uniform(0.02, 0.15, n), 2),
+        'order_priority': np.array(list(PRIORITIES))[_pick(rng, PRIORITIES, n)],
+        'year': days[day].year,
+    })
+
+
+def iter_chunks(n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0):
+    """Chunks of a synthetic extract; the same seed always gives the same rows."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_rows, chunk_rows):
+        yield generate_chunk(rng, min(chunk_rows, n_rows - start), first_id=start)
+
+
+def write_sales_csv(path, n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=0):
+    """Write an ``n_rows`` synthetic extract to ``path`` chunk by chunk."""
+    header = True
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in iter_chunks(n_rows, chunk_rows, seed):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic Superstore sales extract")
+    parser.add_argument('size', help=f"rows: one of {', '.join(SIZES)} or a number")
+    parser.add_argument('--out', help="output CSV (default: sales_<size>.csv)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    n_rows = parse_size(args.size)
+    path = args.out or f'sales_{args.size.lower()}.csv'
+    write_sales_csv(path, n_rows, args.chunk_rows, args.seed)
+    print(f"Saved: {path} ({n_rows:,} rows)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
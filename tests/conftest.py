@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_loader import clean_sales_data, read_sales_csv  # noqa: E402
+from synthetic_data import write_sales_csv  # noqa: E402
+
+SAMPLE_ROWS = 5000
+
+
+@pytest.fixture(scope='session')
+def sales_csv(tmp_path_factory):
+    """A small synthetic extract in the real file format."""
+    path = str(tmp_path_factory.mktemp('data') / 'sales.csv')
+    write_sales_csv(path, SAMPLE_ROWS, seed=3)
+    return path
+
+
+@pytest.fixture(scope='session')
+def clean_df(sales_csv):
+    return clean_sales_data(read_sales_csv(sales_csv))
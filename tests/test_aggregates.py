@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregates
+from aggregates import (PARTIAL_COLUMNS, finalize, merge_partials, partial_aggregates,
+                        partials_by_cell, slice_partials)
+from engine import run_partitioned
+from executive_report import build_report
+
+
+def assert_same_aggregates(expected, got):
+    assert expected['rows_read'] == got['rows_read']
+    for key, value in expected['totals'].items():
+        assert got['totals'][key] == pytest.approx(value), key
+    for key in ['monthly_sales', 'segment_sales', 'category_sales', 'segment_margin']:
+        pd.testing.assert_series_equal(expected[key].sort_index(), got[key].sort_index(),
+                                       check_names=False)
+    assert expected['margin_percentiles'] == got['margin_percentiles']
+    pd.testing.assert_series_equal(expected['disaster_discount'].sort_index(),
+                                   got['disaster_discount'].sort_index(), check_names=False)
+
+
+def test_merged_partials_equal_one_pass(clean_df):
+    bounds = [0, 700, 701, 2500, len(clean_df)]
+    parts = [partial_aggregates(clean_df.iloc[lo:hi]) for lo, hi in zip(bounds, bounds[1:])]
+    assert_same_aggregates(finalize(partial_aggregates(clean_df)), finalize(merge_partials(parts)))
+
+
+def test_partitioned_partials_equal_one_pass(clean_df):
+    result = run_partitioned(clean_df, partial_aggregates, merge_partials, jobs=2,
+                             columns=[c for c in PARTIAL_COLUMNS if c in clean_df], min_rows=0)
+    assert_same_aggregates(finalize(partial_aggregates(clean_df)), finalize(result))
+
+
+def test_slices_of_cells_equal_filtered_rows(clean_df):
+    cells = partials_by_cell(clean_df)
+    for (region,), part in slice_partials(cells, ['region']).items():
+        rows = clean_df[clean_df['region'].astype(str) == region]
+        assert_same_aggregates(finalize(partial_aggregates(rows)), finalize(part))
+
+@pytest.mark.parametrize('n_parts', [1, 2, 3])
+def test_empty_slice_finalizes(clean_df, n_parts):
+    # e.g. a cell whose only orders had $0 sales
+    empty = partial_aggregates(clean_df.iloc[:0], rows_read=2, zero_sales=2)
+    aggs = finalize(merge_partials([empty] * n_parts))
+    assert aggs['rows_read'] == aggs['zero_sales'] == 2 * n_parts
+    assert aggs['totals']['orders'] == 0
+    assert list(aggs['segment'].columns) == list(aggs['category'].columns)
+    assert len(aggs['category_sales']) == 0
+    assert 'Total Orders: 0' in build_report(aggs)
+
+
+def test_empty_part_does_not_change_merge(clean_df):
+    empty = partial_aggregates(clean_df.iloc[:0])
+    assert_same_aggregates(finalize(partial_aggregates(clean_df)),
+                           finalize(merge_partials([empty, partial_aggregates(clean_df), empty])))
+
+
+def test_stream_partials_match_whole_file(sales_csv, clean_df):
+    raw_rows = len(pd.read_csv(sales_csv, usecols=['sales']))
+    expected = partial_aggregates(clean_df, rows_read=raw_rows, zero_sales=raw_rows - len(clean_df))
+    assert_same_aggregates(finalize(expected),
+                           finalize(aggregates.stream_partials(sales_csv, chunk_rows=900)))
+    assert np.isfinite(finalize(expected)['totals']['overall_margin'])
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import (CUBE_SOURCE_COLUMNS, MARGIN_BIN_COLUMNS, SalesCube, cube_cells, merge_cube_cells,
+                  summarize_rows)
+from engine import run_partitioned
+from filters import BitmapIndex, apply_filters
+from sketches import MarginSketch
+from test_filters import random_selections
+
+
+@pytest.fixture(scope='module')
+def cube(clean_df):
+    return SalesCube(clean_df, jobs=1)
+
+
+@pytest.fixture(scope='module')
+def index(clean_df):
+    return BitmapIndex(clean_df)
+
+
+def test_cube_summary_equals_rows(clean_df, cube, index):
+    # Random day ranges: whole months from the cells, partial edge months from rows
+    for selection in random_selections(clean_df, 150, seed=2):
+        selection['sales_range'] = None
+        rows = apply_filters(clean_df, index=index, **selection)
+        del selection['sales_range']
+        expected = summarize_rows(rows)
+        got = cube.summary(clean_df, index=index, **selection)
+        assert list(got.index) == list(expected.index), selection
+        np.testing.assert_allclose(got.to_numpy(float), expected.to_numpy(float), rtol=1e-9)
+
+        sketch = cube.margin_sketch(clean_df, index=index, **selection)
+        assert (sketch.counts == MarginSketch.from_values(rows['profit_margin']).counts).all()
+
+
+def test_summary_by_segment(clean_df, cube):
+    first, last = clean_df['order_date'].iloc[[0, -1]].dt.date
+    np.testing.assert_allclose(cube.summary(clean_df, first, last, by='segment').to_numpy(float),
+                               summarize_rows(clean_df, by='segment').to_numpy(float))
+
+
+def test_partitioned_build_matches(clean_df, cube):
+    cells = run_partitioned(clean_df, cube_cells, merge_cube_cells, jobs=2,
+                            columns=CUBE_SOURCE_COLUMNS, min_rows=0)
+    # Same cells; sums only differ by the order they were added in
+    pd.testing.assert_frame_equal(cells.drop(columns=MARGIN_BIN_COLUMNS), cube.cells)
+    assert (cells[MARGIN_BIN_COLUMNS].to_numpy() == cube.margin_counts).all()
@@ -0,0 +1,64 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from column_store import load_shared_data
+from data_loader import (cache_is_fresh, clean_sales_data, data_version, discount_bins,
+                         load_clean_data, read_sales_csv)
+
+
+def copy_extract(sales_csv, tmp_path):
+    path = str(tmp_path / 'sales.csv')
+    shutil.copy(sales_csv, path)
+    return path
+
+
+def test_cache_round_trip(sales_csv, tmp_path):
+    path = copy_extract(sales_csv, tmp_path)
+    fresh = load_clean_data(path)
+    assert cache_is_fresh(path)
+    pd.testing.assert_frame_equal(load_clean_data(path), fresh, check_categorical=False)
+    pd.testing.assert_frame_equal(fresh, load_clean_data(path, use_cache=False),
+                                  check_categorical=False)
+    assert fresh['order_date'].is_monotonic_increasing
+    assert (fresh['sales_clean'] > 0).all()
+
+
+def test_changed_csv_invalidates_cache(sales_csv, tmp_path):
+    path = copy_extract(sales_csv, tmp_path)
+    rows = len(load_clean_data(path))
+    version = data_version(path)
+    with open(path, 'a', encoding='utf-8') as f:
+        with open(sales_csv, encoding='utf-8') as source:
+            f.write(source.readlines()[-1])
+    assert not cache_is_fresh(path) and data_version(path) != version
+    assert len(load_clean_data(path)) == rows + 1
+
+
+def test_touched_csv_keeps_cache(sales_csv, tmp_path):
+    path = copy_extract(sales_csv, tmp_path)
+    load_clean_data(path)
+    os.utime(path, ns=(0, 0))
+    assert cache_is_fresh(path)
+
+
+def test_column_store_matches_cache(sales_csv, tmp_path):
+    path = copy_extract(sales_csv, tmp_path)
+    shared = load_shared_data(path)
+    pd.testing.assert_frame_equal(shared.copy(deep=True), load_clean_data(path),
+                                  check_categorical=False)
+    assert not shared['sales_clean'].to_numpy().flags.writeable
+
+
+def test_discount_bins():
+    codes = discount_bins([0.0, 0.05, 0.051, 0.1, 0.6, 1.0, np.nan, -0.1, 1.2])
+    assert list(codes) == [0, 1, 2, 2, 12, 20, -1, -1, -1]
+
+
+def test_typed_ingest(sales_csv):
+    raw = read_sales_csv(sales_csv)
+    assert isinstance(raw['category'].dtype, pd.CategoricalDtype)
+    assert raw['sales'].dtype == 'float64'
+    assert len(clean_sales_data(raw)) == int((raw['sales'] > 0).sum())
@@ -0,0 +1,67 @@
+import datetime
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import SalesCube
+from data_sources import FrameSource
+from export import export_file
+from filters import BitmapIndex
+from products import ProductRollup
+from sqlite_source import SqliteSource, build_sales_db
+
+
+@pytest.fixture(scope='module')
+def sources(sales_csv, clean_df, tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp('db') / 'sales.db')
+    build_sales_db(sales_csv, db_path, chunk_rows=1500)
+    frame = FrameSource(clean_df, BitmapIndex(clean_df), SalesCube(clean_df, jobs=1),
+                        ProductRollup(clean_df))
+    return frame, SqliteSource(db_path)
+
+
+def selections(bounds):
+    whole = dict(start_date=bounds['min_date'], end_date=bounds['max_date'], category="All",
+                 segment="All", regions=[], sales_range=None)
+    return {
+        'all': whole,
+        'combined': dict(whole, start_date=datetime.date(2012, 3, 15),
+                         end_date=datetime.date(2013, 11, 2), category='Technology',
+                         segment='Corporate', regions=sorted(bounds['regions'])[:4]),
+        'sales_range': dict(whole, sales_range=(100.0, 1000.0)),
+        'empty': dict(whole, sales_range=(99_999.0, 100_000.0)),
+    }
+
+
+@pytest.mark.parametrize('name', ['all', 'combined', 'sales_range', 'empty'])
+def test_sqlite_view_matches_frame_view(sources, name):
+    frame, sqlite = sources
+    selection = selections(frame.bounds())[name]
+    f, s = frame.select(selection), sqlite.select(selection)
+
+    assert f.count == s.count
+    assert (name == 'empty') == (f.count == 0)
+    np.testing.assert_allclose(f.summary.sort_index().to_numpy(float),
+                               s.summary.sort_index().to_numpy(float))
+    assert (f.sketch.counts == s.sketch.counts).all()
+    assert f.sketch.percentiles() == pytest.approx(s.sketch.percentiles(), nan_ok=True)
+    assert f.disasters == s.disasters
+    assert (f.discount['counts'] == s.discount['counts']).all()
+    np.testing.assert_allclose(f.discount['margin_sum'], s.discount['margin_sum'])
+    for f_side, s_side in zip(f.top_bottom(), s.top_bottom()):
+        assert list(f_side['product_name'].astype(str)) == list(s_side['product_name'])
+    assert len(s.preview(50)) == len(f.preview(50))
+
+
+@pytest.mark.parametrize('name', ['combined', 'empty'])
+def test_sqlite_export_matches_frame_export(sources, name):
+    frame, sqlite = sources
+    selection = selections(frame.bounds())[name]
+    columns = ['order_date', 'category', 'sales_clean', 'profit_clean']
+    exported = [pd.read_csv(io.BytesIO(export_file(view.export_data(columns), 'CSV', columns)))
+                for view in (frame.select(selection), sqlite.select(selection))]
+    assert list(exported[0].columns) == list(exported[1].columns) == columns
+    assert len(exported[0]) == len(exported[1])
+    assert exported[0]['sales_clean'].sum() == pytest.approx(exported[1]['sales_clean'].sum())
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from date_parsing import LEGACY_KWARGS, parse_dates, parse_dates_with_report
+
+MIXED = ['31-12-2011', '01-02-2012', '1/2/2012', '05/06/2013', '12/31/2011', ' 7-8-2014 ',
+         '29-02-2012', None, '2013-04-05']
+
+
+def legacy(values):
+    return pd.to_datetime(pd.Series(values, dtype=object).str.strip(), errors='coerce',
+                          **LEGACY_KWARGS)
+
+
+def test_matches_legacy_parser_on_known_formats():
+    expected = legacy(MIXED)
+    got = parse_dates(pd.Series(MIXED))
+    assert (got.isna() == expected.isna()).all()
+    assert (got[got.notna()] == expected[expected.notna()]).all()
+
+
+def test_matches_legacy_parser_on_extract(sales_csv):
+    raw = pd.read_csv(sales_csv, usecols=['order_date', 'ship_date'], dtype=str)
+    for column in raw:
+        pd.testing.assert_series_equal(parse_dates(raw[column]).astype('datetime64[ns]'),
+                                       legacy(raw[column]).astype('datetime64[ns]'),
+                                       check_names=False)
+
+
+def test_report_lists_unparseable_values():
+    values = pd.Series(['31-12-2011', 'not a date', '32-13-2011', None], index=[10, 11, 12, 13])
+    dates, report = parse_dates_with_report(values)
+    assert list(report['unparsed_rows']) == [11, 12]
+    assert report['unparsed_values'] == ['32-13-2011', 'not a date']
+    assert dates.index.equals(values.index)
+    assert dates[10] == pd.Timestamp('2011-12-31') and pd.isna(dates[13])
+
+
+def test_empty_column():
+    dates, report = parse_dates_with_report(pd.Series([], dtype=object))
+    assert len(dates) == 0 and report['unique'] == 0
+    assert np.issubdtype(dates.dtype, np.datetime64)
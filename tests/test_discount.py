@@ -0,0 +1,22 @@
+import matplotlib
+import numpy as np
+import pandas as pd
+
+from charts import dashboard_discount_ranges
+from cube import discount_grid
+from data_loader import DISCOUNT_BANDS
+
+matplotlib.use('Agg')
+
+
+def test_discount_bands_match_pd_cut(clean_df):
+    # Right-closed bands like pd.cut: orders without a discount are in none of them
+    expected = clean_df.groupby(pd.cut(clean_df['discount_clean'], bins=[0, 0.1, 0.2, 0.3, 0.5, 1.0],
+                                       labels=list(DISCOUNT_BANDS)),
+                                observed=True)['profit_margin'].mean()
+    fig = dashboard_discount_ranges(discount_grid(clean_df))
+    ax = fig.axes[0]
+    labels = [tick.get_text() for tick in ax.get_xticklabels()]
+    heights = [bar.get_height() for bar in ax.patches]
+    assert labels == list(expected.index)
+    np.testing.assert_allclose(heights, expected.to_numpy())
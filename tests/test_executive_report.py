@@ -0,0 +1,27 @@
+import pandas as pd
+
+from aggregates import DISASTER_SALES, report_aggregates
+from executive_report import _category_lines, build_report, key_insights
+
+
+def test_weakest_category_quotes_its_deepest_disaster_discount(clean_df):
+    aggs = report_aggregates(clean_df)
+    margins = clean_df.groupby('category', observed=True)[['profit_clean', 'sales_clean']].sum()
+    weakest = (margins['profit_clean'] / margins['sales_clean']).idxmin()
+    disasters = clean_df[(clean_df['sales_clean'] > DISASTER_SALES) & (clean_df['profit_clean'] < 0)]
+    deepest = disasters.loc[disasters['category'] == weakest, 'discount_clean'].max()
+
+    assert f"Cap {weakest.lower()} discounts at 20% (currently seeing {deepest:.0%})" in build_report(aggs)
+    assert any(line.startswith(f"{weakest} = lowest margin") and f"up to {deepest:.0%}" in line
+               for line in key_insights(aggs))
+
+
+def test_equal_printed_margins_get_equal_tags():
+    categories = pd.DataFrame({'share': [37.0, 32.0, 31.0], 'margin': [2.13, 2.08, 2.6]},
+                              index=['Technology', 'Furniture', 'Office Supplies'])
+    lines = _category_lines(categories)
+
+    assert lines[0].endswith('2.1% margin [MARGIN KILLER]')
+    assert lines[1].endswith('2.1% margin [MARGIN KILLER]')
+    assert lines[2].endswith('[STAR PERFORMER]')
+    assert all(line.endswith('[SOLID]') for line in _category_lines(categories.assign(margin=2.1)))
@@ -0,0 +1,68 @@
+import gzip
+import io
+
+import pandas as pd
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, export_file, iter_csv_chunks
+
+COLUMNS = ['order_date', 'category', 'sales_clean', 'profit_clean']
+
+
+def read_back(data, fmt):
+    if fmt == 'Parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if fmt == 'CSV (gzip)':
+        data = gzip.decompress(data)
+    return pd.read_csv(io.BytesIO(data), parse_dates=['order_date'])
+
+
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+def test_round_trip(clean_df, fmt):
+    df = clean_df[COLUMNS]
+    back = read_back(export_file(df, fmt, COLUMNS, chunk_rows=777), fmt)
+    assert list(back.columns) == COLUMNS
+    assert len(back) == len(df)
+    assert back['sales_clean'].sum() == pytest.approx(df['sales_clean'].sum())
+    assert (back['category'].astype(str).to_numpy() == df['category'].astype(str).to_numpy()).all()
+
+
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+def test_iterable_of_chunks_matches_frame(clean_df, fmt):
+    df = clean_df[COLUMNS]
+    chunks = (df.iloc[i:i + 1000] for i in range(0, len(df), 1000))
+    pd.testing.assert_frame_equal(read_back(export_file(chunks, fmt, COLUMNS), fmt),
+                                  read_back(export_file(df, fmt, COLUMNS), fmt))
+
+
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+def test_empty_selection_keeps_header(clean_df, fmt):
+    back = read_back(export_file(clean_df.iloc[:0], fmt, COLUMNS), fmt)
+    assert list(back.columns) == COLUMNS and len(back) == 0
+
+
+@pytest.mark.parametrize('fmt', list(EXPORT_FORMATS))
+def test_streamlit_accepts_deferred_download(clean_df, fmt):
+    # What st.download_button does with the callable's result on click
+    data, _ = convert_data_to_bytes_and_infer_mime(
+        export_file(clean_df, fmt, COLUMNS), unsupported_error=TypeError("unsupported"))
+    assert len(read_back(data, fmt)) == len(clean_df)
+
+
+def test_default_export_is_compressed(clean_df):
+    # The finished file is held in memory for the download
+    data = export_file(clean_df[COLUMNS])
+    assert DEFAULT_EXPORT_FORMAT == 'CSV (gzip)' and len(read_back(data, 'CSV (gzip)')) == len(clean_df)
+    assert len(data) < len(export_file(clean_df[COLUMNS], 'CSV')) / 2
+
+
+def test_no_columns_is_an_error(clean_df):
+    with pytest.raises(ValueError):
+        export_file(clean_df, 'CSV', [])
+
+
+def test_csv_header_only_once(clean_df):
+    pieces = list(iter_csv_chunks(clean_df, COLUMNS, chunk_rows=1000))
+    assert len(pieces) == -(-len(clean_df) // 1000)
+    assert sum(piece.startswith('order_date,') for piece in pieces) == 1
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import BitmapIndex, apply_filters, date_range_slice
+
+
+def random_selections(df, n, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(df['order_date'].min(), df['order_date'].max(), freq='D')
+    categories = ["All"] + sorted(df['category'].astype(str).unique())
+    segments = ["All"] + sorted(df['segment'].astype(str).unique())
+    regions = sorted(df['region'].astype(str).unique())
+    for _ in range(n):
+        start, end = np.sort(rng.choice(days, 2))
+        sales_range = None
+        if rng.random() < 0.3:
+            sales_range = tuple(sorted(rng.uniform(0, 2000, 2)))
+        yield dict(start_date=pd.Timestamp(start).date(), end_date=pd.Timestamp(end).date(),
+                   category=str(rng.choice(categories)), segment=str(rng.choice(segments)),
+                   regions=list(rng.choice(regions, rng.integers(0, 4), replace=False)),
+                   sales_range=sales_range)
+
+
+def mask_filter(df, start_date, end_date, category, segment, regions, sales_range):
+    """The filters as plain boolean masks over the whole frame."""
+    day = df['order_date'].dt.normalize()
+    mask = (day >= pd.Timestamp(start_date)) & (day <= pd.Timestamp(end_date))
+    if category != "All":
+        mask &= df['category'] == category
+    if segment != "All":
+        mask &= df['segment'] == segment
+    if regions:
+        mask &= df['region'].isin(regions)
+    if sales_range is not None:
+        mask &= df['sales_clean'].between(*sales_range)
+    return df[mask]
+
+
+@pytest.fixture(scope='module')
+def index(clean_df):
+    return BitmapIndex(clean_df)
+
+
+def test_filters_match_boolean_masks(clean_df, index):
+    for selection in random_selections(clean_df, 200):
+        expected = mask_filter(clean_df, **selection).index
+        assert apply_filters(clean_df, **selection).index.equals(expected), selection
+        assert apply_filters(clean_df, index=index, **selection).index.equals(expected), selection
+
+
+def test_bitmaps_cover_every_row_once(clean_df, index):
+    for dim, bitmaps in index.bitmaps.items():
+        bits = sum(np.unpackbits(b, count=len(clean_df)).astype(int) for b in bitmaps.values())
+        assert (bits == 1).all(), dim
+
+
+def test_unknown_value_selects_nothing(clean_df, index):
+    assert not index.select(0, len(clean_df), category='No Such Category').any()
+
+
+def test_date_slice_is_a_view(clean_df):
+    first = clean_df['order_date'].iloc[0].date()
+    window = date_range_slice(clean_df, first, first)
+    assert len(window) and (window['order_date'].dt.date == first).all()
+    assert np.shares_memory(window['sales_clean'].to_numpy(), clean_df['sales_clean'].to_numpy())
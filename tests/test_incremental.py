@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import SalesCube
+from data_loader import clean_sales_data, data_version, load_clean_data, read_sales_csv
+from data_sources import FrameSource, open_steps
+from filters import BitmapIndex
+from incremental import ingest_delta
+from products import ProductRollup
+from synthetic_data import write_sales_csv
+
+
+def build(steps):
+    built = {}
+    for name, step in steps:
+        built[name] = step(built)
+    return [name for name, _ in steps], built['source']
+
+
+def write_batch(directory, name, order_date, seed):
+    write_sales_csv(str(directory / 'raw.csv'), 1500, seed=seed)
+    batch = pd.read_csv(directory / 'raw.csv', dtype=str)
+    batch['order_date'] = order_date
+    # A product the extract has never seen
+    batch.loc[batch.index % 40 == 0, 'product_name'] = f'New Product {seed}'
+    batch.to_csv(directory / name, index=False)
+    return str(directory / name)
+
+
+def selections(bounds):
+    whole = dict(start_date=bounds['min_date'], end_date=bounds['max_date'], category="All",
+                 segment="All", regions=[], sales_range=None)
+    return [whole,
+            dict(whole, category='Furniture', regions=sorted(bounds['regions'])[:3]),
+            dict(whole, start_date=pd.Timestamp('2014-12-10').date(), segment='Corporate'),
+            dict(whole, sales_range=(50.0, 500.0))]
+
+
+@pytest.fixture
+def extract(tmp_path):
+    path = str(tmp_path / 'sales.csv')
+    write_sales_csv(path, 8000, seed=5)
+    return path
+
+
+def test_batch_is_added_to_loaded_data(extract, tmp_path):
+    base = load_clean_data(extract)
+    version = data_version(extract)
+    batch_path = write_batch(tmp_path, 'batch.csv', '03-01-2015', 6)
+    batch = clean_sales_data(read_sales_csv(batch_path))
+
+    assert ingest_delta(batch_path, extract)['rows'] == len(batch)
+    assert data_version(extract) != version
+    df = load_clean_data(extract)
+    assert len(df) == len(base) + len(batch)
+    assert df['order_date'].is_monotonic_increasing
+    assert df['sales_clean'].sum() == pytest.approx(base['sales_clean'].sum() + batch['sales_clean'].sum())
+    assert 'New Product 6' in set(df['product_name'].astype(str))
+
+    # The same file again is a no-op
+    version = data_version(extract)
+    assert ingest_delta(batch_path, extract) is None
+    assert data_version(extract) == version
+
+
+def test_invalid_batch_is_rejected(extract, tmp_path):
+    load_clean_data(extract)
+    version = data_version(extract)
+    batch_path = write_batch(tmp_path, 'bad.csv', '03-01-2015', 7)
+    batch = pd.read_csv(batch_path, dtype=str)
+    batch.loc[:2, 'order_date'] = 'not a date'
+    batch.to_csv(batch_path, index=False)
+    with pytest.raises(ValueError, match='unparseable order dates'):
+        ingest_delta(batch_path, extract)
+    assert data_version(extract) == version
+
+
+def test_later_batches_are_appended(extract, tmp_path):
+    _, source = build(open_steps(extract, data_version(extract)))
+    for seed, day in [(6, '03-01-2015'), (7, '20-01-2015')]:
+        ingest_delta(write_batch(tmp_path, f'batch{seed}.csv', day, seed), extract)
+        steps, source = build(open_steps(extract, data_version(extract), source))
+        assert steps == ['data', 'source']
+
+    df = load_clean_data(extract)
+    full = FrameSource(df, BitmapIndex(df), SalesCube(df), ProductRollup(df))
+    assert (source.df['order_date'].to_numpy() == df['order_date'].to_numpy()).all()
+    for dim, bitmaps in full.index.bitmaps.items():
+        for value, bits in bitmaps.items():
+            assert (source.index.bitmaps[dim][value] == bits).all(), (dim, value)
+
+    for selection in selections(full.bounds()):
+        expected, got = full.select(selection), source.select(selection)
+        assert expected.count == got.count
+        np.testing.assert_allclose(expected.summary.sort_index().to_numpy(float),
+                                   got.summary.sort_index().to_numpy(float))
+        assert (expected.sketch.counts == got.sketch.counts).all()
+        for want, have in zip(expected.top_bottom(), got.top_bottom()):
+            assert list(want['product_name']) == list(have['product_name'])
+
+
+def test_backdated_batch_is_a_full_rebuild(extract, tmp_path):
+    _, source = build(open_steps(extract, data_version(extract)))
+    ingest_delta(write_batch(tmp_path, 'old.csv', '15-06-2012', 8), extract)
+    steps, source = build(open_steps(extract, data_version(extract), source))
+    assert 'index' in steps and len(source.df) == len(load_clean_data(extract))
+    assert source.df['order_date'].is_monotonic_increasing
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from filters import apply_filters
+from products import TOP_K, ProductRollup
+from test_filters import random_selections
+
+
+@pytest.fixture(scope='module')
+def rollup(clean_df):
+    return ProductRollup(clean_df)
+
+
+def ranked(rows):
+    """Top/bottom products by total profit, from a plain groupby."""
+    totals = rows.groupby('product_name', observed=True)['profit_clean'].sum()
+    return (list(totals.sort_values(ascending=False).index[:TOP_K]),
+            list(totals.sort_values().index[:TOP_K]))
+
+
+def names(tables):
+    return tuple(list(table['product_name']) for table in tables)
+
+
+@pytest.mark.parametrize('category, segment, regions', [
+    ("All", "All", None), ("Technology", "All", None), ("All", "Corporate", ['Central', 'West']),
+])
+def test_whole_history_matches_groupby(clean_df, rollup, category, segment, regions):
+    first, last = clean_df['order_date'].iloc[[0, -1]].dt.date
+    rows = apply_filters(clean_df, first, last, category, segment, regions)
+    got = rollup.top_bottom(rows, category, segment, regions, whole_history=True)
+    assert names(got) == ranked(rows)
+    np.testing.assert_allclose(got[0]['profit'].sum(),
+                               rows.groupby('product_name', observed=True)['profit_clean'].sum()
+                               .nlargest(TOP_K).sum())
+
+
+def test_filtered_rows_match_groupby(clean_df, rollup):
+    for selection in random_selections(clean_df, 30, seed=4):
+        rows = apply_filters(clean_df, **selection)
+        assert names(rollup.top_bottom(rows)) == ranked(rows), selection
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+from data_loader import read_sales_csv
+from profiling import format_profile, profile_csv
+
+
+@pytest.fixture(scope='module')
+def profile(sales_csv):
+    return profile_csv(sales_csv, chunk_rows=700)
+
+
+def test_chunked_profile_equals_one_chunk(sales_csv, profile):
+    whole = profile_csv(sales_csv, chunk_rows=10 ** 6)
+    assert whole['rows'] == profile['rows']
+    margin = whole['checks'].pop('order_margin')
+    assert profile['checks']['order_margin'] == pytest.approx(margin)
+    assert whole['checks'].items() <= profile['checks'].items()
+    for name, column in whole['columns'].items():
+        for key, value in column.items():
+            assert profile['columns'][name][key] == pytest.approx(value), (name, key)
+
+
+def test_profile_matches_pandas(sales_csv, profile):
+    raw = read_sales_csv(sales_csv, columns=list(profile['columns']))
+    assert profile['rows'] == len(raw)
+    sales = profile['columns']['sales']
+    assert sales['mean'] == pytest.approx(raw['sales'].mean())
+    assert sales['std'] == pytest.approx(raw['sales'].std())
+    assert (sales['min'], sales['max']) == (raw['sales'].min(), raw['sales'].max())
+    assert profile['checks']['zero_sales'] == int((raw['sales'] == 0).sum())
+    assert profile['checks']['negative_profit'] == int((raw['profit'] < 0).sum())
+    assert profile['columns']['region']['values'] == raw['region'].value_counts().to_dict()
+    dates = pd.to_datetime(raw['order_date'], format='mixed', dayfirst=True)
+    assert profile['columns']['order_date']['min'] == dates.min().date().isoformat()
+
+
+def test_format_profile(profile):
+    text = format_profile(profile)
+    assert f"Rows: {profile['rows']:,}" in text and 'Order margin percentiles' in text
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from sketches import MARGIN_BIN_WIDTH, MarginSketch
+
+
+@pytest.fixture(scope='module')
+def values():
+    rng = np.random.default_rng(1)
+    return np.concatenate([rng.normal(5, 30, 20_000), rng.uniform(-190, 95, 5_000)])
+
+
+@pytest.mark.parametrize('q', [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+def test_quantile_within_one_bin(values, q):
+    # Inside MARGIN_RANGE a quantile is off by less than one bin width
+    assert abs(MarginSketch.from_values(values).quantile(q) - np.quantile(values, q)) <= MARGIN_BIN_WIDTH
+
+
+def test_exact_moments_and_extremes(values):
+    sketch = MarginSketch.from_values(values)
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(values.mean())
+    assert (sketch.low, sketch.high) == (values.min(), values.max())
+
+
+def test_merge_equals_sketch_of_union(values):
+    parts = np.array_split(values, 7)
+    merged = sum((MarginSketch.from_values(part) for part in parts), MarginSketch())
+    whole = MarginSketch.from_values(values)
+    assert (merged.counts == whole.counts).all()
+    assert merged.percentiles() == whole.percentiles()
+
+
+def test_tails_are_bounded_by_extremes():
+    values = np.array([-900.0, -500.0, 10.0, 20.0, 400.0])
+    sketch = MarginSketch.from_values(values)
+    assert sketch.quantile(0.0) >= -900.0 and sketch.quantile(1.0) <= 400.0
+
+
+def test_empty_sketch():
+    sketch = MarginSketch.from_values([])
+    assert sketch.count == 0 and np.isnan(sketch.quantile(0.5)) and np.isnan(sketch.mean)
+    assert len(sketch.histogram()[0]) == 0
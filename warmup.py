@@ -0,0 +1,119 @@
+"""Background warm-up of the dashboard's data, indexes and default-view charts.
+
+A ``Warmup`` runs the named build steps of one data version (open the data
+source, see ``data_sources.open_steps``, then render the charts of the
+unfiltered view) in a daemon thread.  Sessions that arrive meanwhile poll
+``status()`` and show a "warming" page with its progress instead of
+blocking on the build; the first session after it is ``ready`` finds
+everything built and the default charts in the figure cache.
+
+The on-disk caches (Parquet and the column store) can be built before the
+server starts, so that no worker process ever parses the CSV:
+
+    python warmup.py && streamlit run dashboard.py
+    python warmup.py --data big_extract.csv
+"""
+import argparse
+import sys
+import threading
+import time
+
+from charts import DASHBOARD_CHARTS
+from column_store import load_shared_data
+from instrumentation import log_event
+
+
+class Warmup:
+    """Build steps run in order in a background thread; see the module docstring.
+
+    ``steps`` is a list of ``(name, build)``; ``build(results)`` gets the
+    results of the steps before it by name and returns its own.
+    """
+
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.results = {}
+        self.seconds = {}
+        self.current = None
+        self.error = None
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='dashboard-warmup', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for name, build in self.steps:
+                self.current = name
+                start = time.perf_counter()
+                self.results[name] = build(self.results)
+                self.seconds[name] = time.perf_counter() - start
+                log_event({'event': 'dashboard_warmup', 'step': name,
+                           'wall_ms': round(self.seconds[name] * 1000, 2)})
+        except Exception as exc:   # surfaced to the sessions through ``error``
+            self.error = exc
+            log_event({'event': 'dashboard_warmup', 'step': self.current, 'error': repr(exc)})
+        finally:
+            self.current = None
+            self._finished.set()
+
+    @property
+    def ready(self):
+        return self._finished.is_set() and self.error is None
+
+    def wait(self, timeout=None):
+        """Block until the warm-up has finished or ``timeout`` seconds passed."""
+        return self._finished.wait(timeout)
+
+    def status(self):
+        """``{'step', 'done', 'total', 'ready', 'error'}`` for the warming page."""
+        return {'step': self.current, 'done': len(self.seconds), 'total': len(self.steps),
+                'ready': self.ready, 'error': self.error}
+
+
+def selection_state(version, start_date, end_date, category="All", segment="All",
+                    regions=(), sales_range=None):
+    """The filter state every dashboard chart is a function of (figure cache key)."""
+    return {
+        'data_version': version,
+        'start_date': start_date,
+        'end_date': end_date,
+        'category': category,
+        'segment': segment,
+        'regions': sorted(regions),
+        'sales_range': sales_range,
+    }
+
+
+def render_default_charts(figure_cache, version, source):
+    """Render every dashboard chart of the unfiltered view of ``source`` into ``figure_cache``."""
+    bounds = source.bounds()
+    view = source.select({'start_date': bounds['min_date'], 'end_date': bounds['max_date'],
+                          'category': "All", 'segment': "All", 'regions': [],
+                          'sales_range': None})
+    state = selection_state(version, **view.selection)
+    rendered = 0
+    for chart_id, (draw, name) in DASHBOARD_CHARTS.items():
+        if name == 'discount' and not view.has_discount:
+            continue
+        figure_cache.get_or_render(chart_id, state,
+                                   lambda draw=draw, name=name: draw(getattr(view, name)))
+        rendered += 1
+    return rendered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the dashboard's on-disk caches before serving")
+    parser.add_argument('--data', default='sales_data.csv', help="sales CSV")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = load_shared_data(args.data)
+    print(f"Column store ready: {len(df):,} rows in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())